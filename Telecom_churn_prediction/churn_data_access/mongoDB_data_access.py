@@ -1,6 +1,8 @@
 import sys
+from typing import Iterator, List, Optional
 import pandas as pd
 import numpy as np
+from pymongo import UpdateOne
 from Telecom_churn_prediction.exception import CustomException
 from Telecom_churn_prediction.logger import logger
 from Telecom_churn_prediction.configuration.mongo_db_connection import MongoDBClient
@@ -11,6 +13,10 @@ from Telecom_churn_prediction.constants import database_name
 class DataAccessor:
 
     def __init__(self) -> None:
+        """
+        Connects through MongoDBClient. Tests can run against a stand-in by setting
+        MongoDBClient.client (e.g. mongomock.MongoClient()) before creating the accessor
+        """
         try:
             self.client = MongoDBClient(database_name)
         except Exception as e:
@@ -36,4 +42,55 @@ class DataAccessor:
             return df
          
         except Exception as e:
-            raise CustomException(e,sys)
\ No newline at end of file
+            raise CustomException(e,sys)
+
+
+    def get_collection(self, collection_name, database_name=None):
+        if database_name is None:
+            return self.client.database[collection_name]
+        return self.client.client[database_name][collection_name]
+
+
+    def iter_collection_partitions(self, collection_name, partition_size: int, resume_after_id=None,
+                                   database_name=None) -> Iterator[pd.DataFrame]:
+        """
+        Reads the collection in _id order with a server side cursor and yields it as dataframes of
+        partition_size documents, _id included. Starts after resume_after_id when given
+        """
+        try:
+            collection = self.get_collection(collection_name, database_name)
+            query = {} if resume_after_id is None else {"_id": {"$gt": resume_after_id}}
+            cursor = collection.find(query).sort("_id", 1).batch_size(partition_size)
+
+            documents = []
+            for document in cursor:
+                documents.append(document)
+                if len(documents) == partition_size:
+                    yield pd.DataFrame(documents)
+                    documents = []
+            if documents:
+                yield pd.DataFrame(documents)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+    def bulk_update_by_id(self, collection_name, ids: List, updates: List[dict], batch_size: int,
+                          database_name=None) -> int:
+        """
+        Sets the fields in updates on the documents with the matching ids using unordered bulk_write batches
+        return: number of modified documents
+        """
+        try:
+            collection = self.get_collection(collection_name, database_name)
+            modified = 0
+            for start in range(0, len(ids), batch_size):
+                operations = [UpdateOne({"_id": document_id}, {"$set": update})
+                              for document_id, update in zip(ids[start:start + batch_size],
+                                                             updates[start:start + batch_size])]
+                result = collection.bulk_write(operations, ordered=False)
+                modified += result.modified_count
+            return modified
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -1,22 +1,34 @@
 import boto3
 from Telecom_churn_prediction.configuration.aws_connection import S3Client
 from io import StringIO
-from typing import Union,List
+from typing import TYPE_CHECKING, Optional, Union,List
 import os,sys
 from Telecom_churn_prediction.logger import logger
-from mypy_boto3_s3.service_resource import Bucket
 from Telecom_churn_prediction.exception import CustomException
 from botocore.exceptions import ClientError
 from pandas import DataFrame,read_csv
 import pickle
+import hashlib
+import tempfile
+from Telecom_churn_prediction.constants import model_cache_dir, model_cache_max_bytes
+from Telecom_churn_prediction.utils.main_utils import get_mmap_artifact_path, load_mmap_object
+
+if TYPE_CHECKING:
+    from mypy_boto3_s3.service_resource import Bucket
 
 
 class SimpleStorageService:
 
-    def __init__(self):
+    def __init__(self, cache_dir: str = model_cache_dir, cache_max_bytes: int = model_cache_max_bytes):
+        """
+        :param cache_dir: Local directory where downloaded models are cached by bucket/key/ETag
+        :param cache_max_bytes: Size limit of the model cache, least recently used versions are evicted beyond it
+        """
         s3_client = S3Client()
         self.s3_resource = s3_client.s3_resource
         self.s3_client = s3_client.s3_client
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
 
     def s3_key_path_available(self,bucket_name,s3_key)->bool:
         try:
@@ -58,7 +70,7 @@ class SimpleStorageService:
         except Exception as e:
             raise CustomException(e, sys) from e
 
-    def get_bucket(self, bucket_name: str) -> Bucket:
+    def get_bucket(self, bucket_name: str) -> "Bucket":
         """
         Method Name :   get_bucket
         Description :   This method gets the bucket object based on the bucket_name
@@ -88,10 +100,14 @@ class SimpleStorageService:
         return file_objects[0]
 
 
-    def load_model(self, model_name: str, bucket_name: str, model_dir: str = None) -> object:
+    def load_model(self, model_name: str, bucket_name: str, model_dir: str = None, mmap_mode: str = None,
+                   version: str = None) -> object:
         """
         Method Name :   load_model
-        Description :   This method loads the model_name model from bucket_name bucket with kwargs
+        Description :   This method loads the model_name model from bucket_name bucket with kwargs.
+                        With mmap_mode the model is loaded from the memory mapped serving artifact pushed with
+                        it, models pushed without one are unpickled. With version (an ETag) loading fails
+                        instead of returning another version if the model was replaced in the meantime
 
         Output      :   list of objects or object is returned based on filename
         On Failure  :   Write an exception log and then raise an exception
@@ -109,14 +125,150 @@ class SimpleStorageService:
             )
             model_file = func()
             file_object = self.get_file_object(model_file, bucket_name)
-            model_obj = self.read_object(file_object, decode=False)
-            model = pickle.loads(model_obj)
+            if version is not None and file_object.e_tag != version:
+                raise Exception(f"Model {file_object.key} was replaced, version {file_object.e_tag} "
+                                f"instead of {version}")
+            if mmap_mode is not None:
+                artifact_file_path = self.get_mmap_artifact(bucket_name, file_object)
+                if artifact_file_path is not None:
+                    logger.info("Exited the load_model method of S3Operations class")
+                    return load_mmap_object(artifact_file_path, mmap_mode=mmap_mode)
+                logger.info(f"No memory mapped serving artifact for {file_object.key} version {file_object.e_tag}, "
+                            f"unpickling the model")
+
+            local_file_path = self.get_cached_file(bucket_name, file_object.key, etag=file_object.e_tag)
+            with open(local_file_path, "rb") as model_obj:
+                model = pickle.load(model_obj)
             logger.info("Exited the load_model method of S3Operations class")
             return model
 
         except Exception as e:
             raise CustomException(e, sys) from e
 
+    @staticmethod
+    def file_checksums(file_path: str, block_size: int = 1024 * 1024):
+        """
+        Returns md5 and sha256 hex digests of a local file, read block by block
+        """
+        md5, sha256 = hashlib.md5(), hashlib.sha256()
+        with open(file_path, "rb") as file_obj:
+            for block in iter(lambda: file_obj.read(block_size), b""):
+                md5.update(block)
+                sha256.update(block)
+        return md5.hexdigest(), sha256.hexdigest()
+
+    def is_cached_file_valid(self, file_path: str) -> bool:
+        """
+        Checks a cached file against the sha256 recorded when it was downloaded
+        """
+        checksum_file_path = file_path + ".sha256"
+        if not (os.path.exists(file_path) and os.path.exists(checksum_file_path)):
+            return False
+        with open(checksum_file_path) as checksum_file:
+            expected_sha256 = checksum_file.read().strip()
+        _, sha256 = self.file_checksums(file_path)
+        if sha256 != expected_sha256:
+            logger.info(f"Cached file {file_path} is corrupted, downloading it again")
+            return False
+        return True
+
+    def get_cached_file(self, bucket_name: str, key: str, etag: str = None) -> str:
+        """
+        Method Name :   get_cached_file
+        Description :   This method returns a local copy of the bucket_name/key object. The ETag is checked
+                        with a HEAD request and the object is only downloaded when that version is not cached.
+                        With etag it fails if the object is no longer that version
+
+        Output      :   Path of the verified local copy
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        logger.info("Entered the get_cached_file method of S3Operations class")
+
+        try:
+            head = self.s3_client.head_object(Bucket=bucket_name, Key=key)
+            expected_etag = None if etag is None else etag.strip('"')
+            etag = head["ETag"].strip('"')
+            if expected_etag is not None and etag != expected_etag:
+                raise Exception(f"{bucket_name}/{key} was replaced, version {etag} instead of {expected_etag}")
+            cache_dir = os.path.join(self.cache_dir, bucket_name, key)
+            file_path = os.path.join(cache_dir, etag)
+
+            if self.is_cached_file_valid(file_path):
+                os.utime(file_path)
+                logger.info(f"Using cached {bucket_name}/{key} version {etag}")
+                return file_path
+
+            os.makedirs(cache_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=cache_dir, suffix=".part", delete=False) as tmp_file:
+                tmp_file_path = tmp_file.name
+            try:
+                # download_file streams the object to disk instead of reading it into memory
+                self.s3_client.download_file(bucket_name, key, tmp_file_path)
+                md5, sha256 = self.file_checksums(tmp_file_path)
+                # ETag is the md5 of the object unless it was a multipart upload
+                if "-" not in etag and md5 != etag:
+                    raise Exception(f"Checksum mismatch for {bucket_name}/{key}: md5 {md5} != ETag {etag}")
+                # A multipart ETag is no md5, check instead that the object was not replaced during the download
+                if "-" in etag and self.s3_client.head_object(Bucket=bucket_name, Key=key)["ETag"].strip('"') != etag:
+                    raise Exception(f"{bucket_name}/{key} was replaced during the download of version {etag}")
+                if os.path.getsize(tmp_file_path) != head["ContentLength"]:
+                    raise Exception(f"Size mismatch for {bucket_name}/{key}")
+                with open(file_path + ".sha256", "w") as checksum_file:
+                    checksum_file.write(sha256)
+                os.replace(tmp_file_path, file_path)
+            finally:
+                if os.path.exists(tmp_file_path):
+                    os.remove(tmp_file_path)
+
+            logger.info(f"Downloaded {bucket_name}/{key} version {etag} to {file_path}")
+            self.evict_cached_files(keep=file_path)
+            logger.info("Exited the get_cached_file method of S3Operations class")
+            return file_path
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_mmap_artifact(self, bucket_name: str, model_file_object) -> Optional[str]:
+        """
+        Returns the local copy of the memory mapped serving artifact pushed with the model_file_object version,
+        None if there is no artifact for that version. The artifact records the ETag of its model as metadata
+        """
+        artifact_key = get_mmap_artifact_path(model_file_object.key)
+        try:
+            head = self.s3_client.head_object(Bucket=bucket_name, Key=artifact_key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return None
+            raise
+        if head.get("Metadata", {}).get("model-etag") != model_file_object.e_tag.strip('"'):
+            return None
+        return self.get_cached_file(bucket_name, artifact_key)
+
+    def evict_cached_files(self, keep: str) -> None:
+        """
+        Removes least recently used cached files until the cache fits in cache_max_bytes
+        """
+        cached_files = []
+        for dir_path, _, file_names in os.walk(self.cache_dir):
+            for file_name in file_names:
+                if file_name.endswith((".sha256", ".part")):
+                    continue
+                file_path = os.path.join(dir_path, file_name)
+                size = os.path.getsize(file_path)
+                cached_files.append((os.path.getmtime(file_path), size, file_path))
+
+        total_bytes = sum(size for _, size, _ in cached_files)
+        for _, size, file_path in sorted(cached_files):
+            if total_bytes <= self.cache_max_bytes:
+                break
+            if os.path.abspath(file_path) == os.path.abspath(keep):
+                continue
+            for path in (file_path, file_path + ".sha256"):
+                if os.path.exists(path):
+                    os.remove(path)
+            total_bytes -= size
+            logger.info(f"Evicted cached file {file_path}")
+
     def create_folder(self, folder_name: str, bucket_name: str) -> None:
         """
         Method Name :   create_folder
@@ -141,10 +293,12 @@ class SimpleStorageService:
                 pass
             logger.info("Exited the create_folder method of S3Operations class")
 
-    def upload_file(self, from_filename: str, to_filename: str,  bucket_name: str,  remove: bool = True):
+    def upload_file(self, from_filename: str, to_filename: str,  bucket_name: str,  remove: bool = True,
+                    metadata: Optional[dict] = None):
         """
         Method Name :   upload_file
-        Description :   This method uploads the from_filename file to bucket_name bucket with to_filename as bucket filename
+        Description :   This method uploads the from_filename file to bucket_name bucket with to_filename as bucket filename,
+                        metadata is stored as user metadata of the object
 
         Output      :   Folder is created in s3 bucket
         On Failure  :   Write an exception log and then raise an exception
@@ -160,7 +314,8 @@ class SimpleStorageService:
             )
 
             self.s3_resource.meta.client.upload_file(
-                from_filename, bucket_name, to_filename
+                from_filename, bucket_name, to_filename,
+                ExtraArgs={"Metadata": metadata} if metadata else None
             )
 
             logger.info(
@@ -1,4 +1,3 @@
-import os
 import sys
 
 from pandas import DataFrame
@@ -9,6 +8,9 @@ from Telecom_churn_prediction.entity.artifact_entity import DataIngestionArtifac
 from Telecom_churn_prediction.exception import CustomException
 from Telecom_churn_prediction.logger import logger
 from Telecom_churn_prediction.churn_data_access.mongoDB_data_access import DataAccessor
+from Telecom_churn_prediction.constants import schema_file_path
+from Telecom_churn_prediction.utils.dataframe_io import apply_schema_dtypes, write_dataframe
+from Telecom_churn_prediction.utils.main_utils import read_yaml_file
 
 
 
@@ -21,6 +23,7 @@ class DataIngestion:
         """
         try:
             self.data_ingestion_config = DataIngestionConfig()             
+            self._schema_config = read_yaml_file(file_path=schema_file_path)
         except Exception as e:
             raise CustomException(e,sys)
         
@@ -28,7 +31,7 @@ class DataIngestion:
     
     def export_data_into_feature_store(self):
         """
-        Description :  This method exports data from mongodb to csv file
+        Description :  This method exports data from mongodb to the feature store file, parquet by default
 
         """
         try:
@@ -36,12 +39,12 @@ class DataIngestion:
             churn_data = DataAccessor()
             dataframe = churn_data.export_collection_as_dataframe(self.data_ingestion_config.collectionName)
             logger.info(f"Shape of dataframe: {dataframe.shape}")
+            # Stored with the schema dtypes, so no later stage has to guess them again
+            dataframe = apply_schema_dtypes(dataframe, self._schema_config)
 
             feature_store_file_path  = self.data_ingestion_config.feature_store_file_path
-            dir_path = os.path.dirname(feature_store_file_path)
-            os.makedirs(dir_path,exist_ok=True)
             logger.info(f"Saving exported data into feature store file path: {feature_store_file_path}")
-            dataframe.to_csv(feature_store_file_path,index=False,header=True)
+            write_dataframe(dataframe, feature_store_file_path)
             return dataframe
 
         except Exception as e:
@@ -59,12 +62,10 @@ class DataIngestion:
             train_set, test_set = train_test_split(dataframe, test_size=self.data_ingestion_config.train_test_split_ratio)
             logger.info("Performed train test split on the dataframe")
             logger.info("Exited split_data_as_train_test method of Data_Ingestion class")
-            dir_path = os.path.dirname(self.data_ingestion_config.training_data_file_path)
-            os.makedirs(dir_path,exist_ok=True)
             
             logger.info(f"Exporting train and test file path.")
-            train_set.to_csv(self.data_ingestion_config.training_data_file_path,index=False,header=True)
-            test_set.to_csv(self.data_ingestion_config.testing_data_file_path,index=False,header=True)
+            write_dataframe(train_set, self.data_ingestion_config.training_data_file_path)
+            write_dataframe(test_set, self.data_ingestion_config.testing_data_file_path)
 
             logger.info(f"Exported train and test file path.")
         except Exception as e:
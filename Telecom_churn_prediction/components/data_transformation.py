@@ -1,18 +1,24 @@
+import os
 import sys
+from typing import Iterator, Tuple
 
 import numpy as np
 import pandas as pd
 from imblearn.over_sampling import SMOTENC
+from scipy import sparse
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler, OneHotEncoder, LabelEncoder
 from sklearn.compose import ColumnTransformer
 
-from Telecom_churn_prediction.constants import  schema_file_path, target_column, column_required_type_change
+from Telecom_churn_prediction.entity.compiled_preprocessor import CompiledPreprocessor
+from Telecom_churn_prediction.constants import  schema_file_path, target_column
 from Telecom_churn_prediction.entity.config_entity import DataTransformationConfig
 from Telecom_churn_prediction.entity.artifact_entity import DataTransformationArtifact, DataIngestionArtifact, DataValidationArtifact
 from Telecom_churn_prediction.exception import CustomException
 from Telecom_churn_prediction.logger import logger
-from Telecom_churn_prediction.utils.main_utils import save_object, save_numpy_array_data, read_yaml_file, drop_columns
+from Telecom_churn_prediction.utils.data_cleaning import clean_dataframe, get_numeric_columns
+from Telecom_churn_prediction.utils.dataframe_io import iter_dataframe_chunks, read_dataframe
+from Telecom_churn_prediction.utils.main_utils import save_object, save_numpy_array_data, save_feature_data, read_yaml_file
 
 
 
@@ -34,17 +40,34 @@ class DataTransformation:
             raise CustomException(e, sys)
 
     @staticmethod
-    def read_data(file_path) -> pd.DataFrame:
+    def read_data(file_path, columns=None, schema_config=None) -> pd.DataFrame:
         try:
-            return pd.read_csv(file_path, encoding='ISO-8859-1')
+            return read_dataframe(file_path, columns=columns, encoding='ISO-8859-1', schema_config=schema_config)
         
         except Exception as e:
             raise CustomException(e, sys)
 
+    def get_input_columns(self) -> list:
+        """
+        Returns the schema columns without drop_columns, the only ones read from the ingested files
+        """
+        return [column for column in self._schema_config['columns'] if column not in self._schema_config['drop_columns']]
+
+    
+    def get_feature_file_path(self, file_path: str) -> str:
+        """
+        Returns file_path with the extension of the saved features: .npz for the CSR matrix of the in-memory
+        transformation with sparse_output, .npy otherwise
+        """
+        sparse_output = self.data_transformation_config.sparse_output and self.data_transformation_config.chunk_size <= 0
+        return os.path.splitext(file_path)[0] + (".npz" if sparse_output else ".npy")
+
     
-    def get_data_transformer_object(self, ohe_columns, num_features) -> ColumnTransformer:
+    @staticmethod
+    def get_data_transformer_object(ohe_columns, num_features, sparse_output: bool = False) -> ColumnTransformer:
         """
-        Description :   This method creates and returns a data transformer object for the data
+        Description :   This method creates and returns a data transformer object for the data.
+                        With sparse_output it always returns a CSR matrix, otherwise always a dense array
 
         """
         logger.info(
@@ -63,7 +86,8 @@ class DataTransformation:
                 [
                     ("StandardScaler", numeric_transformer, num_features),
                     ("OneHotEncoder", oh_transformer, ohe_columns),
-                ]
+                ],
+                sparse_threshold=1.0 if sparse_output else 0.0
             )
 
             logger.info("Created preprocessor object from ColumnTransformer")
@@ -77,111 +101,227 @@ class DataTransformation:
         except Exception as e:
             raise CustomException(e, sys) from e
 
-    def initiate_data_transformation(self) -> DataTransformationArtifact:
+    def transform_in_memory(self) -> ColumnTransformer:
         """
-        Description :   This method initiates the data transformation component for the pipeline 
+        Description :   This method reads both files into pandas, resamples the train data with SMOTENC if
+                        resample_enabled, fits the preprocessor and saves the transformed train and test arrays
 
+        Output      :   Fitted preprocessor
         """
         try:
-            if self.data_validation_artifact.validation_status:
-                logger.info("Starting data transformation")
-
-                train_df = DataTransformation.read_data(file_path=self.data_ingestion_artifact.train_data_file_path)
-                test_df = DataTransformation.read_data(file_path=self.data_ingestion_artifact.test_data_file_path)
-
-                # Remove blank value rows
-                # train_df = train_df[~train_df.apply(lambda row: (row == " ").any(), axis=1)]
-                # test_df = test_df[~test_df.apply(lambda row: (row == " ").any(), axis=1)]
-
-                train_df = train_df.applymap(lambda x: np.nan if isinstance(x, str) and x.strip().lower() in ["", " ", "na", "null", "none"] else x)
-                train_df = train_df.dropna()
-
-            # Clean test_df
-                test_df = test_df.applymap(lambda x: np.nan if isinstance(x, str) and x.strip().lower() in ["", " ", "na", "null", "none"] else x)
-                test_df = test_df.dropna()
-
-                # Change mismatched column type
-                train_df[column_required_type_change] = train_df[column_required_type_change].astype("float64")
-                test_df[column_required_type_change] = test_df[column_required_type_change].astype("float64")
-
-                drop_cols = self._schema_config['drop_columns']
-
-                # split train data between input and target features
-                input_feature_train_df = train_df.drop(columns=[target_column], axis=1)
-                target_feature_train_df = train_df[target_column]
-                logger.info("drop the columns in drop_cols of Training dataset")
-                input_feature_train_df = drop_columns(df=input_feature_train_df, cols = drop_cols)
-                
-                # Resample the under sampled class rows for train data
-                train_cat_features = input_feature_train_df.select_dtypes(include=["object"]).columns
+            # drop_columns are never read
+            input_columns = self.get_input_columns()
+            train_df = DataTransformation.read_data(file_path=self.data_ingestion_artifact.train_data_file_path,
+                                                    columns=input_columns, schema_config=self._schema_config)
+            test_df = DataTransformation.read_data(file_path=self.data_ingestion_artifact.test_data_file_path,
+                                                   columns=input_columns, schema_config=self._schema_config)
+
+            # Remove blank value rows
+            # train_df = train_df[~train_df.apply(lambda row: (row == " ").any(), axis=1)]
+            # test_df = test_df[~test_df.apply(lambda row: (row == " ").any(), axis=1)]
+
+            # Null like tokens become NaN and TotalCharges, stored as text, becomes float
+            numeric_columns = get_numeric_columns(self._schema_config)
+            train_df = clean_dataframe(train_df, numeric_columns).dropna()
+            test_df = clean_dataframe(test_df, numeric_columns).dropna()
+
+            # split train data between input and target features
+            input_feature_train_df = train_df.drop(columns=[target_column], axis=1)
+            target_feature_train_df = train_df[target_column]
+            
+            # Resample the under sampled class rows for train data
+            if self.data_transformation_config.resample_enabled:
+                train_cat_features = input_feature_train_df.select_dtypes(include=["object", "category"]).columns
                 categorical_features = [input_feature_train_df.columns.get_loc(col) for col in train_cat_features]
                 smote_nc = SMOTENC(categorical_features=categorical_features, random_state=42)
 
                 logger.info("Applying SMOTENC on Training dataset")
                 input_feature_train_df_sampled, target_feature_train_df_sampled = smote_nc.fit_resample(input_feature_train_df, target_feature_train_df)
                 logger.info("Applied SMOTENC on training dataset")
-                logger.info(f"size of train_data: {input_feature_train_df_sampled.shape}")
+            else:
+                input_feature_train_df_sampled, target_feature_train_df_sampled = input_feature_train_df, target_feature_train_df
+            logger.info(f"size of train_data: {input_feature_train_df_sampled.shape}")
 
-                # split test data between input and target features
-                input_feature_test_df = test_df.drop(columns=[target_column], axis=1)
-                target_feature_test_df = test_df[target_column]
-                logger.info("drop the columns in drop_cols of Test dataset")
-                input_feature_test_df = drop_columns(df=input_feature_test_df, cols = drop_cols)
+            # split test data between input and target features
+            input_feature_test_df = test_df.drop(columns=[target_column], axis=1)
+            target_feature_test_df = test_df[target_column]
 
-                # Resample the under sampled class rows for test data
-                # logger.info("Applying SMOTENC on Testing dataset")
-                # input_feature_test_df_sampled, target_feature_test_df_sampled = smote_nc.fit_resample(input_feature_test_df, target_feature_test_df)
-                # logger.info("Applied SMOTENC on testing dataset")
-                # logger.info(f"size of test_data: {input_feature_test_df_sampled.shape}")
-                # logger.info("Got train features and test features of Testing dataset")
+            # Resample the under sampled class rows for test data
+            # logger.info("Applying SMOTENC on Testing dataset")
+            # input_feature_test_df_sampled, target_feature_test_df_sampled = smote_nc.fit_resample(input_feature_test_df, target_feature_test_df)
+            # logger.info("Applied SMOTENC on testing dataset")
+            # logger.info(f"size of test_data: {input_feature_test_df_sampled.shape}")
+            # logger.info("Got train features and test features of Testing dataset")
 
-                num_features = input_feature_train_df_sampled.select_dtypes(exclude=["object"]).columns
-                ohe_columns = input_feature_train_df_sampled.select_dtypes(include=["object"]).columns
+            num_features = input_feature_train_df_sampled.select_dtypes(exclude=["object", "category"]).columns
+            ohe_columns = input_feature_train_df_sampled.select_dtypes(include=["object", "category"]).columns
 
 
 
-                label_encoder = LabelEncoder()
-                preprocessor = self.get_data_transformer_object(ohe_columns, num_features)
-                logger.info("Got the preprocessor object")
+            label_encoder = LabelEncoder()
+            preprocessor = self.get_data_transformer_object(ohe_columns, num_features,
+                                                            sparse_output=self.data_transformation_config.sparse_output)
+            logger.info("Got the preprocessor object")
 
-                logger.info(
-                    "Applying preprocessing object on training dataframe and testing dataframe"
-                )
+            logger.info(
+                "Applying preprocessing object on training dataframe and testing dataframe"
+            )
 
-                input_feature_train_arr = preprocessor.fit_transform(input_feature_train_df_sampled)
-                target_feature_train_arr = label_encoder.fit_transform(target_feature_train_df_sampled)
+            input_feature_train_arr = preprocessor.fit_transform(input_feature_train_df_sampled)
+            target_feature_train_arr = label_encoder.fit_transform(target_feature_train_df_sampled)
 
-                logger.info(
-                    "Used the preprocessor object to fit transform the train features"
-                )
+            logger.info(
+                "Used the preprocessor object to fit transform the train features"
+            )
 
-                input_feature_test_arr = preprocessor.transform(input_feature_test_df)
-                target_feature_test_arr = label_encoder.transform(target_feature_test_df)
+            input_feature_test_arr = preprocessor.transform(input_feature_test_df)
+            target_feature_test_arr = label_encoder.transform(target_feature_test_df)
 
-                logger.info("Used the preprocessor object to transform the test features")
+            logger.info("Used the preprocessor object to transform the test features")
 
-                train_arr = np.c_[
-                    input_feature_train_arr, np.array(target_feature_train_arr)
-                ]
+            unique_train, counts_train = np.unique(target_feature_train_arr, return_counts=True)
 
-                target_train = train_arr[:, -1]  # Last column is target
-                unique_train, counts_train = np.unique(target_train, return_counts=True)
+            print("\n🎯 Train target value counts:")
+            for val, count in zip(unique_train, counts_train):
+                logger.info(f"Value {int(val)}: {int(count)}")
 
-                print("\n🎯 Train target value counts:")
-                for val, count in zip(unique_train, counts_train):
-                    logger.info(f"Value {int(val)}: {int(count)}")
+            # Features stay a CSR matrix with sparse_output, the labels are saved on their own
+            save_feature_data(self.get_feature_file_path(self.data_transformation_config.transformed_train_file_path),
+                              input_feature_train_arr)
+            save_numpy_array_data(self.data_transformation_config.transformed_train_target_file_path,
+                                  array=target_feature_train_arr)
+            save_feature_data(self.get_feature_file_path(self.data_transformation_config.transformed_test_file_path),
+                              input_feature_test_arr)
+            save_numpy_array_data(self.data_transformation_config.transformed_test_target_file_path,
+                                  array=target_feature_test_arr)
+            logger.info("Saved train and test features and labels")
+            return preprocessor
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def read_chunks(self, file_path) -> Iterator[pd.DataFrame]:
+        """
+        Reads file_path chunk_size rows at a time and cleans every chunk like the in-memory path does
+        """
+        numeric_columns = get_numeric_columns(self._schema_config)
+        for chunk in iter_dataframe_chunks(file_path, self.data_transformation_config.chunk_size,
+                                           columns=self.get_input_columns(), encoding='ISO-8859-1',
+                                           schema_config=self._schema_config):
+            chunk = clean_dataframe(chunk, numeric_columns).dropna()
+            if not chunk.empty:
+                yield chunk
+
+    def fit_preprocessor_in_chunks(self, file_path) -> Tuple[ColumnTransformer, LabelEncoder, int]:
+        """
+        Description :   First pass over the train file. Gathers the StandardScaler statistics with partial_fit, the
+                        categories of every one hot column and the target classes, and counts the rows kept
 
-                test_arr = np.c_[
-                    input_feature_test_arr, np.array(target_feature_test_arr)
-                ]
+        Output      :   Preprocessor and label encoder fitted like on the whole file, number of train rows
+        """
+        scaler = StandardScaler()
+        categories, target_classes, n_rows, first_chunk = {}, set(), 0, None
+
+        for chunk in self.read_chunks(file_path):
+            input_df = chunk.drop(columns=[target_column], axis=1)
+            if first_chunk is None:
+                first_chunk = input_df
+                num_features = input_df.select_dtypes(exclude=["object", "category"]).columns
+                ohe_columns = input_df.select_dtypes(include=["object", "category"]).columns
+                categories = {column: set() for column in ohe_columns}
+
+            scaler.partial_fit(input_df[num_features])
+            for column in ohe_columns:
+                categories[column].update(input_df[column].unique())
+            target_classes.update(chunk[target_column].unique())
+            n_rows += len(chunk)
+
+        if first_chunk is None:
+            raise ValueError(f"No complete rows in {file_path}")
+
+        # Sorted categories are what OneHotEncoder finds when fitted on the whole column
+        preprocessor = self.get_data_transformer_object(ohe_columns, num_features)
+        preprocessor.set_params(OneHotEncoder__categories=[sorted(categories[column]) for column in ohe_columns])
+        preprocessor.fit(first_chunk)
+        # The scaler fitted on the first chunk only is replaced by the one that saw every chunk
+        preprocessor.transformers_ = [(name, scaler if name == "StandardScaler" else transformer, columns)
+                                      for name, transformer, columns in preprocessor.transformers_]
+
+        label_encoder = LabelEncoder().fit(sorted(target_classes))
+        return preprocessor, label_encoder, n_rows
+
+    def transform_file_in_chunks(self, file_path, output_file_path, target_file_path, preprocessor: ColumnTransformer,
+                                 label_encoder: LabelEncoder, n_rows: int) -> None:
+        """
+        Description :   Transforms file_path chunk by chunk into preallocated memory mapped .npy files, one for the
+                        dense features and one for the encoded target like the in-memory path
+        """
+        n_columns = len(preprocessor.get_feature_names_out())
+        os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
+        os.makedirs(os.path.dirname(target_file_path), exist_ok=True)
+        features = np.lib.format.open_memmap(output_file_path, mode="w+", dtype=np.float64, shape=(n_rows, n_columns))
+        target = np.lib.format.open_memmap(target_file_path, mode="w+", dtype=np.int64, shape=(n_rows,))
+
+        row = 0
+        for chunk in self.read_chunks(file_path):
+            transformed = preprocessor.transform(chunk.drop(columns=[target_column], axis=1))
+            features[row:row + len(chunk)] = transformed.toarray() if sparse.issparse(transformed) else transformed
+            target[row:row + len(chunk)] = label_encoder.transform(chunk[target_column])
+            row += len(chunk)
+
+        features.flush()
+        target.flush()
+        del features, target
+        logger.info(f"Transformed {row} rows of {file_path} into {output_file_path}")
+
+    def transform_in_chunks(self) -> ColumnTransformer:
+        """
+        Description :   This method transforms both files without ever holding them in memory: one pass over the
+                        train file fits the preprocessor, then every file is transformed chunk by chunk into memory
+                        mapped feature and label arrays. The features stay dense and the train data is not resampled
 
-                logger.info
+        Output      :   Fitted preprocessor
+        """
+        try:
+            logger.info(f"Transforming in chunks of {self.data_transformation_config.chunk_size} rows, "
+                        f"SMOTENC resampling is skipped")
+            train_file_path = self.data_ingestion_artifact.train_data_file_path
+            test_file_path = self.data_ingestion_artifact.test_data_file_path
+
+            preprocessor, label_encoder, n_train_rows = self.fit_preprocessor_in_chunks(train_file_path)
+            logger.info(f"Fitted the preprocessor on {n_train_rows} train rows")
+            n_test_rows = sum(len(chunk) for chunk in self.read_chunks(test_file_path))
+
+            self.transform_file_in_chunks(train_file_path,
+                                          self.get_feature_file_path(self.data_transformation_config.transformed_train_file_path),
+                                          self.data_transformation_config.transformed_train_target_file_path,
+                                          preprocessor, label_encoder, n_train_rows)
+            self.transform_file_in_chunks(test_file_path,
+                                          self.get_feature_file_path(self.data_transformation_config.transformed_test_file_path),
+                                          self.data_transformation_config.transformed_test_target_file_path,
+                                          preprocessor, label_encoder, n_test_rows)
+            return preprocessor
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def initiate_data_transformation(self) -> DataTransformationArtifact:
+        """
+        Description :   This method initiates the data transformation component for the pipeline 
+
+        """
+        try:
+            if self.data_validation_artifact.validation_status:
+                logger.info("Starting data transformation")
 
-                logger.info("Created train array and test array")
+                if self.data_transformation_config.chunk_size > 0:
+                    preprocessor = self.transform_in_chunks()
+                else:
+                    preprocessor = self.transform_in_memory()
 
                 save_object(self.data_transformation_config.transformed_object_file_path, preprocessor)
-                save_numpy_array_data(self.data_transformation_config.transformed_train_file_path, array=train_arr)
-                save_numpy_array_data(self.data_transformation_config.transformed_test_file_path, array=test_arr)
+                compiled_preprocessor = CompiledPreprocessor.from_column_transformer(preprocessor)
+                save_object(self.data_transformation_config.compiled_object_file_path, compiled_preprocessor)
 
                 logger.info("Saved the preprocessor object")
 
@@ -191,8 +331,11 @@ class DataTransformation:
 
                 data_transformation_artifact = DataTransformationArtifact(
                     transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
-                    transformed_train_file_path=self.data_transformation_config.transformed_train_file_path,
-                    transformed_test_file_path=self.data_transformation_config.transformed_test_file_path
+                    transformed_train_file_path=self.get_feature_file_path(self.data_transformation_config.transformed_train_file_path),
+                    transformed_test_file_path=self.get_feature_file_path(self.data_transformation_config.transformed_test_file_path),
+                    compiled_object_file_path=self.data_transformation_config.compiled_object_file_path,
+                    transformed_train_target_file_path=self.data_transformation_config.transformed_train_target_file_path,
+                    transformed_test_target_file_path=self.data_transformation_config.transformed_test_target_file_path
                 )
                 return data_transformation_artifact
             else:
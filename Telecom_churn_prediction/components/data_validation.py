@@ -1,6 +1,5 @@
 import json
 import sys
-import pandas as pd
 from pandas import DataFrame
 
 from evidently import Report
@@ -8,6 +7,7 @@ from evidently.presets import DataDriftPreset
 
 from Telecom_churn_prediction.exception import CustomException
 from Telecom_churn_prediction.logger import logger
+from Telecom_churn_prediction.utils.dataframe_io import read_dataframe
 from Telecom_churn_prediction.utils.main_utils import read_yaml_file, write_yaml_file
 from Telecom_churn_prediction.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
 from Telecom_churn_prediction.entity.config_entity import DataValidationConfig
@@ -73,9 +73,9 @@ class DataValidation:
         
 
     @staticmethod
-    def read_data(file_path) -> DataFrame:
+    def read_data(file_path, schema_config=None) -> DataFrame:
         try:
-            return pd.read_csv(file_path)
+            return read_dataframe(file_path, schema_config=schema_config)
         
         except Exception as e:
             raise CustomException(e, sys)
@@ -118,8 +118,10 @@ class DataValidation:
         try:
             validation_error_msg = ""
             logger.info("Starting data validation")
-            train_df, test_df = (DataValidation.read_data(file_path=self.data_ingestion_artifact.train_data_file_path),
-                                 DataValidation.read_data(file_path=self.data_ingestion_artifact.test_data_file_path))
+            train_df, test_df = (DataValidation.read_data(file_path=self.data_ingestion_artifact.train_data_file_path,
+                                                          schema_config=self._schema_config),
+                                 DataValidation.read_data(file_path=self.data_ingestion_artifact.test_data_file_path,
+                                                          schema_config=self._schema_config))
 
             status = self.validate_number_of_columns(dataframe=train_df)
             logger.info(f"All required columns present in training dataframe: {status}")
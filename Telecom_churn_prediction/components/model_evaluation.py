@@ -1,15 +1,18 @@
 from Telecom_churn_prediction.entity.config_entity import ModelEvaluationConfig
 from Telecom_churn_prediction.entity.artifact_entity import ModelTrainerArtifact, DataIngestionArtifact, ModelEvaluationArtifact, DataTransformationArtifact
 from sklearn.metrics import f1_score
+from sklearn.preprocessing import LabelEncoder
 from Telecom_churn_prediction.exception import CustomException
-from Telecom_churn_prediction.constants import target_column
+from Telecom_churn_prediction.constants import schema_file_path, target_column
 from Telecom_churn_prediction.logger import logger
 import sys
-import pandas as pd
 from typing import Optional
 from Telecom_churn_prediction.entity.s3_estimator import TelcoChurnEstimator
 from dataclasses import dataclass
 from Telecom_churn_prediction.entity.estimator import TelcoChurnModel
+from Telecom_churn_prediction.utils.data_cleaning import clean_dataframe, get_numeric_columns
+from Telecom_churn_prediction.utils.dataframe_io import read_dataframe
+from Telecom_churn_prediction.utils.main_utils import read_yaml_file
 
 @dataclass
 class EvaluateModelResponse:
@@ -62,21 +65,24 @@ class ModelEvaluation:
         On Failure  :   Write an exception log and then raise an exception
         """
         try:
-            test_df = pd.read_csv(self.data_ingestion_artifact.test_data_file_path, encoding='ISO-8859-1')
-
-            x, y = test_df.drop(target_column, axis=1), test_df[target_column]
-
-            logger.info(f"{(x == ' ').any()}")
-
-            logger.info(f"\n🚨 Empty strings still present?: {(x == '').any()}")
-
-            logger.info(f"\n🧼 Null values per column: {x.isnull().sum()}")
+            # Only the model features and the target are read
+            schema_config = read_yaml_file(file_path=schema_file_path)
+            test_df = read_dataframe(self.data_ingestion_artifact.test_data_file_path,
+                                     columns=schema_config["num_features"] + schema_config["ohe_columns"] + [target_column],
+                                     encoding='ISO-8859-1', schema_config=schema_config)
+
+            # Same cleaning as DataTransformation, so both models are scored on the rows the trained model was tested on
+            cleaned_test_df = clean_dataframe(test_df, get_numeric_columns(schema_config)).dropna()
+            logger.info(f"Dropped {len(test_df) - len(cleaned_test_df)} test rows with missing values")
+
+            x = cleaned_test_df.drop(target_column, axis=1)
+            # The trained models predict the LabelEncoder codes of the target
+            y = LabelEncoder().fit_transform(cleaned_test_df[target_column])
         
             trained_model_f1_score = self.model_trainer_artifact.metric_artifact.f1_score
 
             best_model_f1_score=None
             best_model = self.get_best_model()
-            logger.info(f"{(x == ' ').any()}")
             if best_model is not None:
                 y_hat_best_model = best_model.predict(x)
                 best_model_f1_score = f1_score(y, y_hat_best_model)
@@ -109,7 +115,8 @@ class ModelEvaluation:
                 is_model_accepted=evaluate_model_response.is_model_accepted,
                 s3_model_path=s3_model_path,
                 trained_model_path=self.model_trainer_artifact.trained_model_file_path,
-                changed_accuracy=evaluate_model_response.difference)
+                changed_accuracy=evaluate_model_response.difference,
+                cascade_metric_artifact=self.model_trainer_artifact.cascade_metric_artifact)
 
             logger.info(f"Model evaluation artifact: {model_evaluation_artifact}")
             return model_evaluation_artifact
@@ -1,22 +1,40 @@
 import sys
-from typing import Tuple
+import time
+from typing import Dict, List, Tuple
 
 import numpy as np
 import pandas as pd
 from pandas import DataFrame
 from sklearn.compose import ColumnTransformer
-from sklearn.ensemble import StackingClassifier
+from sklearn.base import clone
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, confusion_matrix, f1_score, precision_score, recall_score
-from sklearn.model_selection import GridSearchCV, cross_val_score
-from traitlets import Float
+from joblib import Parallel, delayed
+from sklearn.model_selection import StratifiedKFold
 
+from Telecom_churn_prediction.components.model_tuner import ModelTuner
+from Telecom_churn_prediction.entity.cascade_classifier import CascadeClassifier
 from Telecom_churn_prediction.entity.estimator import TelcoChurnModel
+from Telecom_churn_prediction.entity.stacking_classifier import OutOfFoldStackingClassifier
 from Telecom_churn_prediction.exception import CustomException
 from Telecom_churn_prediction.logger import logger
-from Telecom_churn_prediction.utils.main_utils import load_models_from_yaml, load_numpy_array_data, read_yaml_file, load_object, save_object
+from Telecom_churn_prediction.utils.thread_budget import set_estimator_threads, split_cpu_budget, thread_budget
+from Telecom_churn_prediction.utils.main_utils import load_models_from_yaml, load_feature_data, load_numpy_array_data, read_yaml_file, load_object, save_object
+from Telecom_churn_prediction.utils.main_utils import get_mmap_artifact_path, get_mmap_sharing_report, load_mmap_object, save_mmap_object
 from Telecom_churn_prediction.entity.config_entity import ModelTrainerConfig
-from Telecom_churn_prediction.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact, ClassificationMetricArtifact
+from Telecom_churn_prediction.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact, ClassificationMetricArtifact, CascadeMetricArtifact, ModelCandidateArtifact
+
+
+def fit_and_score_fold(model_name: str, model, x_train, y_train, train_index, test_index, keep_model: bool) -> tuple:
+    """
+    Fits model on one fold and returns its accuracy on the held out part with the wall clock span of the fit,
+    runs in a joblib worker
+    """
+    start = time.time()
+    model.fit(x_train[train_index], y_train[train_index])
+    score = model.score(x_train[test_index], y_train[test_index])
+    end = time.time()
+    return model_name, score, start, end, model if keep_model else None
 
             
 class ModelTrainer:
@@ -28,38 +46,127 @@ class ModelTrainer:
         """
         self.data_transformation_artifact = data_transformation_artifact
         self.model_trainer_config = model_trainer_config
+        self.model_candidate_artifacts: Dict[str, ModelCandidateArtifact] = {}
+        self.stack_latency_ms = None
+        # Outer CV/search workers times the threads of each worker stays within the training cpu budget
+        self.outer_jobs, self.inner_threads = split_cpu_budget(model_trainer_config.cpu_budget,
+                                                               model_trainer_config.inner_threads)
+
+
+    def get_cv_splitter(self) -> StratifiedKFold:
+        """
+        Description : This function returns the fold splitter shared by candidate screening and tuning,
+                      so every candidate is scored on the same fold indices
+        """
+        return StratifiedKFold(n_splits=self.model_trainer_config.cv_folds, shuffle=True,
+                               random_state=self.model_trainer_config.random_state)
 
 
     def get_top_models(self, x_train, y_train, models_params) -> dict:
         """
-        Description : This function trains multiple classification models and get top 4 models for the evolution stage
+        Description : This function cross validates multiple classification models, measures their inference cost
+                      and gets the most accurate models whose summed single row latency fits the stack latency budget,
+                      at most max_stack_size of them, for the evolution stage. Every (candidate, fold) fit runs as
+                      its own job in a joblib process pool and no model is fitted outside the folds
 
         """
-        model_accuracies = {}
+        x_sample = x_train[:self.model_trainer_config.latency_sample_rows]
+        folds = list(self.get_cv_splitter().split(x_train, y_train))
 
-        for model_name, mp in models_params.items():
-            model = mp["model"]            
-            logger.info("Models training started")                                  
-            model.fit(x_train, y_train)
-            
-            scores = cross_val_score(model, x_train, y_train, cv=5)                  
+        logger.info(f"Screening {len(models_params)} models on {len(folds)} folds with {self.outer_jobs} workers "
+                    f"x {self.inner_threads} threads")
+        start = time.perf_counter()
+        fold_results = Parallel(n_jobs=self.outer_jobs)(
+            delayed(fit_and_score_fold)(model_name, clone(mp["model"]), x_train, y_train, train_index, test_index,
+                                        keep_model=fold_number == 0)
+            for model_name, mp in models_params.items()
+            for fold_number, (train_index, test_index) in enumerate(folds)
+        )
+        logger.info(f"Models training Completed in {time.perf_counter() - start:.1f}s")
+
+        for model_name in models_params:
+            results = [result for result in fold_results if result[0] == model_name]
+            scores = np.array([score for _, score, _, _, _ in results])
+            wall_clock_seconds = max(end for _, _, _, end, _ in results) - min(start for _, _, start, _, _ in results)
+            fit_seconds = sum(end - start for _, _, start, end, _ in results)
             print(f" {model_name} Mean Accuracy = {scores.mean():.4f}")         # Checking mean accuracy 
-            model_accuracies[model_name] = float(scores.mean())
 
-        logger.info("Models training Completed")   
-        top_models = sorted(model_accuracies.items(), key=lambda x: x[1], reverse=True)[:4]
-        top_models = dict(top_models)                                           # Top 4 models
+            # Latency is measured serially in this process on the model fitted on the first fold
+            fold_model = next(model for _, _, _, _, model in results if model is not None)
+            rows_per_second, row_latency_ms = self.measure_speed(fold_model, x_sample)
+            logger.info(f"{model_name}: {wall_clock_seconds:.1f}s wall clock, {fit_seconds:.1f}s of fits, "
+                        f"{row_latency_ms:.3f} ms per single row, {rows_per_second:.0f} rows/s in batch")
+            self.model_candidate_artifacts[model_name] = ModelCandidateArtifact(
+                model_name=model_name,
+                cv_accuracy=float(scores.mean()),
+                row_latency_ms=float(row_latency_ms),
+                batch_row_cost_ms=float(1000 / rows_per_second),
+                wall_clock_seconds=float(wall_clock_seconds),
+                fit_seconds=float(fit_seconds))
+
+        # The stack runs every base model on every row, so their single row latencies add up
+        latency_budget_ms = self.model_trainer_config.stack_latency_budget_ms
+        top_models, stack_latency_ms = {}, 0.0
+        for candidate in sorted(self.model_candidate_artifacts.values(), key=lambda c: c.cv_accuracy, reverse=True):
+            if len(top_models) == self.model_trainer_config.max_stack_size:
+                break
+            if stack_latency_ms + candidate.row_latency_ms > latency_budget_ms:
+                logger.info(f"Skipping {candidate.model_name}: {candidate.row_latency_ms:.3f} ms per row does not fit "
+                            f"the {latency_budget_ms} ms stack budget")
+                continue
+            top_models[candidate.model_name] = candidate.cv_accuracy
+            stack_latency_ms += candidate.row_latency_ms
+
+        if not top_models:
+            fastest = min(self.model_candidate_artifacts.values(), key=lambda c: c.row_latency_ms)
+            logger.info(f"No model fits the stack latency budget, using the fastest one: {fastest.model_name}")
+            top_models[fastest.model_name] = fastest.cv_accuracy
+
+        for model_name in top_models:
+            self.model_candidate_artifacts[model_name].selected = True
+        logger.info(f"Selected models: {top_models}")
         return top_models
+
+
+    def prune_stack(self, stacking_clf: OutOfFoldStackingClassifier, x_train, y_train) -> OutOfFoldStackingClassifier:
+        """
+        Description : This function drops the base models whose share of the absolute meta-learner coefficients is
+                      below min_meta_learner_weight and refits the meta-learner without them
+        """
+        weights = np.abs(np.ravel(stacking_clf.final_estimator_.coef_))
+        model_names = list(stacking_clf.named_estimators_.keys())
+        if len(weights) != len(model_names) or weights.sum() == 0:
+            # Multiclass stacks feed several columns per base model to the meta-learner
+            return stacking_clf
+
+        shares = weights / weights.sum()
+        for model_name, share in zip(model_names, shares):
+            self.model_candidate_artifacts[model_name].meta_learner_weight = float(share)
+
+        kept_models = [(model_name, model) for (model_name, model), share in zip(stacking_clf.estimators, shares)
+                       if share >= self.model_trainer_config.min_meta_learner_weight]
+        if len(kept_models) in (0, len(model_names)):
+            return stacking_clf
+
+        for model_name, share in zip(model_names, shares):
+            if share < self.model_trainer_config.min_meta_learner_weight:
+                self.model_candidate_artifacts[model_name].pruned = True
+                logger.info(f"Pruning {model_name} from the stack, meta-learner weight share {share:.3f}")
+
+        return stacking_clf.select_estimators([model_name for model_name, _ in kept_models], y_train)
     
 
-    def get_evoluted_model_object_and_report(self, x_train, x_test, y_train, y_test, models_params, evolution_models) -> Tuple[float, object, ClassificationMetricArtifact]:
+    def get_evoluted_model_object_and_report(self, x_train, x_test, y_train, y_test, models_params, evolution_models) -> Tuple[float, object, ClassificationMetricArtifact, List[tuple]]:
         """
         Description : This function does hyperparameter tuning and with help of stacking classifier it does prediction
-                      and the object and metrics will be returned
+                      and the object, metrics and the tuned base models will be returned
         """
 
         try:
             best_tuned_models = []
+            model_tuner = ModelTuner(cv=self.get_cv_splitter(), n_jobs=self.outer_jobs,
+                                     random_state=self.model_trainer_config.random_state)
+            tuning_deadline = time.perf_counter() + self.model_trainer_config.tuning_time_budget_seconds
 
             for model_name, mp in models_params.items():
                 if model_name in evolution_models.keys():
@@ -68,22 +175,21 @@ class ModelTrainer:
                     
                     model = mp["model"]
                     params = mp["params"]
+                    remaining_seconds = tuning_deadline - time.perf_counter()
                     
-                    if params:
-                        search = GridSearchCV(estimator=model,
-                                            param_grid=params,
-                                            cv=5,
-                                            scoring="accuracy",
-                                            n_jobs=-1,
-                                            verbose=0)
-                        
-                        search.fit(x_train, y_train)
-                        best_model = search.best_estimator_
-                        logger.info(f"Best {model_name} Params: {search.best_params_}")
-                        logger.info(f"Best Cross-Val Score: {search.best_score_}")
-
-                        
+                    if params and remaining_seconds > 0:
+                        best_model, tuning_summary = model_tuner.tune(model_name, model, params, mp["search"],
+                                                                      x_train, y_train, remaining_seconds)
+                        candidate = self.model_candidate_artifacts.get(model_name)
+                        if candidate is not None:
+                            candidate.tuning_strategy = tuning_summary["strategy"]
+                            candidate.tuning_candidates = tuning_summary["candidates"]
+                            candidate.tuning_seconds = float(tuning_summary["seconds"])
+                            candidate.tuned_cv_accuracy = float(tuning_summary["cv_accuracy"])
+
                     else:
+                        if params:
+                            logger.info(f"Tuning time budget used up, fitting {model_name} with its default params")
                         best_model = model.fit(x_train, y_train)
                         logger.info(f"{best_model}: No hyperparameters to tune.")
                 
@@ -91,18 +197,24 @@ class ModelTrainer:
 
             logger.info("Models tuning complete")
 
-            # Using Stacking Classifier
+            # Stacking on out-of-fold predictions of the tuned models, which are already fitted on the whole train data
             meta_learner = LogisticRegression()
 
             logger.info("stacking Classifier training begins with best tuned models value")
-            stacking_clf = StackingClassifier(
+            start = time.perf_counter()
+            stacking_clf = OutOfFoldStackingClassifier(
                 estimators=best_tuned_models,
                 final_estimator=meta_learner,
-                passthrough=False,
-                cv=5
+                cv=self.get_cv_splitter(),
+                n_jobs=self.outer_jobs
             )
 
             stacking_clf.fit(x_train, y_train)
+            logger.info(f"Built the stacking layer in {time.perf_counter() - start:.1f}s")
+            stacking_clf = self.prune_stack(stacking_clf, x_train, y_train)
+            best_tuned_models = stacking_clf.estimators
+            _, self.stack_latency_ms = self.measure_speed(stacking_clf, x_test)
+            logger.info(f"Stack of {[model_name for model_name, _ in best_tuned_models]}: {self.stack_latency_ms:.3f} ms per single row")
             classifier_score = stacking_clf.score(x_test, y_test)
             logger.info(f"Stacking Classifier Test Accuracy: {stacking_clf.score(x_test, y_test)}")
 
@@ -116,10 +228,99 @@ class ModelTrainer:
             recall = recall_score(y_test, y_pred)
             metric_artifact = ClassificationMetricArtifact(f1_score=f1, precision_score=precision, recall_score=recall)
             
-            return classifier_score, stacking_clf, metric_artifact
+            return classifier_score, stacking_clf, metric_artifact, best_tuned_models
         
         except Exception as e:
             raise CustomException(e, sys) from e
+
+
+    def get_first_stage_model(self, best_tuned_models, models_params, x_train, y_train) -> object:
+        """
+        Description : This function returns the cheap first stage model of the cascade, the tuned one if it was
+                      among the stacked models, else the model from model config fitted on the train data
+        """
+        first_stage_name = self.model_trainer_config.cascade_first_stage
+        tuned_models = dict(best_tuned_models)
+        if first_stage_name in tuned_models:
+            return tuned_models[first_stage_name]
+        logger.info(f"{first_stage_name} was not tuned, fitting it for the cascade")
+        return models_params[first_stage_name]["model"].fit(x_train, y_train)
+
+
+    @staticmethod
+    def measure_speed(model, x, n_single_rows: int = 200) -> Tuple[float, float]:
+        """
+        Description : This function returns the throughput of model on x in rows per second and the
+                      mean latency of single row predictions in milliseconds
+        """
+        # Same method StackingClassifier calls on its base models, SVC without probability has no predict_proba
+        for method_name in ("predict_proba", "decision_function", "predict"):
+            if hasattr(model, method_name):
+                predict = getattr(model, method_name)
+                break
+
+        start = time.perf_counter()
+        predict(x)
+        rows_per_second = x.shape[0] / (time.perf_counter() - start)
+
+        n_single_rows = min(n_single_rows, x.shape[0])
+        start = time.perf_counter()
+        for row in range(n_single_rows):
+            predict(x[row:row + 1])
+        latency_ms = (time.perf_counter() - start) / n_single_rows * 1000
+        return rows_per_second, latency_ms
+
+
+    def get_cascade_model_and_report(self, first_stage, full_model, x_test, y_test) -> Tuple[CascadeClassifier, CascadeMetricArtifact]:
+        """
+        Description : This function calibrates the uncertain band of the cascade on the test split. The band is
+                      the narrowest one, i.e. the most rows answered by the first stage, whose accuracy loss against
+                      the full model stays within cascade_max_accuracy_loss
+        """
+        try:
+            logger.info("Calibrating cascade thresholds on the test split")
+            first_stage_probabilities = first_stage.predict_proba(x_test)[:, 1]
+            first_stage_pred = first_stage.classes_.take((first_stage_probabilities >= 0.5).astype(int))
+            full_pred = full_model.predict(x_test)
+            full_accuracy = accuracy_score(y_test, full_pred)
+
+            for margin in np.arange(0.0, 0.51, 0.01):
+                lower_threshold, upper_threshold = 0.5 - margin, 0.5 + margin
+                uncertain = (first_stage_probabilities > lower_threshold) & (first_stage_probabilities < upper_threshold)
+                cascade_pred = np.where(uncertain, full_pred, first_stage_pred)
+                if full_accuracy - accuracy_score(y_test, cascade_pred) <= self.model_trainer_config.cascade_max_accuracy_loss:
+                    break
+
+            cascade_clf = CascadeClassifier(first_stage=first_stage, full_model=full_model,
+                                            lower_threshold=float(lower_threshold),
+                                            upper_threshold=float(upper_threshold))
+
+            full_rows_per_second, full_latency_ms = self.measure_speed(full_model, x_test)
+            cascade_rows_per_second, cascade_latency_ms = self.measure_speed(cascade_clf, x_test)
+            cascade_accuracy = accuracy_score(y_test, cascade_pred)
+            full_f1, cascade_f1 = f1_score(y_test, full_pred), f1_score(y_test, cascade_pred)
+
+            cascade_metric_artifact = CascadeMetricArtifact(
+                lower_threshold=float(lower_threshold),
+                upper_threshold=float(upper_threshold),
+                first_stage_rate=float(1 - uncertain.mean()),
+                full_model_accuracy=float(full_accuracy),
+                cascade_accuracy=float(cascade_accuracy),
+                accuracy_loss=float(full_accuracy - cascade_accuracy),
+                full_model_f1_score=float(full_f1),
+                cascade_f1_score=float(cascade_f1),
+                f1_score_loss=float(full_f1 - cascade_f1),
+                full_model_rows_per_second=float(full_rows_per_second),
+                cascade_rows_per_second=float(cascade_rows_per_second),
+                throughput_gain=float(cascade_rows_per_second / full_rows_per_second),
+                full_model_latency_ms=float(full_latency_ms),
+                cascade_latency_ms=float(cascade_latency_ms))
+            logger.info(f"Cascade metric artifact: {cascade_metric_artifact}")
+
+            return cascade_clf, cascade_metric_artifact
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
         
 
     def initiate_model_trainer(self, ) -> ModelTrainerArtifact:
@@ -129,18 +330,34 @@ class ModelTrainer:
 
         """
         try:
-            train_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_train_file_path)
-            test_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_test_file_path)
-
-            x_train, y_train, x_test, y_test = train_arr[:, :-1], train_arr[:, -1], test_arr[:, :-1], test_arr[:, -1]
+            # The features are a CSR matrix (.npz) or a dense array (.npy), the labels are saved apart
+            x_train = load_feature_data(file_path=self.data_transformation_artifact.transformed_train_file_path)
+            y_train = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_train_target_file_path)
+            x_test = load_feature_data(file_path=self.data_transformation_artifact.transformed_test_file_path)
+            y_test = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_test_target_file_path)
 
             models_and_params = load_models_from_yaml(self.model_trainer_config.model_config_file_path)
+            for mp in models_and_params.values():
+                set_estimator_threads(mp["model"], self.inner_threads)
 
-            top_models = self.get_top_models(x_train, y_train, models_and_params)
+            with thread_budget(self.model_trainer_config.cpu_budget, self.model_trainer_config.inner_threads):
+                top_models = self.get_top_models(x_train, y_train, models_and_params)
             
-            model_score, best_model, metric_artifact = self.get_evoluted_model_object_and_report(x_train, x_test, y_train, y_test, models_and_params, top_models)
+                model_score, best_model, metric_artifact, best_tuned_models = self.get_evoluted_model_object_and_report(x_train, x_test, y_train, y_test, models_and_params, top_models)
+
+                cascade_metric_artifact = None
+                if self.model_trainer_config.cascade_enabled:
+                    first_stage = self.get_first_stage_model(best_tuned_models, models_and_params, x_train, y_train)
+                    best_model, cascade_metric_artifact = self.get_cascade_model_and_report(first_stage, best_model, x_test, y_test)
+                    # The cascade is what gets served, so it is what evaluation compares against the production model
+                    y_pred = best_model.predict(x_test)
+                    model_score = accuracy_score(y_test, y_pred)
+                    metric_artifact = ClassificationMetricArtifact(f1_score=f1_score(y_test, y_pred),
+                                                                   precision_score=precision_score(y_test, y_pred),
+                                                                   recall_score=recall_score(y_test, y_pred))
             
             preprocessing_obj = load_object(file_path=self.data_transformation_artifact.transformed_object_file_path)
+            compiled_preprocessing_obj = load_object(file_path=self.data_transformation_artifact.compiled_object_file_path)
 
 
             if model_score < self.model_trainer_config.expected_accuracy:
@@ -148,15 +365,27 @@ class ModelTrainer:
                 raise Exception("No best model found with score more than base score")
 
             churn_model = TelcoChurnModel(preprocessing_object=preprocessing_obj,
-                                       trained_model_object=best_model)
+                                       trained_model_object=best_model,
+                                       compiled_preprocessor=compiled_preprocessing_obj)
             
             logger.info("Created usvisa model object with preprocessor and model")
             logger.info("Created best model file path.")
             save_object(self.model_trainer_config.trained_model_file_path, churn_model)
 
+            # Converted once here and pushed with the model, serving workers only memory map it
+            mmap_artifact_file_path = get_mmap_artifact_path(self.model_trainer_config.trained_model_file_path)
+            save_mmap_object(mmap_artifact_file_path, churn_model)
+            mmap_sharing_report = get_mmap_sharing_report(load_mmap_object(mmap_artifact_file_path, mmap_mode="r"))
+            logger.info(f"Memory mapped serving artifact shares {mmap_sharing_report['shared_mb']} MB between workers, "
+                        f"{mmap_sharing_report['private_mb']} MB are unpickled by every worker")
+
             model_trainer_artifact = ModelTrainerArtifact(
                 trained_model_file_path=self.model_trainer_config.trained_model_file_path,
-                metric_artifact=metric_artifact)
+                metric_artifact=metric_artifact,
+                cascade_metric_artifact=cascade_metric_artifact,
+                model_candidate_artifacts=list(self.model_candidate_artifacts.values()),
+                stack_latency_ms=self.stack_latency_ms,
+                mmap_sharing_report=mmap_sharing_report)
             
             logger.info(f"Model trainer artifact: {model_trainer_artifact}")
             return model_trainer_artifact
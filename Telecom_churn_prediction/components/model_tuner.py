@@ -0,0 +1,193 @@
+import sys
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401, enables HalvingGridSearchCV
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, ParameterSampler, RandomizedSearchCV
+
+from Telecom_churn_prediction.exception import CustomException
+from Telecom_churn_prediction.logger import logger
+
+search_strategies = ("grid", "random", "halving", "budget")
+
+
+def get_final_estimator(model) -> Tuple[object, str]:
+    """
+    Returns the estimator of a dense_input Pipeline, or model itself, and the prefix of its params
+    """
+    if hasattr(model, "steps"):
+        step_name, estimator = model.steps[-1]
+        return estimator, f"{step_name}__"
+    return model, ""
+
+
+def get_iteration_param_name(model) -> str:
+    """
+    Returns the name of the boosting rounds parameter, iterations for CatBoost, n_estimators for the others
+    """
+    estimator, prefix = get_final_estimator(model)
+    return prefix + ("iterations" if "iterations" in estimator.get_params() else "n_estimators")
+
+
+def supports_early_stopping(model) -> bool:
+    """
+    Returns False for dart boosting, which drops trees after the fact and ignores early stopping
+    """
+    params = model.get_params()
+    return params.get("boosting_type") != "dart" and params.get("booster") != "dart"
+
+
+def fit_and_score_with_early_stopping(model, x_train, y_train, train_index, test_index,
+                                      early_stopping_rounds: Optional[int]) -> Tuple[float, Optional[int]]:
+    """
+    Fits model on one fold, stopping a booster once the held out part has not improved for early_stopping_rounds
+    rounds, runs in a joblib worker. A candidate that fails to fit scores NaN like error_score of GridSearchCV
+    :return: accuracy on the held out part and the number of boosting rounds kept, None without early stopping
+    """
+    x_fold, y_fold = x_train[train_index], y_train[train_index]
+    x_val, y_val = x_train[test_index], y_train[test_index]
+
+    best_iteration = None
+    try:
+        # The eval_set of a booster wrapped in a dense_input Pipeline has to go through the densify step too
+        estimator, _ = get_final_estimator(model)
+        early_stopping = bool(early_stopping_rounds) and supports_early_stopping(estimator)
+        if early_stopping and estimator is not model:
+            x_fold, x_val = model[:-1].fit_transform(x_fold), model[:-1].transform(x_val)
+            model = estimator
+
+        if early_stopping:
+            if type(model).__module__.startswith("lightgbm"):
+                import lightgbm
+
+                model.fit(x_fold, y_fold, eval_set=[(x_val, y_val)],
+                          callbacks=[lightgbm.early_stopping(early_stopping_rounds, verbose=False)])
+                best_iteration = model.best_iteration_
+            else:
+                # XGBoost and CatBoost take the rounds as a parameter and report a 0 based best iteration
+                model.set_params(early_stopping_rounds=early_stopping_rounds)
+                model.fit(x_fold, y_fold, eval_set=[(x_val, y_val)], verbose=False)
+                best_iteration = (model.get_best_iteration() if hasattr(model, "get_best_iteration")
+                                  else model.best_iteration) + 1
+        else:
+            model.fit(x_fold, y_fold)
+    except Exception as e:
+        logger.warning(f"Fit failed for {model.get_params()}, scored NaN: {e}")
+        return np.nan, None
+
+    # A booster that did not stop early reports no best iteration, it keeps its rounds
+    return model.score(x_val, y_val), best_iteration if best_iteration and best_iteration > 0 else None
+
+
+class ModelTuner:
+    """
+    This class tunes one model with the search strategy chosen for it under search in model.yaml:
+    grid (GridSearchCV), random (RandomizedSearchCV), halving (HalvingGridSearchCV) or budget, a random
+    search that stops at a time or iteration budget and can early stop boosters on every fold
+    """
+
+    def __init__(self, cv, n_jobs: int = -1, random_state: int = 42, scoring: str = "accuracy"):
+        """
+        :param cv: Fold splitter shared by every search
+        :param n_jobs: Parallel jobs of the search
+        :param random_state: Seed of the random and budget searches
+        :param scoring: Metric the searches maximise
+        """
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.scoring = scoring
+
+    def tune(self, model_name: str, model, params: dict, search_config: dict, x_train, y_train,
+             time_budget_seconds: float) -> Tuple[object, dict]:
+        """
+        Description : This function searches params for model and refits the best candidate on the whole train data
+
+        Output      :   Tuned model and a summary of what was explored
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            strategy = search_config.get("strategy", "grid")
+            if strategy not in search_strategies:
+                raise ValueError(f"Unknown search strategy {strategy} for {model_name}, expected one of {search_strategies}")
+
+            start = time.perf_counter()
+            if strategy == "budget":
+                best_model, summary = self.budgeted_search(model_name, model, params, search_config, x_train, y_train,
+                                                           time_budget_seconds)
+            else:
+                if strategy == "grid":
+                    search = GridSearchCV(estimator=model, param_grid=params, cv=self.cv, scoring=self.scoring,
+                                          n_jobs=self.n_jobs, verbose=0)
+                elif strategy == "random":
+                    search = RandomizedSearchCV(estimator=model, param_distributions=params,
+                                                n_iter=search_config.get("n_iter", 10), cv=self.cv,
+                                                scoring=self.scoring, n_jobs=self.n_jobs,
+                                                random_state=self.random_state, verbose=0)
+                else:
+                    search = HalvingGridSearchCV(estimator=model, param_grid=params,
+                                                 factor=search_config.get("factor", 3), cv=self.cv,
+                                                 scoring=self.scoring, n_jobs=self.n_jobs,
+                                                 random_state=self.random_state, verbose=0)
+                search.fit(x_train, y_train)
+                best_model = search.best_estimator_
+                summary = {"candidates": len(search.cv_results_["params"]),
+                           "best_params": search.best_params_,
+                           "cv_accuracy": float(search.best_score_)}
+
+            summary = {"strategy": strategy, "seconds": time.perf_counter() - start, **summary}
+            logger.info(f"Tuned {model_name} with {strategy} search: {summary['candidates']} candidates in "
+                        f"{summary['seconds']:.1f}s, best CV score {summary['cv_accuracy']:.4f} "
+                        f"with {summary['best_params']}")
+            return best_model, summary
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def budgeted_search(self, model_name: str, model, params: dict, search_config: dict, x_train, y_train,
+                        time_budget_seconds: float) -> Tuple[object, dict]:
+        """
+        Description : This function cross validates random candidates one after the other, folds in parallel,
+                      until n_iter candidates or the time budget is used up. With early_stopping_rounds the boosters
+                      stop on each held out fold and are refitted with the mean number of rounds kept
+        """
+        n_iter = search_config.get("n_iter", 20)
+        early_stopping_rounds = search_config.get("early_stopping_rounds")
+        time_budget_seconds = min(search_config.get("time_budget_seconds", float("inf")), time_budget_seconds)
+        deadline = time.perf_counter() + time_budget_seconds
+        folds = list(self.cv.split(x_train, y_train))
+
+        best_score, best_params, best_iterations, explored = -np.inf, {}, None, 0
+        for candidate_params in ParameterSampler(params, n_iter=n_iter, random_state=self.random_state):
+            if explored and time.perf_counter() >= deadline:
+                logger.info(f"Time budget of {time_budget_seconds:.0f}s for {model_name} used up after {explored} candidates")
+                break
+
+            fold_results = Parallel(n_jobs=self.n_jobs)(
+                delayed(fit_and_score_with_early_stopping)(clone(model).set_params(**candidate_params), x_train,
+                                                           y_train, train_index, test_index, early_stopping_rounds)
+                for train_index, test_index in folds
+            )
+            score = float(np.mean([fold_score for fold_score, _ in fold_results]))  # NaN if any fold failed
+            iterations = [fold_iterations for _, fold_iterations in fold_results if fold_iterations is not None]
+            explored += 1
+            logger.info(f"{model_name} {candidate_params}: CV score {score:.4f}"
+                        + (f", {np.mean(iterations):.0f} rounds kept" if iterations else ""))
+
+            if score > best_score:
+                best_score, best_params = score, candidate_params
+                best_iterations = max(1, int(round(np.mean(iterations)))) if iterations else None
+
+        if not np.isfinite(best_score):
+            raise ValueError(f"All {explored} candidates of {model_name} failed to fit")
+
+        best_model = clone(model).set_params(**best_params)
+        if best_iterations is not None:
+            best_params = {**best_params, get_iteration_param_name(model): best_iterations}
+            best_model.set_params(**{get_iteration_param_name(model): best_iterations})
+        best_model.fit(x_train, y_train)
+
+        return best_model, {"candidates": explored, "best_params": best_params, "cv_accuracy": best_score}
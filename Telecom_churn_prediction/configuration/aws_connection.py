@@ -1,6 +1,6 @@
 import boto3
 import os
-from Telecom_churn_prediction.constants import aws_access_key_id_env_key, aws_secret_access_key_env_key, region_name
+from Telecom_churn_prediction.constants import aws_access_key_id_env_key, aws_secret_access_key_env_key, aws_endpoint_url_env_key, region_name
 
 class S3Client:
 
@@ -20,16 +20,19 @@ class S3Client:
                 raise Exception(f"Environment variable: {aws_access_key_id_env_key} is not not set.")
             if __secret_access_key is None:
                 raise Exception(f"Environment variable: {aws_secret_access_key_env_key} is not set.")
+            __endpoint_url = os.getenv(aws_endpoint_url_env_key)
         
             S3Client.s3_resource = boto3.resource('s3',
                                             aws_access_key_id=__access_key_id,
                                             aws_secret_access_key=__secret_access_key,
-                                            region_name=region_name
+                                            region_name=region_name,
+                                            endpoint_url=__endpoint_url
                                             )
             S3Client.s3_client = boto3.client('s3',
                                         aws_access_key_id=__access_key_id,
                                         aws_secret_access_key=__secret_access_key,
-                                        region_name=region_name
+                                        region_name=region_name,
+                                        endpoint_url=__endpoint_url
                                         )
         self.s3_resource = S3Client.s3_resource
         self.s3_client = S3Client.s3_client
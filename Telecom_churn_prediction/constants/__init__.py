@@ -20,11 +20,14 @@ model_file_name = "model.pkl"
 target_column = "Churn"
 column_required_type_change = "TotalCharges"
 preprocessing_object_file_name = "preprocessing.pkl"
+compiled_preprocessing_object_file_name = "compiled_preprocessing.pkl"
 schema_file_path = os.path.join("config", "schema.yaml")
 
 
 aws_access_key_id_env_key = "AWS_ACCESS_KEY_ID"
 aws_secret_access_key_env_key = "AWS_SECRET_ACCESS_KEY"
+# Optional, points the s3 client at a local stand-in such as moto for benchmarks
+aws_endpoint_url_env_key = "AWS_ENDPOINT_URL"
 region_name = "ap-south-1"
 
 """
@@ -37,6 +40,8 @@ data_ingestion_dir_name = "data_ingestion"
 data_ingestion_feature_store_dir = "feature_store"
 data_ingestion_ingested_dir = "ingested"
 data_ingestion_train_test_split_ratio = 0.2
+# Format of the feature store, train and test files, "parquet" keeps the schema dtypes, "csv" writes text
+data_ingestion_file_format: str = "parquet"
 
 
 """
@@ -57,6 +62,12 @@ data_validation_drift_report_file_name = "report.yaml"
 data_transformation_dir_name = "data_transformation"
 data_transformation_transformed_data_dir = "transformed"
 data_transformation_transformed_object_dir = "transformed_object"
+# Rows read per chunk by the out-of-core transformation, 0 transforms both files in memory
+data_transformation_chunk_size: int = 0
+# SMOTENC needs the whole train data in memory, the chunked transformation never resamples
+data_transformation_resample_enabled: bool = True
+# One hot features are saved as a CSR .npz matrix, the chunked transformation always writes a dense .npy memmap
+data_transformation_sparse_output: bool = True
 
 
 """
@@ -67,6 +78,19 @@ model_trainer_trained_model_dir: str = "trained_model"
 model_trainer_trained_model_name: str = "model.pkl"
 model_trainer_expected_score: float = 0.6
 model_trainer_model_config_file_path: str = os.path.join("config", "model.yaml")
+model_trainer_cv_folds: int = 5
+# Cores training may use (0 = all of them), split into outer CV/search workers of inner_threads threads each
+model_trainer_cpu_budget: int = 0
+model_trainer_inner_threads: int = 1
+model_trainer_random_state: int = 42
+model_trainer_tuning_time_budget_seconds: float = 1800
+model_trainer_max_stack_size: int = 4
+model_trainer_stack_latency_budget_ms: float = 25.0
+model_trainer_min_meta_learner_weight: float = 0.05
+model_trainer_latency_sample_rows: int = 1000
+model_trainer_cascade_enabled: bool = True
+model_trainer_cascade_first_stage: str = "LogisticRegression"
+model_trainer_cascade_max_accuracy_loss: float = 0.005
 
 
 """
@@ -77,6 +101,41 @@ model_bucket_name = "telcochurn-model2025"
 model_pusher_s3_key = "model-registry"
 
 
+"""
+Prediction related constants
+"""
+model_cache_dir: str = "model_cache"
+model_cache_max_bytes: int = 2 * 1024 ** 3
+# Serve the model from the read-only memory mapped artifact pushed with it so uvicorn workers share its arrays,
+# None to unpickle. Only arrays that stay arrays on load are shared, mmap_sharing_report of ModelTrainerArtifact
+# tells how much of the model that is
+model_mmap_mode: str = "r"
+model_refresh_interval_seconds: int = 60
+micro_batch_enabled: bool = True
+micro_batch_max_size: int = 64
+micro_batch_max_wait_ms: float = 2.0
+inference_max_workers: int = 4
+prediction_cache_enabled: bool = True
+prediction_cache_max_entries: int = 100000
+prediction_cache_ttl_seconds: float = 3600
+stream_chunk_size: int = 50000
+hot_path_log_sample_rate: float = 0.01
+hot_path_log_max_per_second: int = 10
+
+
+"""
+Batch scoring related constants
+"""
+batch_scoring_dir_name: str = "batch_scoring"
+batch_scoring_checkpoint_file_name: str = "checkpoint.json"
+batch_scoring_partition_size: int = 10000
+batch_scoring_write_batch_size: int = 1000
+batch_scoring_workers: int = 4
+batch_scoring_prediction_field: str = "churn_prediction"
+batch_scoring_probability_field: str = "churn_probability"
+batch_scoring_model_version_field: str = "model_version"
+
+
 APP_HOST = "0.0.0.0"
 APP_PORT = 8080
 
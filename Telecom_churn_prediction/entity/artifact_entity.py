@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import List, Optional
 
 @dataclass
 class DataIngestionArtifact:
@@ -18,6 +19,9 @@ class DataTransformationArtifact:
     transformed_object_file_path:str 
     transformed_train_file_path:str
     transformed_test_file_path:str
+    compiled_object_file_path:str
+    transformed_train_target_file_path:str
+    transformed_test_target_file_path:str
     
 
 @dataclass
@@ -27,10 +31,49 @@ class ClassificationMetricArtifact:
     recall_score:float
     
 
+@dataclass
+class CascadeMetricArtifact:
+    lower_threshold:float
+    upper_threshold:float
+    first_stage_rate:float
+    full_model_accuracy:float
+    cascade_accuracy:float
+    accuracy_loss:float
+    full_model_f1_score:float
+    cascade_f1_score:float
+    f1_score_loss:float
+    full_model_rows_per_second:float
+    cascade_rows_per_second:float
+    throughput_gain:float
+    full_model_latency_ms:float
+    cascade_latency_ms:float
+
+
+@dataclass
+class ModelCandidateArtifact:
+    model_name:str
+    cv_accuracy:float
+    row_latency_ms:float
+    batch_row_cost_ms:float
+    wall_clock_seconds:Optional[float] = None
+    fit_seconds:Optional[float] = None
+    tuning_strategy:Optional[str] = None
+    tuning_candidates:Optional[int] = None
+    tuning_seconds:Optional[float] = None
+    tuned_cv_accuracy:Optional[float] = None
+    selected:bool = False
+    pruned:bool = False
+    meta_learner_weight:Optional[float] = None
+
+
 @dataclass
 class ModelTrainerArtifact:
     trained_model_file_path:str 
     metric_artifact:ClassificationMetricArtifact
+    cascade_metric_artifact:Optional[CascadeMetricArtifact] = None
+    model_candidate_artifacts:Optional[List[ModelCandidateArtifact]] = None
+    stack_latency_ms:Optional[float] = None
+    mmap_sharing_report:Optional[dict] = None
 
 
 @dataclass
@@ -39,6 +82,7 @@ class ModelEvaluationArtifact:
     changed_accuracy:float
     s3_model_path:str 
     trained_model_path:str
+    cascade_metric_artifact:Optional[CascadeMetricArtifact] = None
 
 
 @dataclass
@@ -0,0 +1,47 @@
+import numpy as np
+
+from Telecom_churn_prediction.metrics import cascade_rows
+
+
+class CascadeClassifier:
+    """
+    This class answers confident rows with a cheap first stage model and sends only the rows whose churn
+    probability falls inside the uncertain band (lower_threshold, upper_threshold) to the full model
+    """
+
+    def __init__(self, first_stage: object, full_model: object, lower_threshold: float, upper_threshold: float):
+        """
+        :param first_stage: Fitted cheap classifier with predict_proba, e.g. the tuned LogisticRegression
+        :param full_model: Fitted full classifier with predict_proba, e.g. the StackingClassifier
+        :param lower_threshold: First stage churn probability at or below which the first stage answers
+        :param upper_threshold: First stage churn probability at or above which the first stage answers
+        """
+        self.first_stage = first_stage
+        self.full_model = full_model
+        self.lower_threshold = lower_threshold
+        self.upper_threshold = upper_threshold
+
+    @property
+    def classes_(self) -> np.ndarray:
+        return self.full_model.classes_
+
+    def get_uncertain_rows(self, first_stage_probabilities: np.ndarray) -> np.ndarray:
+        """
+        Returns the indices of the rows the first stage is not confident about
+        """
+        churn_probabilities = first_stage_probabilities[:, 1]
+        return np.flatnonzero((churn_probabilities > self.lower_threshold) &
+                              (churn_probabilities < self.upper_threshold))
+
+    def predict_proba(self, x) -> np.ndarray:
+        probabilities = np.asarray(self.first_stage.predict_proba(x), dtype=np.float64)
+        uncertain_rows = self.get_uncertain_rows(probabilities)
+        if len(uncertain_rows):
+            probabilities[uncertain_rows] = self.full_model.predict_proba(x[uncertain_rows])
+
+        cascade_rows.inc(probabilities.shape[0] - len(uncertain_rows), stage="first_stage")
+        cascade_rows.inc(len(uncertain_rows), stage="full_model")
+        return probabilities
+
+    def predict(self, x) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(x), axis=1))
@@ -0,0 +1,118 @@
+import sys
+from typing import TYPE_CHECKING, Dict, List
+
+import numpy as np
+
+from Telecom_churn_prediction.exception import CustomException
+
+if TYPE_CHECKING:
+    from sklearn.compose import ColumnTransformer
+
+
+class CompiledPreprocessor:
+    """
+    This class holds the fitted StandardScaler and OneHotEncoder state of the ColumnTransformer as flat
+    NumPy arrays and dicts, and maps raw feature dicts straight to the model input vector without pandas
+    """
+
+    def __init__(self, numeric_columns: List[str], numeric_positions: np.ndarray, means: np.ndarray,
+                 scales: np.ndarray, category_positions: Dict[str, Dict[object, int]],
+                 ignore_unknown_columns: List[str], n_features_out: int):
+        """
+        :param numeric_columns: Input columns scaled by StandardScaler, in output order
+        :param numeric_positions: Output index of every numeric column
+        :param means: Fitted means of the numeric columns, 0 where the scaler does not center
+        :param scales: Fitted scales of the numeric columns, 1 where the scaler does not scale
+        :param category_positions: Per categorical column, output index of every known category
+        :param ignore_unknown_columns: Categorical columns whose encoder ignores unknown categories
+        :param n_features_out: Width of the model input vector
+        """
+        self.numeric_columns = numeric_columns
+        self.numeric_positions = numeric_positions
+        self.means = means
+        self.scales = scales
+        self.category_positions = category_positions
+        self.ignore_unknown_columns = set(ignore_unknown_columns)
+        self.n_features_out = n_features_out
+
+    @classmethod
+    def from_column_transformer(cls, preprocessor: "ColumnTransformer") -> "CompiledPreprocessor":
+        """
+        Flattens a fitted ColumnTransformer made of StandardScaler and OneHotEncoder steps
+        """
+        try:
+            # Imported here so that the serving process can load a compiled preprocessor without sklearn
+            from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+            numeric_columns, numeric_positions, means, scales = [], [], [], []
+            category_positions, ignore_unknown_columns = {}, []
+            offset = 0
+
+            for name, transformer, columns in preprocessor.transformers_:
+                if name == "remainder":
+                    if transformer != "drop":
+                        raise ValueError(f"Unsupported remainder: {transformer}")
+                    continue
+                columns = list(columns)
+
+                if isinstance(transformer, StandardScaler):
+                    mean = transformer.mean_ if transformer.with_mean else np.zeros(len(columns))
+                    scale = transformer.scale_ if transformer.with_std else np.ones(len(columns))
+                    numeric_columns.extend(columns)
+                    numeric_positions.extend(range(offset, offset + len(columns)))
+                    means.extend(mean)
+                    scales.extend(scale)
+                    offset += len(columns)
+
+                elif isinstance(transformer, OneHotEncoder):
+                    if transformer.drop is not None or getattr(transformer, "_infrequent_enabled", False):
+                        raise ValueError("OneHotEncoder with drop or infrequent categories is not supported")
+                    for column, categories in zip(columns, transformer.categories_):
+                        category_positions[column] = {
+                            category: offset + index for index, category in enumerate(categories.tolist())
+                        }
+                        if transformer.handle_unknown != "error":
+                            ignore_unknown_columns.append(column)
+                        offset += len(categories)
+
+                else:
+                    raise ValueError(f"Unsupported transformer {name}: {type(transformer).__name__}")
+
+            return cls(numeric_columns=numeric_columns,
+                       numeric_positions=np.array(numeric_positions, dtype=np.intp),
+                       means=np.array(means, dtype=np.float64),
+                       scales=np.array(scales, dtype=np.float64),
+                       category_positions=category_positions,
+                       ignore_unknown_columns=ignore_unknown_columns,
+                       n_features_out=offset)
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def transform_records(self, records: List[dict]) -> np.ndarray:
+        """
+        Maps raw feature dicts to the dense model input matrix, same values as ColumnTransformer.transform
+        """
+        output = np.zeros((len(records), self.n_features_out), dtype=np.float64)
+        numeric_values = np.array([[record[column] for column in self.numeric_columns] for record in records],
+                                  dtype=np.float64)
+        if len(records):
+            numeric_values -= self.means
+            numeric_values /= self.scales
+            output[:, self.numeric_positions] = numeric_values
+
+        for row, record in enumerate(records):
+            for column, positions in self.category_positions.items():
+                position = positions.get(record[column])
+                if position is None:
+                    if column in self.ignore_unknown_columns:
+                        continue
+                    raise ValueError(f"Found unknown category {record[column]!r} in column {column}")
+                output[row, position] = 1.0
+        return output
+
+    def transform_record(self, record: dict) -> np.ndarray:
+        """
+        Maps one raw feature dict to a model input vector of shape (1, n_features_out)
+        """
+        return self.transform_records([record])
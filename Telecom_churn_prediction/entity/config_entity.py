@@ -16,9 +16,12 @@ training_pipeline_config = TrainingPipelineConfig()
 @dataclass
 class DataIngestionConfig:
     data_ingestion_dir = os.path.join(training_pipeline_config.artifactDir, data_ingestion_dir_name)
-    feature_store_file_path = os.path.join(data_ingestion_dir, data_ingestion_feature_store_dir, data_file)
-    training_data_file_path = os.path.join(data_ingestion_dir, data_ingestion_ingested_dir, train_data_file)
-    testing_data_file_path = os.path.join(data_ingestion_dir, data_ingestion_ingested_dir, test_data_file)
+    feature_store_file_path = os.path.join(data_ingestion_dir, data_ingestion_feature_store_dir,
+                                           data_file.replace("csv", data_ingestion_file_format))
+    training_data_file_path = os.path.join(data_ingestion_dir, data_ingestion_ingested_dir,
+                                           train_data_file.replace("csv", data_ingestion_file_format))
+    testing_data_file_path = os.path.join(data_ingestion_dir, data_ingestion_ingested_dir,
+                                          test_data_file.replace("csv", data_ingestion_file_format))
     train_test_split_ratio = data_ingestion_train_test_split_ratio
     collectionName = data_ingestion_collection_name
 
@@ -35,10 +38,20 @@ class DataTransformationConfig:
     transformed_train_file_path: str = os.path.join(data_transformation_dir, data_transformation_transformed_data_dir,
                                                     train_data_file.replace("csv", "npy"))
     transformed_test_file_path: str = os.path.join(data_transformation_dir, data_transformation_transformed_data_dir,
-                                                   train_data_file.replace("csv", "npy"))
+                                                   test_data_file.replace("csv", "npy"))
+    transformed_train_target_file_path: str = os.path.join(data_transformation_dir, data_transformation_transformed_data_dir,
+                                                           train_data_file.replace(".csv", "_target.npy"))
+    transformed_test_target_file_path: str = os.path.join(data_transformation_dir, data_transformation_transformed_data_dir,
+                                                          test_data_file.replace(".csv", "_target.npy"))
     transformed_object_file_path: str = os.path.join(data_transformation_dir,
                                                      data_transformation_transformed_object_dir,
                                                      preprocessing_object_file_name)
+    compiled_object_file_path: str = os.path.join(data_transformation_dir,
+                                                  data_transformation_transformed_object_dir,
+                                                  compiled_preprocessing_object_file_name)
+    chunk_size: int = data_transformation_chunk_size
+    resample_enabled: bool = data_transformation_resample_enabled
+    sparse_output: bool = data_transformation_sparse_output
     
 
 @dataclass
@@ -47,6 +60,18 @@ class ModelTrainerConfig:
     trained_model_file_path: str = os.path.join(model_trainer_dir, model_trainer_trained_model_dir, model_file_name)
     expected_accuracy: float = model_trainer_expected_score
     model_config_file_path: str = model_trainer_model_config_file_path
+    cv_folds: int = model_trainer_cv_folds
+    cpu_budget: int = model_trainer_cpu_budget
+    inner_threads: int = model_trainer_inner_threads
+    random_state: int = model_trainer_random_state
+    tuning_time_budget_seconds: float = model_trainer_tuning_time_budget_seconds
+    max_stack_size: int = model_trainer_max_stack_size
+    stack_latency_budget_ms: float = model_trainer_stack_latency_budget_ms
+    min_meta_learner_weight: float = model_trainer_min_meta_learner_weight
+    latency_sample_rows: int = model_trainer_latency_sample_rows
+    cascade_enabled: bool = model_trainer_cascade_enabled
+    cascade_first_stage: str = model_trainer_cascade_first_stage
+    cascade_max_accuracy_loss: float = model_trainer_cascade_max_accuracy_loss
 
 
 @dataclass
@@ -67,3 +92,28 @@ class ModelPusherConfig:
 class TelcoChurnaPredictorConfig:
     model_file_path: str = model_file_name
     model_bucket_name: str = model_bucket_name
+    model_refresh_interval: int = model_refresh_interval_seconds
+    model_mmap_mode: str = model_mmap_mode
+    micro_batch_enabled: bool = micro_batch_enabled
+    micro_batch_max_size: int = micro_batch_max_size
+    micro_batch_max_wait_ms: float = micro_batch_max_wait_ms
+    inference_max_workers: int = inference_max_workers
+    prediction_cache_enabled: bool = prediction_cache_enabled
+    prediction_cache_max_entries: int = prediction_cache_max_entries
+    prediction_cache_ttl_seconds: float = prediction_cache_ttl_seconds
+    stream_chunk_size: int = stream_chunk_size
+
+
+@dataclass
+class BatchScoringConfig:
+    collection_name: str = collection_name
+    checkpoint_file_path: str = os.path.join(artifact_dir, batch_scoring_dir_name, batch_scoring_checkpoint_file_name)
+    partition_size: int = batch_scoring_partition_size
+    write_batch_size: int = batch_scoring_write_batch_size
+    workers: int = batch_scoring_workers
+    model_bucket_name: str = model_bucket_name
+    model_file_path: str = model_file_name
+    local_model_file_path: str = None
+    prediction_field: str = batch_scoring_prediction_field
+    probability_field: str = batch_scoring_probability_field
+    model_version_field: str = batch_scoring_model_version_field
@@ -1,14 +1,61 @@
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+import numpy as np
 from pandas import DataFrame
-from sklearn.compose import ColumnTransformer
+
+from Telecom_churn_prediction.metrics import predicted_rows, stage_timer
+
+# Only needed for annotations, the serving process imports sklearn when it unpickles the model
+if TYPE_CHECKING:
+    from sklearn.compose import ColumnTransformer
+    from Telecom_churn_prediction.entity.compiled_preprocessor import CompiledPreprocessor
 
 
 class TelcoChurnModel:
-    def __init__(self, preprocessing_object: ColumnTransformer, trained_model_object: object):
+    def __init__(self, preprocessing_object: "ColumnTransformer", trained_model_object: object,
+                 compiled_preprocessor: Optional["CompiledPreprocessor"] = None):
         self.preprocessing_object = preprocessing_object
         self.trained_model_object = trained_model_object
-        print("-----------------------------------------------------------------------",self.trained_model_object)
+        self.compiled_preprocessor = compiled_preprocessor
 
     def predict_output(self, dataframe):
-        transformed = self.preprocessing_object.transform(dataframe)
-        print("--------------------------------------------------------------------------------",transformed)
-        return self.trained_model_object.predict(transformed)
+        with stage_timer("preprocessing"):
+            transformed = self.preprocessing_object.transform(dataframe)
+        with stage_timer("model_predict"):
+            predictions = self.trained_model_object.predict(transformed)
+        predicted_rows.inc(len(predictions), path="dataframe")
+        return predictions
+
+    def predict_output_with_proba(self, dataframe: DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scores the whole dataframe with one transform and one model call
+        :return: predicted classes and churn probabilities
+        """
+        with stage_timer("preprocessing"):
+            transformed = self.preprocessing_object.transform(dataframe)
+        with stage_timer("model_predict"):
+            probabilities = self.trained_model_object.predict_proba(transformed)
+        predictions = self.trained_model_object.classes_.take(np.argmax(probabilities, axis=1))
+        predicted_rows.inc(len(predictions), path="batch")
+        return predictions, probabilities[:, 1]
+
+    def transform_records(self, records: List[dict]):
+        """
+        Transforms raw feature dicts with the compiled preprocessor, falls back to the
+        ColumnTransformer for models saved without one
+        """
+        compiled_preprocessor = getattr(self, "compiled_preprocessor", None)
+        with stage_timer("preprocessing"):
+            if compiled_preprocessor is not None:
+                return compiled_preprocessor.transform_records(records)
+            return self.preprocessing_object.transform(DataFrame.from_records(records))
+
+    def predict_records(self, records: List[dict]) -> np.ndarray:
+        """
+        Scores raw feature dicts without building a DataFrame
+        """
+        transformed = self.transform_records(records)
+        with stage_timer("model_predict"):
+            predictions = self.trained_model_object.predict(transformed)
+        predicted_rows.inc(len(predictions), path="records")
+        return predictions
@@ -0,0 +1,135 @@
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from Telecom_churn_prediction.entity.estimator import TelcoChurnModel
+from Telecom_churn_prediction.entity.s3_estimator import TelcoChurnEstimator
+from Telecom_churn_prediction.exception import CustomException
+from Telecom_churn_prediction.logger import logger
+from Telecom_churn_prediction.metrics import model_load_latency, model_loads, stage_timer
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    model: TelcoChurnModel
+    version: str
+
+
+class TelcoChurnModelCache:
+    """
+    This class keeps one loaded TelcoChurnModel per process and hot-swaps it
+    when ModelPusher pushes a new version of the model to s3 bucket
+    """
+
+    caches = {}
+    caches_lock = threading.Lock()
+
+    def __init__(self, bucket_name: str, model_path: str, refresh_interval: int, mmap_mode: Optional[str] = None):
+        """
+        :param bucket_name: Name of your model bucket
+        :param model_path: Location of your model in bucket
+        :param refresh_interval: Seconds between two checks for a new model version
+        :param mmap_mode: Memory map the arrays of the model with this mode instead of unpickling a private copy
+        """
+        self.estimator = TelcoChurnEstimator(bucket_name=bucket_name, model_path=model_path, mmap_mode=mmap_mode)
+        self.refresh_interval = refresh_interval
+        self._current: Optional[LoadedModel] = None
+        self._load_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._swap_listeners: List[Callable[[LoadedModel], None]] = []
+
+    @classmethod
+    def get_instance(cls, bucket_name: str, model_path: str, refresh_interval: int,
+                     mmap_mode: Optional[str] = None) -> "TelcoChurnModelCache":
+        """
+        Returns the process wide cache of the model stored at bucket_name/model_path
+        """
+        key = (bucket_name, model_path)
+        with cls.caches_lock:
+            if key not in cls.caches:
+                cls.caches[key] = cls(bucket_name=bucket_name, model_path=model_path,
+                                      refresh_interval=refresh_interval, mmap_mode=mmap_mode)
+            return cls.caches[key]
+
+    def get(self) -> LoadedModel:
+        """
+        Returns the currently loaded model, loading it on first use if the watcher has not done it yet.
+        The returned snapshot never changes, so a request keeps scoring with the same model even if a
+        new version is swapped in meanwhile
+        """
+        current = self._current
+        if current is None:
+            self.refresh()
+            current = self._current
+        return current
+
+    def add_swap_listener(self, listener: Callable[[LoadedModel], None]) -> None:
+        """
+        Register a callback that is called with the new LoadedModel after every swap
+        """
+        self._swap_listeners.append(listener)
+
+    def refresh(self) -> bool:
+        """
+        Loads the latest model version from s3 if it differs from the loaded one and swaps it in
+        :return: True if a new model was swapped in
+        """
+        try:
+            with self._load_lock:
+                with stage_timer("model_version_check"):
+                    version = self.estimator.get_model_version()
+                current = self._current
+                if current is not None and current.version == version:
+                    return False
+
+                logger.info(f"Loading model version {version} from s3 bucket")
+                start_time = time.perf_counter()
+                try:
+                    # Loads exactly the checked version, a model pushed in between is picked up next refresh
+                    model = self.estimator.load_model(version=version)
+                except Exception:
+                    model_loads.inc(outcome="failure")
+                    raise
+                model_load_latency.observe(time.perf_counter() - start_time)
+                model_loads.inc(outcome="success")
+                # Single reference assignment, readers either see the old or the fully loaded new model
+                loaded_model = LoadedModel(model=model, version=version)
+                self._current = loaded_model
+                logger.info(f"Swapped in model version {version}")
+
+            for listener in self._swap_listeners:
+                listener(loaded_model)
+            return True
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def _watch(self) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.info(f"Model refresh failed, keeping the current model: {e}")
+            if self._stop_event.wait(self.refresh_interval):
+                break
+
+    def start_watcher(self) -> None:
+        """
+        Starts a daemon thread which loads the model off the request path and then polls s3 for new versions
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, name="telco-churn-model-watcher", daemon=True)
+        self._watcher.start()
+        logger.info("Started model watcher thread")
+
+    def stop_watcher(self) -> None:
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.refresh_interval)
+            self._watcher = None
+        logger.info("Stopped model watcher thread")
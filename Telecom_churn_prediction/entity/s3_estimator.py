@@ -1,7 +1,10 @@
 from Telecom_churn_prediction.cloud_storage.aws_storage import SimpleStorageService
 from Telecom_churn_prediction.exception import CustomException
 from Telecom_churn_prediction.entity.estimator import TelcoChurnModel
+from Telecom_churn_prediction.utils.main_utils import get_mmap_artifact_path
+import os
 import sys
+from typing import Optional
 from pandas import DataFrame
 
 
@@ -10,14 +13,16 @@ class TelcoChurnEstimator:
     This class is used to save and retrieve us_visas model in s3 bucket and to do prediction
     """
 
-    def __init__(self,bucket_name,model_path):
+    def __init__(self,bucket_name,model_path,mmap_mode=None):
         """
         :param bucket_name: Name of your model bucket
         :param model_path: Location of your model in bucket
+        :param mmap_mode: Load the model from its memory mapped serving artifact with this mode, e.g. "r"
         """
         self.bucket_name = bucket_name
         self.s3 = SimpleStorageService()
         self.model_path = model_path
+        self.mmap_mode = mmap_mode
         self.loaded_model:TelcoChurnModel=None
 
 
@@ -28,17 +33,32 @@ class TelcoChurnEstimator:
             print(e)
             return False
 
-    def load_model(self)->TelcoChurnModel:
+    def load_model(self,version:Optional[str]=None)->TelcoChurnModel:
         """
         Load the model from the model_path
+        :param version: ETag returned by get_model_version, loading fails if the model was replaced since
         :return:
         """
 
-        return self.s3.load_model(self.model_path,bucket_name=self.bucket_name)
+        return self.s3.load_model(self.model_path,bucket_name=self.bucket_name,mmap_mode=self.mmap_mode,
+                                  version=version)
+
+    def get_model_version(self) -> str:
+        """
+        Get the version tag (ETag) of the latest model stored at model_path
+        :return: ETag of the model object in s3 bucket
+        """
+        try:
+            file_object = self.s3.get_file_object(self.model_path, bucket_name=self.bucket_name)
+            return file_object.e_tag
+        except Exception as e:
+            raise CustomException(e, sys)
 
     def save_model(self,from_file,remove:bool=False)->None:
         """
-        Save the model to the model_path
+        Save the model to the model_path, followed by its memory mapped serving artifact if ModelTrainer saved one
+        next to it. The artifact is tagged with the ETag of the uploaded model, so serving never maps an artifact
+        of another version
         :param from_file: Your local system model path
         :param remove: By default it is false that mean you will have your model locally available in your system folder
         :return:
@@ -49,6 +69,14 @@ class TelcoChurnEstimator:
                                 bucket_name=self.bucket_name,
                                 remove=remove
                                 )
+            mmap_artifact_file = get_mmap_artifact_path(from_file)
+            if os.path.exists(mmap_artifact_file):
+                self.s3.upload_file(mmap_artifact_file,
+                                    to_filename=get_mmap_artifact_path(self.model_path),
+                                    bucket_name=self.bucket_name,
+                                    remove=remove,
+                                    metadata={"model-etag": self.get_model_version().strip('"')}
+                                    )
         except Exception as e:
             raise CustomException(e, sys)
 
@@ -0,0 +1,93 @@
+from typing import List, Tuple
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.linear_model import LogisticRegression
+
+
+def get_meta_features(model, x) -> np.ndarray:
+    """
+    Returns the column model feeds to the meta-learner, with the same method and column StackingClassifier uses:
+    churn probability, else decision function, else predicted class
+    """
+    if hasattr(model, "predict_proba"):
+        return model.predict_proba(x)[:, 1]
+    if hasattr(model, "decision_function"):
+        return model.decision_function(x)
+    return model.predict(x)
+
+
+def fit_and_predict_fold(model, x, y, train_index, test_index) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fits model on one fold and returns the held out row indices with their meta features, runs in a joblib worker
+    """
+    model.fit(x[train_index], y[train_index])
+    return test_index, get_meta_features(model, x[test_index])
+
+
+class OutOfFoldStackingClassifier(BaseEstimator, ClassifierMixin):
+    """
+    This class is a binary stacking classifier whose base models are already fitted on the whole train data,
+    e.g. the best_estimator_ of every search. fit only runs one shared CV pass, all models and folds in parallel,
+    to get the out-of-fold meta features and fits the meta-learner on them. Given the same folds it predicts
+    like StackingClassifier(cv=folds) without the extra refit of every base model
+    """
+
+    def __init__(self, estimators: List[tuple], final_estimator=None, cv=None, n_jobs=None):
+        """
+        :param estimators: (name, fitted model) pairs
+        :param final_estimator: Meta-learner, LogisticRegression if None
+        :param cv: Fold splitter of the out-of-fold pass, e.g. the StratifiedKFold used for tuning
+        :param n_jobs: Parallel jobs of the out-of-fold pass
+        """
+        self.estimators = estimators
+        self.final_estimator = final_estimator
+        self.cv = cv
+        self.n_jobs = n_jobs
+
+    @property
+    def named_estimators_(self) -> dict:
+        return dict(self.estimators)
+
+    def fit(self, x, y) -> "OutOfFoldStackingClassifier":
+        y = np.asarray(y)
+        self.classes_ = np.unique(y)
+        folds = list(self.cv.split(x, y))
+
+        fold_results = Parallel(n_jobs=self.n_jobs)(
+            delayed(fit_and_predict_fold)(clone(model), x, y, train_index, test_index)
+            for _, model in self.estimators
+            for train_index, test_index in folds
+        )
+
+        self.oof_predictions_ = np.empty((x.shape[0], len(self.estimators)))
+        for task_number, (test_index, meta_features) in enumerate(fold_results):
+            self.oof_predictions_[test_index, task_number // len(folds)] = meta_features
+
+        self.final_estimator_ = clone(self.final_estimator if self.final_estimator is not None
+                                      else LogisticRegression())
+        self.final_estimator_.fit(self.oof_predictions_, y)
+        return self
+
+    def select_estimators(self, model_names: List[str], y) -> "OutOfFoldStackingClassifier":
+        """
+        Returns a stack of the named base models only. The meta-learner is refitted on their stored out-of-fold
+        columns, no base model is fitted again
+        """
+        columns = [index for index, (model_name, _) in enumerate(self.estimators) if model_name in model_names]
+        selected = OutOfFoldStackingClassifier(estimators=[self.estimators[index] for index in columns],
+                                               final_estimator=self.final_estimator, cv=self.cv, n_jobs=self.n_jobs)
+        selected.classes_ = self.classes_
+        selected.oof_predictions_ = self.oof_predictions_[:, columns]
+        selected.final_estimator_ = clone(self.final_estimator_).fit(selected.oof_predictions_, np.asarray(y))
+        return selected
+
+    def transform(self, x) -> np.ndarray:
+        return np.column_stack([get_meta_features(model, x) for _, model in self.estimators])
+
+    def predict_proba(self, x) -> np.ndarray:
+        return self.final_estimator_.predict_proba(self.transform(x))
+
+    def predict(self, x) -> np.ndarray:
+        return self.final_estimator_.predict(self.transform(x))
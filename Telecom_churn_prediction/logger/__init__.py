@@ -1,4 +1,5 @@
-import os, datetime, logging, sys
+import os, datetime, logging, sys, atexit, queue, random, threading, time
+from logging.handlers import QueueHandler, QueueListener
 
 # script_name = os.path.splitext(os.path.basename(__file__))[0]
 logger_format = "[%(asctime)s] - %(lineno)d - %(levelname)s - %(filename)s - %(message)s"
@@ -6,15 +7,116 @@ log_dir = "Logs"
 current_time = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 file_path = os.path.join(log_dir, f"running_logs_{current_time}.log")
 
+# Set LOG_ASYNC=0 to write log records synchronously from the calling thread
+async_logging = os.getenv("LOG_ASYNC", "1") != "0"
+
 os.makedirs(log_dir, exist_ok=True)
 
+log_handlers = [
+    logging.FileHandler(file_path),
+    logging.StreamHandler(sys.stdout)
+]
+for log_handler in log_handlers:
+    log_handler.setFormatter(logging.Formatter(logger_format))
+
+
+class SampledLogger(logging.LoggerAdapter):
+    """
+    Logs a random sample_rate share of the records below min_level, records at or above it are always logged.
+    Sampling happens before the record is created, so a dropped message costs almost nothing
+    """
+
+    def __init__(self, logger: logging.Logger, sample_rate: float, min_level: int = logging.WARNING):
+        super().__init__(logger, {})
+        self.sample_rate = sample_rate
+        self.min_level = min_level
+
+    def isEnabledFor(self, level: int) -> bool:
+        if level < self.min_level and random.random() >= self.sample_rate:
+            return False
+        return self.logger.isEnabledFor(level)
+
+    def process(self, msg, kwargs):
+        return msg, kwargs
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most max_records records below min_level per interval_seconds, and reports
+    the number of dropped records on the first record of the next interval
+    """
+
+    def __init__(self, max_records: int, interval_seconds: float = 1.0, min_level: int = logging.WARNING):
+        super().__init__()
+        self.max_records = max_records
+        self.interval_seconds = interval_seconds
+        self.min_level = min_level
+        self._window_start = time.monotonic()
+        self._count = 0
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.min_level:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.interval_seconds:
+                if self._dropped:
+                    record.msg = f"{record.msg} ({self._dropped} similar records dropped)"
+                self._window_start, self._count, self._dropped = now, 0, 0
+            if self._count >= self.max_records:
+                self._dropped += 1
+                return False
+            self._count += 1
+            return True
+
+
+def get_hot_path_logger(name: str, sample_rate: float = 1.0, max_per_second: int = None) -> SampledLogger:
+    """
+    Returns a child logger for messages logged on every request, thinned out by sampling and/or rate limiting.
+    Warnings and errors are never dropped
+    """
+    hot_path_logger = logging.getLogger(f"{__name__}.{name}")
+    if max_per_second is not None and not hot_path_logger.filters:
+        hot_path_logger.addFilter(RateLimitFilter(max_per_second))
+    return SampledLogger(hot_path_logger, sample_rate)
+
+
+log_listener = None
+
+if async_logging:
+    # Callers only put the record on a queue, a listener thread does the file and stdout writes
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    # The queue carries the bare message, the log handlers apply logger_format on the listener thread
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def start_log_listener() -> None:
+        global log_listener
+        log_listener = QueueListener(queue_handler.queue, *log_handlers, respect_handler_level=True)
+        log_listener.start()
+
+    def stop_log_listener() -> None:
+        if log_listener is not None and log_listener._thread is not None:
+            log_listener.stop()
+
+    def restart_log_listener_in_child() -> None:
+        # The listener thread does not survive a fork, give the child its own queue and thread
+        queue_handler.queue = queue.SimpleQueue()
+        start_log_listener()
+
+    start_log_listener()
+    atexit.register(stop_log_listener)
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=restart_log_listener_in_child)
+    root_handlers = [queue_handler]
+else:
+    root_handlers = log_handlers
+
 logging.basicConfig(
     level=logging.INFO,
-    format=logger_format,
-    handlers=[
-        logging.FileHandler(file_path),
-        logging.StreamHandler(sys.stdout)
-    ]
+    handlers=root_handlers
 )
 
 logger = logging.getLogger(__name__)
@@ -0,0 +1,180 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+# Latency buckets in seconds, from 100us (compiled preprocessor) up to 30s (cold model load)
+latency_buckets = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def format_labels(label_names: Sequence[str], label_values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric(ABC):
+    """
+    Base class of the metrics, renders the HELP and TYPE lines and the samples of its subclass
+    """
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def label_key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        return lines + self.samples()
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """
+        Returns one exposition line per label combination and series of the metric
+        """
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self.label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{format_labels(self.label_names, key)} {value}" for key, value in values.items()]
+
+
+class Gauge(Counter):
+    metric_type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self.label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = latency_buckets):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self.label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = {key: ([*state[0]], state[1], state[2]) for key, state in self._values.items()}
+
+        lines = []
+        for key, (bucket_counts, total, count) in values.items():
+            cumulative = 0
+            for upper_bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative += bucket_count
+                le = "+Inf" if upper_bound == float("inf") else repr(upper_bound)
+                labels = format_labels(self.label_names, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.label_names, key)} {total}")
+            lines.append(f"{self.name}_count{format_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    This class keeps the in-process metrics and renders them in the Prometheus text exposition format
+    """
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterator[Tuple[str, str, str, float]]]] = []
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = latency_buckets) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def register(self, metric: Metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterator[Tuple[str, str, str, float]]]) -> None:
+        """
+        Registers a callback yielding (name, type, documentation, value) samples computed at scrape time
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, metric_type, documentation, value in collector():
+                lines.extend([f"# HELP {name} {documentation}", f"# TYPE {name} {metric_type}", f"{name} {value}"])
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+request_count = registry.counter("telco_churn_requests_total", "HTTP requests by endpoint and status code",
+                                 ["endpoint", "method", "status"])
+error_count = registry.counter("telco_churn_errors_total", "Failed requests by endpoint", ["endpoint"])
+requests_in_flight = registry.gauge("telco_churn_requests_in_flight", "HTTP requests currently being served")
+request_latency = registry.histogram("telco_churn_request_duration_seconds", "HTTP request latency by endpoint",
+                                     ["endpoint"])
+stage_latency = registry.histogram("telco_churn_stage_duration_seconds", "Latency of the stages of the prediction path",
+                                   ["stage"])
+model_load_latency = registry.histogram("telco_churn_model_load_duration_seconds",
+                                        "Time to fetch and load a new model version")
+model_loads = registry.counter("telco_churn_model_loads_total", "Model loads by outcome", ["outcome"])
+predicted_rows = registry.counter("telco_churn_predicted_rows_total", "Rows scored by the model", ["path"])
+cascade_rows = registry.counter("telco_churn_cascade_rows_total", "Rows answered by each stage of the cascade",
+                                ["stage"])
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """
+    Records the duration of the enclosed block in the stage latency histogram
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_latency.observe(time.perf_counter() - start, stage=stage)
@@ -0,0 +1,143 @@
+import asyncio
+import sys
+import time
+from typing import Callable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from Telecom_churn_prediction.exception import CustomException
+from Telecom_churn_prediction.logger import logger
+
+Rows = Union[DataFrame, List[dict]]
+
+
+class MicroBatchScheduler:
+    """
+    This class collects concurrent prediction requests for a short window and scores them as one batch,
+    so the fixed cost of the preprocessor and of the stacking model is paid once per batch
+    """
+
+    def __init__(self, predict_fn: Callable[[Rows], np.ndarray], max_batch_size: int = 64,
+                 max_wait_ms: float = 2.0, executor=None):
+        """
+        :param predict_fn: Blocking function which scores a dataframe or a list of feature dicts
+                           and returns one prediction per row
+        :param max_batch_size: Maximum number of rows scored together
+        :param max_wait_ms: Maximum time the first request of a batch waits for more requests
+        :param executor: Executor which runs predict_fn, default executor of the event loop if None
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = executor
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: List[Tuple[Rows, asyncio.Future]] = []
+
+    def start(self) -> None:
+        """
+        Starts the batching loop on the running event loop
+        """
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Started micro batch scheduler (max_batch_size={self.max_batch_size}, "
+                        f"max_wait={self.max_wait * 1000:.1f}ms)")
+
+    async def stop(self) -> None:
+        """
+        Stops the batching loop and fails the requests which are queued or being scored,
+        so that no caller of submit waits forever
+        """
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+            items = self._in_flight
+            while not self._queue.empty():
+                items.append(self._queue.get_nowait())
+            unfinished = [future for _, future in items if not future.done()]
+            for future in unfinished:
+                future.set_exception(CustomException("Scheduler stopped before the request was scored", sys))
+            self._in_flight = []
+            logger.info(f"Stopped micro batch scheduler, failed {len(unfinished)} unfinished requests")
+
+    async def submit(self, rows: Rows) -> np.ndarray:
+        """
+        Queues the rows (a dataframe or a list of feature dicts) for the next batch and waits for their predictions
+        """
+        if self._worker is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((rows, future))
+        return await future
+
+    async def _collect_batch(self) -> List[Tuple[Rows, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        # Kept on the instance so that stop can fail the requests taken off the queue
+        self._in_flight = batch
+        n_rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+
+        while n_rows < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            pending = [(rows, future) for rows, future in batch if not future.cancelled()]
+            if not pending:
+                continue
+
+            try:
+                merged = self._merge([rows for rows, _ in pending])
+                predictions = await loop.run_in_executor(self.executor, self.predict_fn, merged)
+                self._dispatch(pending, predictions)
+            except Exception as e:
+                logger.info(f"Batch of {len(pending)} requests failed, scoring them one by one: {e}")
+                await self._score_individually(pending)
+
+    @staticmethod
+    def _merge(items: List[Rows]) -> Rows:
+        if isinstance(items[0], DataFrame):
+            return pd.concat(items, ignore_index=True)
+        return [record for records in items for record in records]
+
+    @staticmethod
+    def _dispatch(pending: List[Tuple[Rows, asyncio.Future]], predictions: np.ndarray) -> None:
+        offset = 0
+        for rows, future in pending:
+            n_rows = len(rows)
+            if not future.done():
+                future.set_result(predictions[offset:offset + n_rows])
+            offset += n_rows
+
+    async def _score_individually(self, pending: List[Tuple[Rows, asyncio.Future]]) -> None:
+        """
+        Isolates a bad request so that it does not fail the other requests of its batch
+        """
+        loop = asyncio.get_running_loop()
+        for rows, future in pending:
+            try:
+                predictions = await loop.run_in_executor(self.executor, self.predict_fn, rows)
+                if not future.done():
+                    future.set_result(predictions)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(CustomException(e, sys))
@@ -0,0 +1,217 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from bson import json_util
+from pandas import DataFrame
+
+from Telecom_churn_prediction.churn_data_access.mongoDB_data_access import DataAccessor
+from Telecom_churn_prediction.constants import schema_file_path, column_required_type_change
+from Telecom_churn_prediction.entity.config_entity import BatchScoringConfig
+from Telecom_churn_prediction.entity.estimator import TelcoChurnModel
+from Telecom_churn_prediction.entity.s3_estimator import TelcoChurnEstimator
+from Telecom_churn_prediction.exception import CustomException
+from Telecom_churn_prediction.logger import logger
+from Telecom_churn_prediction.pipeline.stream_scoring import clean_chunk
+from Telecom_churn_prediction.utils.main_utils import load_object, read_yaml_file, save_object
+
+# Model used by the worker processes. Set in the parent before the pool forks, so all workers
+# share the pages of one loaded model instead of unpickling their own copy
+_worker_model: Optional[TelcoChurnModel] = None
+
+
+def _init_worker(model_file_path: Optional[str]) -> None:
+    global _worker_model
+    if model_file_path is not None:
+        _worker_model = load_object(model_file_path)
+
+
+def _score_partition(features: DataFrame):
+    return _worker_model.predict_output_with_proba(dataframe=features)
+
+
+class BatchScoringPipeline:
+    """
+    This class scores the whole customer collection outside the web app and writes the predictions back
+    to MongoDB. Progress is checkpointed after every written partition, so an interrupted run resumes
+    """
+
+    def __init__(self, batch_scoring_config: BatchScoringConfig = BatchScoringConfig(),
+                 data_accessor: Optional[DataAccessor] = None):
+        """
+        :param batch_scoring_config: Configuration for batch scoring
+        :param data_accessor: Accessor of the customer collection, a new DataAccessor if None
+        """
+        try:
+            self.batch_scoring_config = batch_scoring_config
+            self.data_accessor = data_accessor if data_accessor is not None else DataAccessor()
+            self._schema_config = read_yaml_file(file_path=schema_file_path)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def load_model(self) -> Tuple[TelcoChurnModel, str]:
+        """
+        Loads the model from the local path if configured, else the latest model from s3 bucket
+        """
+        try:
+            local_model_file_path = self.batch_scoring_config.local_model_file_path
+            if local_model_file_path is not None:
+                version = f"local:{os.path.basename(local_model_file_path)}:{int(os.path.getmtime(local_model_file_path))}"
+                return load_object(local_model_file_path), version
+
+            estimator = TelcoChurnEstimator(bucket_name=self.batch_scoring_config.model_bucket_name,
+                                            model_path=self.batch_scoring_config.model_file_path)
+            version = estimator.get_model_version()
+            return estimator.load_model(version=version), version
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def read_checkpoint(self, model_version: str) -> dict:
+        """
+        Returns the checkpoint of an interrupted run with the same model version, else an empty checkpoint.
+        A completed run is not resumed, the next run scores the whole collection again
+        """
+        checkpoint_file_path = self.batch_scoring_config.checkpoint_file_path
+        if not os.path.exists(checkpoint_file_path):
+            return {"last_id": None, "rows_scored": 0}
+
+        with open(checkpoint_file_path) as checkpoint_file:
+            checkpoint = json_util.loads(checkpoint_file.read())
+        if checkpoint.get("model_version") != model_version:
+            logger.info(f"Checkpoint belongs to model version {checkpoint.get('model_version')}, starting over")
+            return {"last_id": None, "rows_scored": 0}
+        if checkpoint.get("completed", False):
+            logger.info(f"Previous run with model version {model_version} completed, starting over")
+            return {"last_id": None, "rows_scored": 0}
+        logger.info(f"Resuming batch scoring after _id {checkpoint['last_id']}")
+        return checkpoint
+
+    def write_checkpoint(self, last_id, rows_scored: int, model_version: str, completed: bool = False) -> None:
+        checkpoint_file_path = self.batch_scoring_config.checkpoint_file_path
+        os.makedirs(os.path.dirname(checkpoint_file_path), exist_ok=True)
+        tmp_file_path = checkpoint_file_path + ".tmp"
+        with open(tmp_file_path, "w") as checkpoint_file:
+            checkpoint_file.write(json_util.dumps({"last_id": last_id, "rows_scored": rows_scored,
+                                                   "model_version": model_version, "completed": completed}))
+        os.replace(tmp_file_path, checkpoint_file_path)
+
+    def write_partition(self, ids: list, valid, future, model_version: str) -> int:
+        """
+        Waits for the scores of one partition and writes them back with unordered bulk writes
+        :return: number of scored rows
+        """
+        config = self.batch_scoring_config
+        if future is None:
+            return 0
+
+        predictions, probabilities = future.result()
+        scored_at = datetime.now(timezone.utc)
+        valid_ids = [document_id for document_id, is_valid in zip(ids, valid) if is_valid]
+        updates = [{
+            config.prediction_field: int(prediction),
+            config.probability_field: float(probability),
+            config.model_version_field: model_version,
+            "scored_at": scored_at,
+        } for prediction, probability in zip(predictions, probabilities)]
+
+        self.data_accessor.bulk_update_by_id(config.collection_name, valid_ids, updates,
+                                             batch_size=config.write_batch_size)
+        return len(valid_ids)
+
+    def run(self) -> dict:
+        """
+        Scores the collection partition by partition in parallel worker processes
+        :return: summary of the run
+        """
+        global _worker_model
+        try:
+            config = self.batch_scoring_config
+            start_time = time.perf_counter()
+            model, model_version = self.load_model()
+            checkpoint = self.read_checkpoint(model_version)
+            last_id, rows_scored = checkpoint["last_id"], checkpoint["rows_scored"]
+            rows_read = skipped_rows = 0
+
+            feature_columns = self._schema_config["num_features"] + self._schema_config["ohe_columns"]
+            numeric_columns = self._schema_config["num_features"] + [column_required_type_change]
+
+            model_file_path = None
+            if "fork" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("fork")
+                _worker_model = model
+            else:
+                context = multiprocessing.get_context("spawn")
+                model_file_path = config.local_model_file_path
+                if model_file_path is None:
+                    model_file_path = os.path.join(tempfile.mkdtemp(), "model.pkl")
+                    save_object(model_file_path, model)
+
+            with ProcessPoolExecutor(max_workers=config.workers, mp_context=context,
+                                     initializer=_init_worker, initargs=(model_file_path,)) as executor:
+                in_flight = deque()
+
+                def drain_one():
+                    nonlocal last_id, rows_scored
+                    ids, valid, future = in_flight.popleft()
+                    rows_scored += self.write_partition(ids, valid, future, model_version)
+                    last_id = ids[-1]
+                    self.write_checkpoint(last_id, rows_scored, model_version)
+
+                for partition in self.data_accessor.iter_collection_partitions(config.collection_name,
+                                                                               config.partition_size,
+                                                                               resume_after_id=last_id):
+                    ids = partition["_id"].tolist()
+                    features = clean_chunk(partition, feature_columns, numeric_columns, self._schema_config)
+                    valid = features.notnull().all(axis=1).to_numpy()
+                    rows_read += len(ids)
+                    skipped_rows += int((~valid).sum())
+
+                    future = executor.submit(_score_partition, features[valid]) if valid.any() else None
+                    in_flight.append((ids, valid, future))
+                    if len(in_flight) >= 2 * config.workers:
+                        drain_one()
+
+                while in_flight:
+                    drain_one()
+
+            self.write_checkpoint(last_id, rows_scored, model_version, completed=True)
+            elapsed = time.perf_counter() - start_time
+            summary = {
+                "model_version": model_version,
+                "rows_read": rows_read,
+                "rows_scored_total": rows_scored,
+                "rows_skipped": skipped_rows,
+                "seconds": round(elapsed, 3),
+                "rows_per_second": round(rows_read / elapsed, 1) if elapsed > 0 else None,
+            }
+            logger.info(f"Batch scoring finished: {summary}")
+            return summary
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+        finally:
+            _worker_model = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score the customer collection and write predictions to MongoDB")
+    parser.add_argument("--workers", type=int, default=BatchScoringConfig.workers)
+    parser.add_argument("--partition-size", type=int, default=BatchScoringConfig.partition_size)
+    parser.add_argument("--model-path", default=None, help="Local model.pkl, latest model from s3 if omitted")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint of a previous run")
+    args = parser.parse_args()
+
+    batch_scoring_config = BatchScoringConfig(workers=args.workers, partition_size=args.partition_size,
+                                              local_model_file_path=args.model_path)
+    if args.restart and os.path.exists(batch_scoring_config.checkpoint_file_path):
+        os.remove(batch_scoring_config.checkpoint_file_path)
+    print(BatchScoringPipeline(batch_scoring_config).run())
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from Telecom_churn_prediction.logger import logger
+
+
+class PredictionCache:
+    """
+    This class is a thread safe LRU cache with TTL for prediction results. Keys are a canonical hash
+    of the input features plus the version of the model which produced the prediction
+    """
+
+    def __init__(self, feature_columns: Iterable[str], numeric_columns: Iterable[str],
+                 max_entries: int = 100000, ttl_seconds: float = 3600):
+        """
+        :param feature_columns: Input features that identify a prediction
+        :param numeric_columns: Features normalised as floats, so "29.85" and 29.85 share a key like they share
+                                the float the model scores
+        :param max_entries: Upper bound on the number of cached predictions
+        :param ttl_seconds: Seconds after which a cached prediction expires
+        """
+        self.feature_columns = list(feature_columns)
+        self.numeric_columns = set(numeric_columns)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _canonical_value(self, column: str, value):
+        if column in self.numeric_columns:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                pass
+        # Categories are kept exactly as scored, "Male " is an unknown category and must not share the key of "Male"
+        return value
+
+    def make_key(self, record: dict, model_version: str) -> str:
+        """
+        Returns the canonical hash of the features of record and model_version. record has to be the cleaned
+        feature dict that is scored
+        """
+        canonical = [self._canonical_value(column, record.get(column)) for column in self.feature_columns]
+        payload = json.dumps([model_version, canonical], separators=(",", ":"), default=repr)
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[object]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: object) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Drops every cached prediction, called when a new model is swapped in
+        """
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+        logger.info("Cleared prediction cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
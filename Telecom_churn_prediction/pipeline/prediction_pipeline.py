@@ -1,15 +1,28 @@
 import os
 import sys
+import threading
 
 import numpy as np
 import pandas as pd
+from Telecom_churn_prediction.constants import (schema_file_path, hot_path_log_sample_rate,
+                                                hot_path_log_max_per_second)
 from Telecom_churn_prediction.entity.config_entity import TelcoChurnaPredictorConfig
-from Telecom_churn_prediction.entity.s3_estimator import TelcoChurnEstimator
+from Telecom_churn_prediction.entity.model_cache import TelcoChurnModelCache
 from Telecom_churn_prediction.exception import CustomException
-from Telecom_churn_prediction.logger import logger
+from Telecom_churn_prediction.logger import logger, get_hot_path_logger
+from Telecom_churn_prediction.metrics import stage_timer
+from Telecom_churn_prediction.pipeline.prediction_cache import PredictionCache
+from Telecom_churn_prediction.pipeline.stream_scoring import score_csv_chunks
+from Telecom_churn_prediction.utils.data_cleaning import (clean_dataframe, clean_record, get_invalid_records,
+                                                          get_numeric_columns)
+from Telecom_churn_prediction.utils.dataframe_io import apply_schema_dtypes
 from Telecom_churn_prediction.utils.main_utils import read_yaml_file
 from pandas import DataFrame
 
+# Messages logged on every prediction request are sampled and rate limited
+hot_path_logger = get_hot_path_logger("prediction", sample_rate=hot_path_log_sample_rate,
+                                      max_per_second=hot_path_log_max_per_second)
+
 
 class TelcoChurnData:
     def __init__(self,
@@ -67,18 +80,31 @@ class TelcoChurnData:
         """
         try:
             
-            telcoChurn_input_dict = self.get_telcoChurn_data_as_dict()
-            return DataFrame(telcoChurn_input_dict)
+            with stage_timer("dataframe_building"):
+                telcoChurn_input_dict = self.get_telcoChurn_data_as_dict()
+                return DataFrame(telcoChurn_input_dict)
         
         except Exception as e:
             raise CustomException(e, sys) from e
 
 
+    def get_telcoChurn_data_as_record(self) -> dict:
+        """
+        This function returns the TelcoChurnData class input as one flat feature dict
+        """
+        try:
+            with stage_timer("input_building"):
+                return {key: value[0] for key, value in self.get_telcoChurn_data_as_dict().items()}
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+
     def get_telcoChurn_data_as_dict(self):
         """
         This function returns a dictionary from TelcoChurnData class input 
         """
-        logger.info("Entered get_TelcoChurn_data_as_dict method as TelcoChurnData class")
+        hot_path_logger.info("Entered get_TelcoChurn_data_as_dict method as TelcoChurnData class")
 
         try:
             input_data = {
@@ -103,9 +129,9 @@ class TelcoChurnData:
                 "TotalCharges": [self.TotalCharges]
             }
 
-            logger.info("Created TelcoChurn data dict")
+            hot_path_logger.info("Created TelcoChurn data dict")
 
-            logger.info("Exited get_TelcoChurn_data_as_dict method as TelcoChurnData class")
+            hot_path_logger.info("Exited get_TelcoChurn_data_as_dict method as TelcoChurnData class")
 
             return input_data
 
@@ -113,31 +139,186 @@ class TelcoChurnData:
             raise CustomException(e, sys) from e
 
 class TelcoChurnClassifier:
+
+    schema_config = None
+    prediction_cache = None
+    shared_state_lock = threading.Lock()
+
     def __init__(self,prediction_pipeline_config: TelcoChurnaPredictorConfig = TelcoChurnaPredictorConfig()) -> None:
         """
         :param prediction_pipeline_config: Configuration for prediction the value
         """
         try:
-            # self.schema_config = read_yaml_file(SCHEMA_FILE_PATH)
             self.prediction_pipeline_config = prediction_pipeline_config
+            self.model_cache = TelcoChurnModelCache.get_instance(
+                bucket_name=self.prediction_pipeline_config.model_bucket_name,
+                model_path=self.prediction_pipeline_config.model_file_path,
+                refresh_interval=self.prediction_pipeline_config.model_refresh_interval,
+                mmap_mode=self.prediction_pipeline_config.model_mmap_mode,
+            )
+            if TelcoChurnClassifier.schema_config is None:
+                self.init_shared_state()
         except Exception as e:
             raise CustomException(e, sys)
 
 
+    def init_shared_state(self) -> None:
+        """
+        Reads the schema and creates the prediction cache once per process
+        """
+        with TelcoChurnClassifier.shared_state_lock:
+            if TelcoChurnClassifier.schema_config is not None:
+                return
+            schema_config = read_yaml_file(schema_file_path)
+            if self.prediction_pipeline_config.prediction_cache_enabled:
+                prediction_cache = PredictionCache(
+                    feature_columns=schema_config["num_features"] + schema_config["ohe_columns"],
+                    numeric_columns=get_numeric_columns(schema_config),
+                    max_entries=self.prediction_pipeline_config.prediction_cache_max_entries,
+                    ttl_seconds=self.prediction_pipeline_config.prediction_cache_ttl_seconds,
+                )
+                # Cached predictions of the previous model are dropped as soon as a new one is swapped in
+                self.model_cache.add_swap_listener(lambda loaded_model: prediction_cache.clear())
+                TelcoChurnClassifier.prediction_cache = prediction_cache
+            TelcoChurnClassifier.schema_config = schema_config
+
+
+    def get_cache_stats(self) -> dict:
+        if self.prediction_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.prediction_cache.stats()}
+
+
+    def get_feature_columns(self) -> list:
+        """
+        Returns the input features of the trained model as listed in schema config
+        """
+        return self.schema_config["num_features"] + self.schema_config["ohe_columns"]
+
+
+    def start_model_watcher(self) -> None:
+        """
+        Loads the model in background and keeps it up to date with the model pushed to s3
+        """
+        self.model_cache.start_watcher()
+
+
+    def stop_model_watcher(self) -> None:
+        self.model_cache.stop_watcher()
+
+
     def predict(self, dataframe) -> str:
         """
         This is the method of USvisaClassifier
         Returns: Prediction in string format
         """
         try:
-            logger.info("Entered predict method of USvisaClassifier class")
-            model = TelcoChurnEstimator(
-                bucket_name=self.prediction_pipeline_config.model_bucket_name,
-                model_path=self.prediction_pipeline_config.model_file_path,
-            )
-            result =  model.predict(dataframe)
+            hot_path_logger.info("Entered predict method of USvisaClassifier class")
+            loaded_model = self.model_cache.get()
+            result = loaded_model.model.predict_output(dataframe=dataframe)
             
             return result
         
         except Exception as e:
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
+
+
+    def clean_records(self, records: list) -> list:
+        """
+        This method applies the shared cleaning rules to raw feature dicts and rejects incomplete ones like predict_batch
+        Returns: Cleaned feature dicts
+        """
+        numeric_columns = get_numeric_columns(self.schema_config)
+        with stage_timer("input_cleaning"):
+            records = [clean_record(record, numeric_columns) for record in records]
+        invalid_rows = get_invalid_records(records, self.get_feature_columns())
+        if invalid_rows:
+            raise ValueError(f"Missing or non numeric values in rows: {invalid_rows[:20]}")
+        return records
+
+
+    def predict_records(self, records: list):
+        """
+        This method scores raw feature dicts through the compiled preprocessor, without pandas
+        Returns: Predictions in input order
+        """
+        try:
+            records = self.clean_records(records)
+            loaded_model = self.model_cache.get()
+            prediction_cache = self.prediction_cache
+            if prediction_cache is None:
+                return loaded_model.model.predict_records(records)
+
+            with stage_timer("cache_lookup"):
+                keys = [prediction_cache.make_key(record, loaded_model.version) for record in records]
+                results = [prediction_cache.get(key) for key in keys]
+            missing = [index for index, result in enumerate(results) if result is None]
+            if missing:
+                predictions = loaded_model.model.predict_records([records[index] for index in missing])
+                for index, prediction in zip(missing, predictions):
+                    results[index] = prediction
+                    prediction_cache.put(keys[index], prediction)
+            return np.array(results)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+    def predict_batch(self, dataframe: DataFrame) -> DataFrame:
+        """
+        This method scores all rows of the dataframe with one transform and one model call
+        Returns: DataFrame with churn_prediction and churn_probability for every input row
+        """
+        try:
+            logger.info(f"Entered predict_batch method of TelcoChurnClassifier class with {len(dataframe)} rows")
+            feature_columns = self.get_feature_columns()
+            missing_columns = [column for column in feature_columns if column not in dataframe.columns]
+            if missing_columns:
+                raise ValueError(f"Missing feature columns: {missing_columns}")
+
+            features = apply_schema_dtypes(clean_dataframe(dataframe[feature_columns], get_numeric_columns(self.schema_config)),
+                                           self.schema_config)
+
+            invalid_rows = features.index[features.isnull().any(axis=1)].tolist()
+            if invalid_rows:
+                raise ValueError(f"Missing, non numeric or unknown category values in rows: {invalid_rows[:20]}")
+
+            loaded_model = self.model_cache.get()
+            predictions, probabilities = loaded_model.model.predict_output_with_proba(dataframe=features)
+
+            result = DataFrame({
+                "churn_prediction": predictions.astype(int),
+                "churn_probability": probabilities,
+            }, index=dataframe.index)
+            logger.info("Exited predict_batch method of TelcoChurnClassifier class")
+            return result
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+
+    def score_csv_stream(self, file_obj, output_format: str = "csv"):
+        """
+        This method scores a CSV file object chunk by chunk with one model version
+        Returns: model version and an iterator of formatted prediction chunks
+        """
+        try:
+            header = pd.read_csv(file_obj, nrows=0).columns
+            file_obj.seek(0)
+            missing_columns = [column for column in self.get_feature_columns() if column not in header]
+            if missing_columns:
+                raise ValueError(f"Missing feature columns: {missing_columns}")
+
+            loaded_model = self.model_cache.get()
+            chunks = score_csv_chunks(model=loaded_model.model,
+                                      file_obj=file_obj,
+                                      feature_columns=self.get_feature_columns(),
+                                      numeric_columns=get_numeric_columns(self.schema_config),
+                                      chunk_size=self.prediction_pipeline_config.stream_chunk_size,
+                                      output_format=output_format,
+                                      schema_config=self.schema_config)
+            return loaded_model.version, chunks
+
+        except Exception as e:
+            raise CustomException(e, sys)
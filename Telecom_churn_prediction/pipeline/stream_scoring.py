@@ -0,0 +1,73 @@
+import json
+import sys
+from typing import IO, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from Telecom_churn_prediction.entity.estimator import TelcoChurnModel
+from Telecom_churn_prediction.exception import CustomException
+from Telecom_churn_prediction.logger import logger
+from Telecom_churn_prediction.utils.data_cleaning import clean_dataframe
+from Telecom_churn_prediction.utils.dataframe_io import apply_schema_dtypes
+
+output_id_column = "customerID"
+
+
+def clean_chunk(chunk: pd.DataFrame, feature_columns: List[str], numeric_columns: List[str],
+                schema_config: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Applies the DataTransformation cleaning to one chunk: null like tokens become NaN and
+    numeric features are converted to float, or to the compact schema dtypes if schema_config is given.
+    Rows are kept so that the output lines up with the input
+    """
+    features = clean_dataframe(chunk[feature_columns], numeric_columns)
+    return features if schema_config is None else apply_schema_dtypes(features, schema_config)
+
+
+def format_chunk(scored: pd.DataFrame, output_format: str, write_header: bool) -> str:
+    if output_format == "ndjson":
+        records = scored.astype(object).where(scored.notnull(), None).to_dict(orient="records")
+        return "".join(json.dumps(record) + "\n" for record in records)
+    return scored.to_csv(index=False, header=write_header)
+
+
+def score_csv_chunks(model: TelcoChurnModel, file_obj: IO, feature_columns: List[str], numeric_columns: List[str],
+                     chunk_size: int, output_format: str = "csv", schema_config: Optional[dict] = None) -> Iterator[str]:
+    """
+    Reads a CSV file object chunk by chunk, scores every chunk with model and yields the formatted
+    predictions, so neither the input nor the output is ever held in memory as a whole.
+    Rows with missing or invalid features are emitted with empty predictions
+    """
+    try:
+        if output_format not in ("csv", "ndjson"):
+            raise ValueError(f"Unsupported output format: {output_format}")
+
+        rows_scored = 0
+        for chunk_number, chunk in enumerate(pd.read_csv(file_obj, chunksize=chunk_size, dtype=str,
+                                                         keep_default_na=False)):
+            missing_columns = [column for column in feature_columns if column not in chunk.columns]
+            if missing_columns:
+                raise ValueError(f"Missing feature columns: {missing_columns}")
+
+            features = clean_chunk(chunk, feature_columns, numeric_columns, schema_config)
+            valid = features.notnull().all(axis=1).to_numpy()
+
+            scored = pd.DataFrame(index=chunk.index)
+            if output_id_column in chunk.columns:
+                scored[output_id_column] = chunk[output_id_column]
+            scored["churn_prediction"] = pd.Series(pd.NA, index=chunk.index, dtype="Int64")
+            scored["churn_probability"] = np.nan
+
+            if valid.any():
+                predictions, probabilities = model.predict_output_with_proba(dataframe=features[valid])
+                scored.loc[valid, "churn_prediction"] = predictions.astype(int)
+                scored.loc[valid, "churn_probability"] = probabilities
+
+            rows_scored += len(chunk)
+            yield format_chunk(scored, output_format, write_header=chunk_number == 0)
+
+        logger.info(f"Streamed predictions for {rows_scored} rows")
+
+    except Exception as e:
+        raise CustomException(e, sys) from e
@@ -0,0 +1,154 @@
+import multiprocessing
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+from Telecom_churn_prediction.exception import CustomException
+from Telecom_churn_prediction.logger import logger
+
+
+def run_training_pipeline(error_connection) -> None:
+    """
+    Entry point of the training process. TrainPipeline is imported here so that the serving
+    process never loads the training stack
+    """
+    try:
+        from Telecom_churn_prediction.pipeline.training_pipeline import TrainPipeline
+
+        train_pipeline = TrainPipeline()
+        train_pipeline.run_pipeline()
+    except Exception as e:
+        error_connection.send(str(e))
+        sys.exit(1)
+    finally:
+        error_connection.close()
+
+
+@dataclass
+class TrainingJob:
+    job_id: str
+    status: str = "pending"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class TrainingJobManager:
+    """
+    This class runs the training pipeline as a background job in a separate process,
+    so that training never blocks the event loop of the web app and can be cancelled
+    """
+
+    finished_statuses = ("succeeded", "failed", "cancelled")
+
+    def __init__(self, max_finished_jobs: int = 50, target: Callable = run_training_pipeline):
+        """
+        :param max_finished_jobs: Number of finished jobs kept for the status endpoint
+        :param target: Module level function run in the job process, gets the sending end of the error pipe
+        """
+        self.max_finished_jobs = max_finished_jobs
+        self.target = target
+        self.jobs: Dict[str, TrainingJob] = {}
+        self._processes: Dict[str, multiprocessing.Process] = {}
+        self._lock = threading.Lock()
+        self._context = multiprocessing.get_context("spawn")
+
+    def get_active_job(self) -> Optional[TrainingJob]:
+        for job in self.jobs.values():
+            if job.status not in self.finished_statuses:
+                return job
+        return None
+
+    def submit(self) -> Tuple[TrainingJob, bool]:
+        """
+        Starts a training job unless one is already pending or running
+        :return: the job and True if a new job was started, False if the running job was returned
+        """
+        try:
+            with self._lock:
+                active_job = self.get_active_job()
+                if active_job is not None:
+                    logger.info(f"Training job {active_job.job_id} already {active_job.status}, not starting another")
+                    return active_job, False
+
+                job = TrainingJob(job_id=uuid.uuid4().hex)
+                receiver, sender = self._context.Pipe(duplex=False)
+                process = self._context.Process(target=self.target, args=(sender,),
+                                                name=f"training-job-{job.job_id}")
+                process.start()
+                sender.close()
+
+                job.status = "running"
+                job.started_at = time.time()
+                self.jobs[job.job_id] = job
+                self._processes[job.job_id] = process
+                self._prune_finished_jobs()
+
+            threading.Thread(target=self._monitor, args=(job, process, receiver),
+                             name=f"training-job-monitor-{job.job_id}", daemon=True).start()
+            logger.info(f"Started training job {job.job_id} in process {process.pid}")
+            return job, True
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def _monitor(self, job: TrainingJob, process: multiprocessing.Process, receiver) -> None:
+        process.join()
+        # The job process always closes its end of the pipe, poll is then True without a message
+        try:
+            error = receiver.recv() if receiver.poll() else None
+        except EOFError:
+            error = None
+        receiver.close()
+        with self._lock:
+            job.finished_at = time.time()
+            if job.status == "cancelled":
+                pass
+            elif process.exitcode == 0:
+                job.status = "succeeded"
+            else:
+                job.status = "failed"
+                job.error = error or f"Training process exited with code {process.exitcode}"
+            self._processes.pop(job.job_id, None)
+        logger.info(f"Training job {job.job_id} finished with status {job.status}")
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[TrainingJob]:
+        """
+        Terminates the process of a running job
+        """
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status in self.finished_statuses:
+                return job
+            job.status = "cancelled"
+            process = self._processes.get(job_id)
+        if process is not None and process.is_alive():
+            process.terminate()
+        logger.info(f"Cancelled training job {job_id}")
+        return job
+
+    def shutdown(self) -> None:
+        for job_id in list(self._processes):
+            self.cancel(job_id)
+
+    def _prune_finished_jobs(self) -> None:
+        finished = [job for job in self.jobs.values() if job.status in self.finished_statuses]
+        for job in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[job.job_id]
@@ -0,0 +1,106 @@
+import math
+import sys
+from typing import List
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+
+from Telecom_churn_prediction.constants import column_required_type_change
+from Telecom_churn_prediction.exception import CustomException
+
+# Compared after strip().lower(), so blank strings of any length match ""
+null_tokens = frozenset(["", "na", "null", "none"])
+
+
+def get_numeric_columns(schema_config: dict) -> List[str]:
+    """
+    Returns the columns that have to be numbers: num_features of schema config and TotalCharges,
+    which the raw csv stores as text
+    """
+    return schema_config["num_features"] + [column_required_type_change]
+
+
+def get_null_token_mask(column: Series) -> np.ndarray:
+    """
+    Returns a boolean array, True where column holds a blank or null like string. The column is factorized
+    first, so strip().lower() runs once per distinct value instead of once per cell
+    """
+    codes, uniques = pd.factorize(column)
+    is_null_token = np.fromiter((isinstance(value, str) and value.strip().lower() in null_tokens
+                                 for value in uniques), dtype=bool, count=len(uniques))
+    # Missing values get the code -1, which picks the appended False
+    return np.append(is_null_token, False)[codes]
+
+
+def clean_null_tokens(df: DataFrame) -> DataFrame:
+    """
+    replace blank and null like string values of a pandas DataFrame with NaN, one text column at a time
+    df: pandas DataFrame
+    """
+    try:
+        df = df.copy()
+        for column in df.select_dtypes(include=["object", "string"]).columns:
+            mask = get_null_token_mask(df[column])
+            if mask.any():
+                df[column] = df[column].mask(mask)
+        return df
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def clean_dataframe(df: DataFrame, numeric_columns: List[str]) -> DataFrame:
+    """
+    Description :   The cleaning shared by DataTransformation, ModelEvaluation and serving: null like tokens
+                    become NaN and numeric_columns are converted to float, values that are no number become NaN.
+                    Rows are kept, callers drop or reject the incomplete ones
+
+    Output      :   Cleaned copy of df
+    On Failure  :   Write an exception log and then raise an exception
+    """
+    try:
+        df = clean_null_tokens(df)
+        for column in numeric_columns:
+            df[column] = pd.to_numeric(df[column], errors="coerce")
+        return df
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def is_null_value(value) -> bool:
+    """
+    Returns True for None, NaN and blank or null like strings, the values clean_dataframe turns into NaN
+    """
+    if isinstance(value, str):
+        return value.strip().lower() in null_tokens
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def clean_record(record: dict, numeric_columns: List[str]) -> dict:
+    """
+    Description :   The record level equivalent of clean_dataframe for the serving paths that score feature dicts
+                    without pandas: null like tokens become NaN and numeric_columns are converted to float,
+                    values that are no number become NaN
+
+    Output      :   Cleaned copy of record
+    """
+    cleaned = {column: np.nan if is_null_value(value) else value for column, value in record.items()}
+    for column in numeric_columns:
+        value = cleaned.get(column)
+        # float() also accepts digit separators like "1_000", pd.to_numeric does not
+        if isinstance(value, str) and "_" in value:
+            cleaned[column] = np.nan
+            continue
+        try:
+            cleaned[column] = float(value)
+        except (TypeError, ValueError):
+            cleaned[column] = np.nan
+    return cleaned
+
+
+def get_invalid_records(records: List[dict], feature_columns: List[str]) -> List[int]:
+    """
+    Returns the positions of the cleaned records with a missing feature, the rows clean_dataframe callers reject
+    """
+    return [position for position, record in enumerate(records)
+            if any(is_null_value(record.get(column)) for column in feature_columns)]
@@ -0,0 +1,136 @@
+import os
+import sys
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+
+from Telecom_churn_prediction.exception import CustomException
+from Telecom_churn_prediction.logger import logger
+from Telecom_churn_prediction.utils.data_cleaning import get_numeric_columns
+
+dataframe_file_formats = ("parquet", "csv")
+
+
+def get_file_format(file_path: str) -> str:
+    file_format = os.path.splitext(file_path)[1].lstrip(".").lower()
+    if file_format not in dataframe_file_formats:
+        raise ValueError(f"Unsupported file format: {file_path}, expected one of {dataframe_file_formats}")
+    return file_format
+
+
+def get_compact_dtype(values: Series, dtype: Optional[str]) -> np.dtype:
+    """
+    Returns dtype if every value of values fits it. Integer columns with missing values fall back to float32
+    and integers out of the range of dtype to int64
+    """
+    if dtype is None:
+        return values.dtype
+    dtype = np.dtype(dtype)
+    if dtype.kind in "iu":
+        if values.isnull().any():
+            return np.dtype("float32")
+        if values.min() < np.iinfo(dtype).min or values.max() > np.iinfo(dtype).max:
+            logger.info(f"{values.name} does not fit {dtype}, keeping int64")
+            return np.dtype("int64")
+    return dtype
+
+
+def apply_schema_dtypes(df: DataFrame, schema_config: dict) -> DataFrame:
+    """
+    Description :   Gives df the compact dtypes of schema config. Numeric columns, TotalCharges included, are
+                    converted with pd.to_numeric and stored with their compact_dtypes entry (int8, int16, float32),
+                    values that are no number become NaN. Columns listed under categories become pandas category
+                    with that fixed category list, values outside of it become NaN
+
+    Output      :   df with the schema dtypes, df itself is not modified
+    """
+    df = df.copy(deep=False)
+    compact_dtypes = schema_config.get("compact_dtypes", {})
+    for column in get_numeric_columns(schema_config):
+        if column in df.columns:
+            values = pd.to_numeric(df[column], errors="coerce")
+            df[column] = values.astype(get_compact_dtype(values, compact_dtypes.get(column)))
+    for column, categories in schema_config.get("categories", {}).items():
+        if column in df.columns:
+            df[column] = df[column].astype(pd.CategoricalDtype(categories))
+    return df
+
+
+def get_csv_dtypes(schema_config: dict) -> dict:
+    """
+    Returns the category dtypes read_csv can parse straight into codes, numeric columns are converted after parsing
+    because of the blanks in TotalCharges
+    """
+    return {column: pd.CategoricalDtype(categories) for column, categories in schema_config.get("categories", {}).items()}
+
+
+def write_dataframe(df: DataFrame, file_path: str, schema_config: Optional[dict] = None) -> None:
+    """
+    Writes df as parquet or csv, chosen by the extension of file_path. With schema_config the schema dtypes
+    are applied first, parquet then keeps them for every stage that reads the file
+    file_path: str location of file to write
+    """
+    logger.info("Entered the write_dataframe method of utils")
+
+    try:
+        if schema_config is not None:
+            df = apply_schema_dtypes(df, schema_config)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        if get_file_format(file_path) == "parquet":
+            df.to_parquet(file_path, index=False)
+        else:
+            df.to_csv(file_path, index=False, header=True)
+
+        logger.info("Exited the write_dataframe method of utils")
+
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def read_dataframe(file_path: str, columns: Optional[List[str]] = None, encoding: Optional[str] = None,
+                   schema_config: Optional[dict] = None) -> DataFrame:
+    """
+    Reads a parquet or csv file written by write_dataframe
+    file_path: str location of file to read
+    columns: only these columns are read, from a parquet file only their column chunks are loaded
+    encoding: encoding of a csv file
+    schema_config: if given, the columns get the compact schema dtypes
+    """
+    try:
+        if get_file_format(file_path) == "parquet":
+            df = pd.read_parquet(file_path, columns=columns)
+        else:
+            # usecols keeps the column order of the file
+            df = pd.read_csv(file_path, usecols=columns, encoding=encoding,
+                             dtype=None if schema_config is None else get_csv_dtypes(schema_config))
+            df = df if columns is None else df[columns]
+        return df if schema_config is None else apply_schema_dtypes(df, schema_config)
+
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def iter_dataframe_chunks(file_path: str, chunk_size: int, columns: Optional[List[str]] = None,
+                          encoding: Optional[str] = None, schema_config: Optional[dict] = None) -> Iterator[DataFrame]:
+    """
+    Yields a parquet or csv file as dataframes of at most chunk_size rows, so the file is never held in memory as a whole.
+    With schema_config every chunk gets the compact schema dtypes
+    """
+    try:
+        if get_file_format(file_path) == "parquet":
+            # pyarrow comes with the parquet support of pandas
+            import pyarrow.parquet as pq
+
+            chunks = (batch.to_pandas() for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_size,
+                                                                                             columns=columns))
+        else:
+            chunks = (chunk if columns is None else chunk[columns]
+                      for chunk in pd.read_csv(file_path, usecols=columns, encoding=encoding, chunksize=chunk_size,
+                                               dtype=None if schema_config is None else get_csv_dtypes(schema_config)))
+        for chunk in chunks:
+            yield chunk if schema_config is None else apply_schema_dtypes(chunk, schema_config)
+
+    except Exception as e:
+        raise CustomException(e, sys) from e
@@ -1,4 +1,5 @@
 import os
+import pickle
 import sys
 import numpy as np
 import dill
@@ -82,6 +83,62 @@ def load_numpy_array_data(file_path: str) -> np.array:
 
 
 
+def save_feature_data(file_path: str, features) -> None:
+    """
+    Save transformed features, a scipy sparse matrix as .npz and a dense array as .npy
+    file_path: str location of file to save, its extension has to match the kind of features
+    """
+    try:
+        # scipy ships with scikit-learn, imported here to keep it off the import path of the web app
+        from scipy import sparse
+
+        if sparse.issparse(features):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            sparse.save_npz(file_path, features.tocsr(), compressed=False)
+        else:
+            save_numpy_array_data(file_path, array=features)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def load_feature_data(file_path: str):
+    """
+    load transformed features saved by save_feature_data
+    return: CSR matrix for a .npz file, np.array otherwise
+    """
+    try:
+        if file_path.endswith(".npz"):
+            from scipy import sparse
+
+            return sparse.load_npz(file_path).tocsr()
+        return load_numpy_array_data(file_path)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def get_target_file_path(feature_file_path: str) -> str:
+    """
+    Returns where the labels of feature_file_path are saved, e.g. train_target.npy next to train.npz
+    """
+    return os.path.splitext(feature_file_path)[0] + "_target.npy"
+
+
+def load_transformed_data(feature_file_path: str) -> tuple:
+    """
+    load the features saved at feature_file_path and their labels
+    return: features and np.array labels
+    """
+    return load_feature_data(feature_file_path), load_numpy_array_data(get_target_file_path(feature_file_path))
+
+
+def densify(features):
+    """
+    Returns features as a dense array, first step of the models marked dense_input in model.yaml
+    """
+    return features.toarray() if hasattr(features, "toarray") else features
+
+
+
 
 def save_object(file_path: str, obj: object) -> None:
     logger.info("Entered the save_object method of utils")
@@ -97,6 +154,101 @@ def save_object(file_path: str, obj: object) -> None:
         raise CustomException(e, sys) from e
 
 
+def save_mmap_object(file_path: str, obj: object) -> None:
+    """
+    Saves obj with joblib, uncompressed, so that the NumPy arrays inside it can be memory mapped on load.
+    The file is written next to file_path and renamed, so concurrent readers never see a partial file
+    """
+    logger.info("Entered the save_mmap_object method of utils")
+
+    try:
+        # joblib ships with scikit-learn, imported here to keep it off the import path of the web app
+        import joblib
+
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        tmp_file_path = f"{file_path}.{os.getpid()}.part"
+        try:
+            joblib.dump(obj, tmp_file_path, compress=0)
+            os.replace(tmp_file_path, file_path)
+        finally:
+            if os.path.exists(tmp_file_path):
+                os.remove(tmp_file_path)
+
+        logger.info("Exited the save_mmap_object method of utils")
+
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def get_mmap_artifact_path(model_file_path: str) -> str:
+    """
+    Returns where the memory mappable serving artifact of a model pickle is saved, e.g. model.joblib next to
+    model.pkl. Also gives its s3 key, which must not start with the model key
+    """
+    return os.path.splitext(model_file_path)[0] + ".joblib"
+
+
+class _SharedArrayCounter(pickle.Pickler):
+    """
+    Pickles an object into a byte counter, leaving out the memory mapped arrays and counting their size instead
+    """
+
+    def __init__(self):
+        self.private_bytes = 0
+        self.shared_bytes = 0
+        self._seen = set()
+        super().__init__(self, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def write(self, data) -> None:
+        self.private_bytes += len(data)
+
+    def persistent_id(self, obj):
+        if isinstance(obj, np.memmap):
+            if id(obj) not in self._seen:
+                self._seen.add(id(obj))
+                self.shared_bytes += obj.nbytes
+            return id(obj)
+        return None
+
+
+def get_mmap_sharing_report(obj: object) -> dict:
+    """
+    Measures how much of an object loaded by load_mmap_object is actually shared between processes. Only arrays
+    that are still memory mapped after loading count as shared. Arrays copied on unpickling, like the node
+    arrays of sklearn trees, and boosters pickled as bytes count as private, every worker holds its own copy
+    return: shared and private MB and the shared fraction
+    """
+    try:
+        counter = _SharedArrayCounter()
+        counter.dump(obj)
+        total_bytes = counter.shared_bytes + counter.private_bytes
+        return {
+            "shared_mb": round(counter.shared_bytes / 2 ** 20, 2),
+            "private_mb": round(counter.private_bytes / 2 ** 20, 2),
+            "shared_fraction": round(counter.shared_bytes / total_bytes, 3) if total_bytes else 0.0,
+        }
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def load_mmap_object(file_path: str, mmap_mode: str = "r") -> object:
+    """
+    Loads an object saved by save_mmap_object. With mmap_mode="r" the NumPy arrays are read-only views of
+    the file, so processes loading the same file share its pages through the OS page cache
+    """
+    logger.info("Entered the load_mmap_object method of utils")
+
+    try:
+        import joblib
+
+        obj = joblib.load(file_path, mmap_mode=mmap_mode)
+        logger.info("Exited the load_mmap_object method of utils")
+        return obj
+
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
 
 def drop_columns(df: DataFrame, cols: list)-> DataFrame:
 
@@ -127,9 +279,18 @@ def load_models_from_yaml(yaml_path) -> dict:
         module = importlib.import_module(info["module"])
         cls = getattr(module, info["class"])
         model_instance = cls(**{k: v for k, v in info.get("params", {}).items() if not isinstance(v, list)})
+        params = info.get("params", {})
+        if info.get("dense_input", False):
+            # Only these models get the sparse one hot features densified, their params live under the model step
+            from sklearn.pipeline import Pipeline
+            from sklearn.preprocessing import FunctionTransformer
+
+            model_instance = Pipeline([("densify", FunctionTransformer(densify)), ("model", model_instance)])
+            params = {f"model__{k}": v for k, v in params.items()}
         models[name] = {
             "model": model_instance,
-            "params": info.get("params", {})
+            "params": params,
+            "search": info.get("search", {})
         }
     return models
 
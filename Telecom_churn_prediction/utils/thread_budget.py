@@ -0,0 +1,50 @@
+import os
+from contextlib import contextmanager
+from typing import Tuple
+
+from Telecom_churn_prediction.logger import logger
+
+# Constructor parameters through which the estimators of model.yaml size their own thread pools
+estimator_thread_params = ("n_jobs", "thread_count", "nthread")
+
+
+def split_cpu_budget(cpu_budget: int, inner_threads: int) -> Tuple[int, int]:
+    """
+    Splits cpu_budget cores between outer joblib workers and the threads every worker may start
+    :param cpu_budget: Cores training may use, all cores of the machine if 0 or negative
+    :param inner_threads: Threads of every estimator, BLAS and OpenMP pool inside one worker
+    :return: number of outer workers and inner threads, whose product never exceeds the budget
+    """
+    if cpu_budget <= 0:
+        cpu_budget = os.cpu_count() or 1
+    inner_threads = max(1, min(inner_threads, cpu_budget))
+    return max(1, cpu_budget // inner_threads), inner_threads
+
+
+def set_estimator_threads(model, n_threads: int):
+    """
+    Sets every thread count parameter model exposes (n_jobs for sklearn, XGBoost and LightGBM,
+    thread_count for CatBoost) to n_threads, also inside the Pipeline of a dense_input model
+    """
+    params = model.get_params(deep=True)
+    thread_params = {name: n_threads for name in params if name.rsplit("__", 1)[-1] in estimator_thread_params}
+    if thread_params:
+        model.set_params(**thread_params)
+    return model
+
+
+@contextmanager
+def thread_budget(cpu_budget: int, inner_threads: int):
+    """
+    Caps the BLAS and OpenMP pools of this process at cpu_budget threads and makes joblib start its loky workers
+    with inner_threads threads each, so outer parallelism times inner threads stays within the budget
+    """
+    # Imported here, both are only needed by training
+    from joblib import parallel_backend
+    from threadpoolctl import threadpool_limits
+
+    outer_jobs, inner_threads = split_cpu_budget(cpu_budget, inner_threads)
+    logger.info(f"Thread budget: {outer_jobs} workers x {inner_threads} threads")
+    with threadpool_limits(limits=outer_jobs * inner_threads), \
+            parallel_backend("loky", inner_max_num_threads=inner_threads):
+        yield outer_jobs, inner_threads
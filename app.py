@@ -1,15 +1,29 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import HTMLResponse
 from uvicorn import run as app_run
 from typing import Optional
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+import json
+import tempfile
+import time
+
+import pandas as pd
 
 from Telecom_churn_prediction.constants import APP_HOST, APP_PORT
-from Telecom_churn_prediction.pipeline.prediction_pipeline import TelcoChurnData, TelcoChurnClassifier
-from Telecom_churn_prediction.pipeline.training_pipeline import TrainPipeline
+from Telecom_churn_prediction.entity.config_entity import TelcoChurnaPredictorConfig
+from Telecom_churn_prediction.logger import logger
+from Telecom_churn_prediction.metrics import (error_count, registry, request_count, request_latency,
+                                              requests_in_flight, stage_timer)
+from Telecom_churn_prediction.pipeline.batch_scheduler import MicroBatchScheduler
+from Telecom_churn_prediction.pipeline.prediction_pipeline import TelcoChurnData, TelcoChurnClassifier, hot_path_logger
+from Telecom_churn_prediction.pipeline.training_jobs import TrainingJobManager
 
 app = FastAPI()
 
@@ -28,6 +42,88 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+predictor_config = TelcoChurnaPredictorConfig()
+
+# Blocking model calls run on a bounded pool so they never stall the event loop
+inference_executor = ThreadPoolExecutor(max_workers=predictor_config.inference_max_workers,
+                                        thread_name_prefix="inference")
+
+# Concurrent single-row predictions are scored together in micro batches
+prediction_scheduler = MicroBatchScheduler(
+    predict_fn=lambda records: TelcoChurnClassifier().predict_records(records),
+    max_batch_size=predictor_config.micro_batch_max_size,
+    max_wait_ms=predictor_config.micro_batch_max_wait_ms,
+    executor=inference_executor,
+)
+
+# Training runs as a background job in its own process
+training_jobs = TrainingJobManager()
+
+
+def prediction_cache_metrics():
+    prediction_cache = TelcoChurnClassifier.prediction_cache
+    if prediction_cache is None:
+        return
+    stats = prediction_cache.stats()
+    for name in ("hits", "misses", "evictions", "expirations", "invalidations"):
+        yield f"telco_churn_prediction_cache_{name}_total", "counter", f"Prediction cache {name}", stats[name]
+    yield "telco_churn_prediction_cache_entries", "gauge", "Predictions currently cached", stats["entries"]
+
+
+registry.register_collector(prediction_cache_metrics)
+
+# Count and time every request, labelled by route template so path parameters do not explode the label set
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    requests_in_flight.inc()
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        if status >= 500:
+            error_count.inc(endpoint=endpoint)
+        request_latency.observe(time.perf_counter() - start_time, endpoint=endpoint)
+        request_count.inc(endpoint=endpoint, method=request.method, status=status)
+        requests_in_flight.dec()
+
+# Load the model once per process and keep it in sync with the model registry
+@app.on_event("startup")
+def start_model_watcher():
+    try:
+        TelcoChurnClassifier().start_model_watcher()
+    except Exception as e:
+        logger.info(f"Model watcher not started: {e}")
+
+
+@app.on_event("startup")
+async def start_prediction_scheduler():
+    if predictor_config.micro_batch_enabled:
+        prediction_scheduler.start()
+
+
+@app.on_event("shutdown")
+def stop_model_watcher():
+    try:
+        TelcoChurnClassifier().stop_model_watcher()
+    except Exception as e:
+        logger.info(f"Model watcher not stopped: {e}")
+
+
+@app.on_event("shutdown")
+async def stop_prediction_scheduler():
+    await prediction_scheduler.stop()
+    inference_executor.shutdown(wait=False)
+
+
+@app.on_event("shutdown")
+def stop_training_jobs():
+    training_jobs.shutdown()
+
 # Helper class to extract form data
 class DataForm:
     def __init__(self, request: Request):
@@ -85,18 +181,34 @@ async def index(request: Request):
 @app.get("/train", tags=["Train"])
 async def trainRouteClient():
     try:
-        train_pipeline = TrainPipeline()
-        train_pipeline.run_pipeline()
-        return Response("Training successful !!")
+        job, started = training_jobs.submit()
+        return JSONResponse({**job.to_dict(), "deduplicated": not started}, status_code=202)
     except Exception as e:
-        return Response(f"Error Occurred! {e}")
+        return JSONResponse({"error": f"Error Occurred! {e}"}, status_code=500)
+
+# Status of a training job
+@app.get("/train/{job_id}", tags=["Train"])
+async def trainStatusRouteClient(job_id: str):
+    job = training_jobs.get(job_id)
+    if job is None:
+        return JSONResponse({"error": f"Unknown training job {job_id}"}, status_code=404)
+    return JSONResponse(job.to_dict())
+
+# Cancel a running training job
+@app.delete("/train/{job_id}", tags=["Train"])
+async def trainCancelRouteClient(job_id: str):
+    job = training_jobs.cancel(job_id)
+    if job is None:
+        return JSONResponse({"error": f"Unknown training job {job_id}"}, status_code=404)
+    return JSONResponse(job.to_dict())
 
 # Handle form submission and return prediction
 @app.post("/", tags=["Predict"])
 async def predictRouteClient(request: Request):
     try:
         form = DataForm(request)
-        await form.get_telco_data()
+        with stage_timer("form_parsing"):
+            await form.get_telco_data()
 
         telco_data = TelcoChurnData(
             gender=form.gender,
@@ -120,10 +232,16 @@ async def predictRouteClient(request: Request):
             TotalCharges=form.TotalCharges
         )
 
-        telco_df = telco_data.get_telco_churn_input_data_frame()
+        telco_record = telco_data.get_telcoChurn_data_as_record()
 
-        model_predictor = TelcoChurnClassifier()
-        prediction = model_predictor.predict(dataframe=telco_df)[0]
+        if predictor_config.micro_batch_enabled:
+            with stage_timer("scheduling_and_scoring"):
+                prediction = (await prediction_scheduler.submit([telco_record]))[0]
+        else:
+            model_predictor = TelcoChurnClassifier()
+            loop = asyncio.get_running_loop()
+            prediction = (await loop.run_in_executor(inference_executor, model_predictor.predict_records,
+                                                     [telco_record]))[0]
 
         status = "Customer will Churn" if prediction == 1 else "Customer will Stay"
 
@@ -133,11 +251,113 @@ async def predictRouteClient(request: Request):
         )
 
     except Exception as e:
+        error_count.inc(endpoint="/")
         return templates.TemplateResponse(
             "telco_churn.html",
             {"request": request, "context": f"Error: {e}"},
         )
 
+def score_batch(body: bytes, content_type: str):
+    """
+    Parses a JSON array or CSV body and scores it, runs on the inference pool
+    """
+    if "csv" in content_type:
+        dataframe = pd.read_csv(io.BytesIO(body))
+    else:
+        records = json.loads(body)
+        if not isinstance(records, list):
+            raise ValueError("Expected a JSON array of customer records")
+        dataframe = pd.DataFrame.from_records(records)
+
+    start_time = time.perf_counter()
+    model_predictor = TelcoChurnClassifier()
+    result = model_predictor.predict_batch(dataframe=dataframe)
+    elapsed = time.perf_counter() - start_time
+    return dataframe, result, elapsed
+
+# Score a whole batch of customers sent as a JSON array or a CSV body
+@app.post("/predict/batch", tags=["Predict"])
+async def predictBatchRouteClient(request: Request):
+    try:
+        body = await request.body()
+        content_type = request.headers.get("content-type", "")
+        loop = asyncio.get_running_loop()
+        dataframe, result, elapsed = await loop.run_in_executor(inference_executor, score_batch, body, content_type)
+
+        rows = len(result)
+        rows_per_second = rows / elapsed if elapsed > 0 else float(rows)
+        hot_path_logger.info(f"Scored batch of {rows} rows in {elapsed:.3f}s ({rows_per_second:.0f} rows/s)")
+
+        predictions = {
+            "churn_prediction": result["churn_prediction"].tolist(),
+            "churn_probability": result["churn_probability"].round(6).tolist(),
+        }
+        if "customerID" in dataframe.columns:
+            predictions["customerID"] = dataframe["customerID"].astype(str).tolist()
+
+        return JSONResponse({
+            "rows": rows,
+            "scoring_seconds": round(elapsed, 6),
+            "rows_per_second": round(rows_per_second, 1),
+            "predictions": predictions,
+        })
+
+    except Exception as e:
+        error_count.inc(endpoint="/predict/batch")
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+async def spool_request_body(request: Request):
+    """
+    Copies the request body to a temporary file on disk block by block, so a large upload is never held in memory
+    """
+    # Disk writes run in the thread pool, so a large upload does not stall the other requests
+    spool = await run_in_threadpool(tempfile.TemporaryFile, mode="w+b")
+    async for block in request.stream():
+        await run_in_threadpool(spool.write, block)
+    await run_in_threadpool(spool.seek, 0)
+    return spool
+
+
+def close_after(chunks, file_obj):
+    try:
+        yield from chunks
+    finally:
+        file_obj.close()
+
+# Score a large CSV upload chunk by chunk and stream the predictions back as CSV or NDJSON
+@app.post("/predict/stream", tags=["Predict"])
+async def predictStreamRouteClient(request: Request, output_format: str = "csv"):
+    spool = None
+    try:
+        spool = await spool_request_body(request)
+        model_predictor = TelcoChurnClassifier()
+        loop = asyncio.get_running_loop()
+        model_version, chunks = await loop.run_in_executor(inference_executor, model_predictor.score_csv_stream,
+                                                           spool, output_format)
+        media_type = "application/x-ndjson" if output_format == "ndjson" else "text/csv"
+        # Starlette iterates a sync generator in its thread pool, so scoring stays off the event loop
+        return StreamingResponse(close_after(chunks, spool), media_type=media_type,
+                                 headers={"X-Model-Version": str(model_version)})
+
+    except Exception as e:
+        error_count.inc(endpoint="/predict/stream")
+        if spool is not None:
+            spool.close()
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+# Hit/miss/eviction counters of the prediction cache
+@app.get("/cache/stats", tags=["Predict"])
+async def cacheStatsRouteClient():
+    try:
+        return JSONResponse(TelcoChurnClassifier().get_cache_stats())
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+# Prometheus scrape endpoint
+@app.get("/metrics", tags=["Monitoring"])
+async def metricsRouteClient():
+    return Response(registry.render(), media_type="text/plain; version=0.0.4")
+
 # Run with: python main.py
 if __name__ == "__main__":
     app_run(app, host=APP_HOST, port=APP_PORT)
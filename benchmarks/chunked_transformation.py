@@ -0,0 +1,111 @@
+"""
+Peak memory and time of the chunked DataTransformation against the in-memory one, and a check that both
+produce the same arrays.
+
+    python benchmarks/chunked_transformation.py --rows 2000000 --chunk-size 100000
+
+Writes synthetic train and test csv files (rows of Telco_Customer_Churn.csv sampled with replacement, --rows
+train rows and a quarter of that as test rows), then runs DataTransformation once in memory with SMOTENC
+disabled and dense output, and once with chunk_size set, each in its own spawned process so that peak RSS is
+per mode. Prints seconds and peak RSS of both modes, the input size and the largest difference between the
+feature arrays and between the label arrays, as JSON.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from Telecom_churn_prediction.components.data_transformation import DataTransformation
+from Telecom_churn_prediction.constants import data_file
+from Telecom_churn_prediction.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+from Telecom_churn_prediction.entity.config_entity import DataTransformationConfig
+
+
+def write_synthetic_csv(path: str, rows: int, block_size: int = 200000) -> None:
+    source = pd.read_csv(data_file, dtype=str, keep_default_na=False)
+    written = 0
+    while written < rows:
+        block = source.sample(n=min(block_size, rows - written), replace=True, random_state=written)
+        block.to_csv(path, mode="a", index=False, header=written == 0)
+        written += len(block)
+
+
+def run_transformation(tmp_dir: str, chunk_size: int, results) -> None:
+    output_dir = os.path.join(tmp_dir, f"chunk_size_{chunk_size}")
+    data_transformation_config = DataTransformationConfig(
+        data_transformation_dir=output_dir,
+        transformed_train_file_path=os.path.join(output_dir, "train.npy"),
+        transformed_test_file_path=os.path.join(output_dir, "test.npy"),
+        transformed_train_target_file_path=os.path.join(output_dir, "train_target.npy"),
+        transformed_test_target_file_path=os.path.join(output_dir, "test_target.npy"),
+        transformed_object_file_path=os.path.join(output_dir, "preprocessing.pkl"),
+        compiled_object_file_path=os.path.join(output_dir, "compiled_preprocessing.pkl"),
+        chunk_size=chunk_size,
+        resample_enabled=False,
+        sparse_output=False,
+    )
+    data_transformation = DataTransformation(
+        data_ingestion_artifact=DataIngestionArtifact(train_data_file_path=os.path.join(tmp_dir, "train.csv"),
+                                                      test_data_file_path=os.path.join(tmp_dir, "test.csv")),
+        data_transformation_config=data_transformation_config,
+        data_validation_artifact=DataValidationArtifact(validation_status=True, message="", drift_report_file_path=""),
+    )
+    start = time.perf_counter()
+    artifact = data_transformation.initiate_data_transformation()
+    results[chunk_size] = {
+        "seconds": round(time.perf_counter() - start, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "train_path": artifact.transformed_train_file_path,
+        "test_path": artifact.transformed_test_file_path,
+        "train_target_path": artifact.transformed_train_target_file_path,
+        "test_target_path": artifact.transformed_test_target_file_path,
+    }
+
+
+def max_difference(path: str, other_path: str, block_rows: int = 100000) -> float:
+    array, other = np.load(path, mmap_mode="r"), np.load(other_path, mmap_mode="r")
+    if array.shape != other.shape:
+        return float("inf")
+    return max((float(np.abs(array[row:row + block_rows] - other[row:row + block_rows]).max())
+                for row in range(0, len(array), block_rows)), default=0.0)
+
+
+def main(args) -> dict:
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp_dir, context.Manager() as manager:
+        write_synthetic_csv(os.path.join(tmp_dir, "train.csv"), args.rows)
+        write_synthetic_csv(os.path.join(tmp_dir, "test.csv"), args.rows // 4)
+        input_mb = sum(os.path.getsize(os.path.join(tmp_dir, name)) for name in ("train.csv", "test.csv")) / 2 ** 20
+
+        results = manager.dict()
+        for chunk_size in (0, args.chunk_size):
+            process = context.Process(target=run_transformation, args=(tmp_dir, chunk_size, results))
+            process.start()
+            process.join()
+            if process.exitcode != 0:
+                raise RuntimeError(f"Transformation with chunk_size={chunk_size} failed")
+
+        in_memory, chunked = results[0], results[args.chunk_size]
+        return {
+            "rows": args.rows,
+            "input_mb": round(input_mb, 1),
+            "in_memory": {key: in_memory[key] for key in ("seconds", "peak_rss_mb")},
+            "chunked": {key: chunked[key] for key in ("seconds", "peak_rss_mb")},
+            "max_train_difference": max_difference(in_memory["train_path"], chunked["train_path"]),
+            "max_test_difference": max_difference(in_memory["test_path"], chunked["test_path"]),
+            "max_train_target_difference": max_difference(in_memory["train_target_path"], chunked["train_target_path"]),
+            "max_test_target_difference": max_difference(in_memory["test_target_path"], chunked["test_target_path"]),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Train rows, the test file gets a quarter")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    print(json.dumps(main(parser.parse_args()), indent=2))
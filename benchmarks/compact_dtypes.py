@@ -0,0 +1,72 @@
+"""
+Memory of the training data with the compact schema dtypes against the inferred object/int64/float64 dtypes.
+
+    python benchmarks/compact_dtypes.py --rows 5000000
+
+Writes a synthetic train file of --rows customers (rows of Telco_Customer_Churn.csv sampled with replacement)
+as csv and as parquet, then loads each file the way DataTransformation does, read_dataframe with the columns
+without drop_columns followed by clean_dataframe and dropna, once without and once with schema_config. Every
+load runs in its own spawned process, so peak RSS is per load. Prints the size of the loaded frame, peak RSS
+above the process baseline and seconds per format and dtype mode, as JSON.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import pandas as pd
+
+from Telecom_churn_prediction.constants import data_file, schema_file_path
+from Telecom_churn_prediction.utils.data_cleaning import clean_dataframe, get_numeric_columns
+from Telecom_churn_prediction.utils.dataframe_io import dataframe_file_formats, read_dataframe, write_dataframe
+from Telecom_churn_prediction.utils.main_utils import read_yaml_file
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load(file_path: str, compact: bool, results, key: str) -> None:
+    schema_config = read_yaml_file(schema_file_path)
+    columns = [column for column in schema_config["columns"] if column not in schema_config["drop_columns"]]
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    df = read_dataframe(file_path, columns=columns, schema_config=schema_config if compact else None)
+    df = clean_dataframe(df, get_numeric_columns(schema_config)).dropna()
+    results[key] = {
+        "seconds": round(time.perf_counter() - start, 2),
+        "frame_mb": round(df.memory_usage(deep=True).sum() / 2 ** 20, 1),
+        "peak_rss_mb": round(peak_rss_mb() - baseline, 1),
+    }
+
+
+def main(args) -> dict:
+    source = pd.read_csv(data_file)
+    train = source.sample(n=args.rows, replace=True, random_state=42).reset_index(drop=True)
+    context = multiprocessing.get_context("spawn")
+
+    results = {"rows": args.rows}
+    with tempfile.TemporaryDirectory() as tmp_dir, context.Manager() as manager:
+        loads = manager.dict()
+        for file_format in dataframe_file_formats:
+            # Written without the schema dtypes, so the default load has to infer them like before
+            file_path = os.path.join(tmp_dir, f"train.{file_format}")
+            write_dataframe(train, file_path)
+            for mode in ("inferred", "compact"):
+                key = f"{file_format}_{mode}"
+                process = context.Process(target=load, args=(file_path, mode == "compact", loads, key))
+                process.start()
+                process.join()
+            results[file_format] = {mode: dict(loads[f"{file_format}_{mode}"]) for mode in ("inferred", "compact")}
+            results[file_format]["peak_rss_reduction"] = round(
+                results[file_format]["inferred"]["peak_rss_mb"] / results[file_format]["compact"]["peak_rss_mb"], 2)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,106 @@
+"""
+Checks that CompiledPreprocessor reproduces ColumnTransformer.transform and times single-row transforms of
+both paths.
+
+    python benchmarks/compiled_preprocessor.py [--preprocessor-path artifact/<run>/.../preprocessing.pkl]
+
+Without --preprocessor-path a ColumnTransformer is fitted on Telco_Customer_Churn.csv the same way
+DataTransformation builds it: compact schema dtypes, shared cleaning and sparse output. The ColumnTransformer
+gets the typed frame, the compiled path the raw rows after clean_record like the serving paths. One hot
+columns have to match exactly, scaled columns to float32 precision, the scaler working on float32 input.
+Exits with an error if any row differs. tests/test_compiled_preprocessor.py runs the same check.
+"""
+import argparse
+import json
+import time
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from Telecom_churn_prediction.components.data_transformation import DataTransformation
+from Telecom_churn_prediction.constants import data_file, schema_file_path, target_column
+from Telecom_churn_prediction.entity.compiled_preprocessor import CompiledPreprocessor
+from Telecom_churn_prediction.utils.data_cleaning import clean_dataframe, clean_record, get_numeric_columns
+from Telecom_churn_prediction.utils.dataframe_io import apply_schema_dtypes
+from Telecom_churn_prediction.utils.main_utils import load_object, read_yaml_file
+
+numeric_tolerance = {"rtol": 1e-5, "atol": 1e-5}
+
+
+def load_features(schema_config: dict) -> Tuple[pd.DataFrame, list]:
+    """
+    Returns the model input columns with schema dtypes and the DataTransformation cleaning, and the same rows
+    as cleaned records
+    """
+    columns = [column for column in schema_config["columns"]
+               if column not in schema_config["drop_columns"] and column != target_column]
+    raw_features = pd.read_csv(data_file, dtype=str, keep_default_na=False)[columns]
+    numeric_columns = get_numeric_columns(schema_config)
+    dataframe = clean_dataframe(apply_schema_dtypes(raw_features, schema_config), numeric_columns).dropna()
+    records = [clean_record(record, numeric_columns)
+               for record in raw_features.loc[dataframe.index].to_dict(orient="records")]
+    return dataframe.reset_index(drop=True), records
+
+
+def fit_preprocessor(dataframe: pd.DataFrame):
+    num_features = dataframe.select_dtypes(exclude=["object", "category"]).columns
+    ohe_columns = dataframe.select_dtypes(include=["object", "category"]).columns
+    # Sparse output like the in-memory DataTransformation, the compiled path always returns dense rows
+    preprocessor = DataTransformation.get_data_transformer_object(ohe_columns, num_features, sparse_output=True)
+    return preprocessor.fit(dataframe)
+
+
+def to_dense(array) -> np.ndarray:
+    """
+    Densifies the CSR output of the ColumnTransformer, saved preprocessors of the chunked mode return dense arrays
+    """
+    return array.toarray() if sparse.issparse(array) else np.asarray(array)
+
+
+def time_per_row(fn, rows: list, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for row in rows:
+            fn(row)
+    return (time.perf_counter() - start) / (repeat * len(rows)) * 1e6
+
+
+def main(args) -> dict:
+    dataframe, records = load_features(read_yaml_file(schema_file_path))
+    preprocessor = load_object(args.preprocessor_path) if args.preprocessor_path else fit_preprocessor(dataframe)
+    compiled = CompiledPreprocessor.from_column_transformer(preprocessor)
+
+    expected = to_dense(preprocessor.transform(dataframe))
+    actual = compiled.transform_records(records)
+    numeric = np.zeros(expected.shape[1], dtype=bool)
+    numeric[compiled.numeric_positions] = True
+    mismatched = np.flatnonzero(
+        (expected[:, ~numeric] != actual[:, ~numeric]).any(axis=1)
+        | ~np.isclose(actual[:, numeric], expected[:, numeric], **numeric_tolerance).all(axis=1))
+    if len(mismatched):
+        raise SystemExit(f"Compiled preprocessor differs from ColumnTransformer on rows {mismatched[:20].tolist()}")
+
+    sample = records[:args.rows]
+    frames = [pd.DataFrame([record]) for record in sample]
+    column_transformer_us = time_per_row(lambda i: preprocessor.transform(frames[i]), range(len(sample)), args.repeat)
+    dataframe_build_us = time_per_row(lambda record: preprocessor.transform(pd.DataFrame([record])), sample, args.repeat)
+    compiled_us = time_per_row(compiled.transform_record, sample, args.repeat)
+
+    return {
+        "rows_checked": len(records),
+        "max_scaled_difference": float(np.abs(actual[:, numeric] - expected[:, numeric]).max(initial=0.0)),
+        "column_transformer_us_per_row": round(column_transformer_us, 2),
+        "dataframe_build_and_transform_us_per_row": round(dataframe_build_us, 2),
+        "compiled_us_per_row": round(compiled_us, 2),
+        "speedup": round(dataframe_build_us / compiled_us, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preprocessor-path", default=None)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,60 @@
+"""
+Time of the shared cleaning against the applymap based null token cleaning it replaced.
+
+    python benchmarks/data_cleaning.py --rows 10000000
+
+Builds a synthetic frame of --rows customers (rows of Telco_Customer_Churn.csv sampled with replacement, read as
+text like the raw csv) and cleans it twice: the old way, applymap with strip().lower() on every cell and then
+astype("float64") on TotalCharges, and through clean_dataframe. Prints seconds of both, the speedup and whether
+both keep the same rows with the same TotalCharges, as JSON.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from Telecom_churn_prediction.constants import column_required_type_change, data_file, schema_file_path
+from Telecom_churn_prediction.utils.data_cleaning import clean_dataframe, get_numeric_columns
+from Telecom_churn_prediction.utils.main_utils import read_yaml_file
+
+applymap_null_tokens = ["", " ", "na", "null", "none"]
+
+
+def applymap_cleaning(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.applymap(lambda x: np.nan if isinstance(x, str) and x.strip().lower() in applymap_null_tokens else x)
+    df = df.dropna()
+    df[column_required_type_change] = df[column_required_type_change].astype("float64")
+    return df
+
+
+def main(args) -> dict:
+    schema_config = read_yaml_file(schema_file_path)
+    source = pd.read_csv(data_file)
+    df = source.sample(n=args.rows, replace=True, random_state=42).reset_index(drop=True)
+
+    start = time.perf_counter()
+    applymap_df = applymap_cleaning(df)
+    applymap_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cleaned_df = clean_dataframe(df, get_numeric_columns(schema_config)).dropna()
+    vectorized_seconds = time.perf_counter() - start
+
+    return {
+        "rows": args.rows,
+        "applymap_seconds": round(applymap_seconds, 2),
+        "vectorized_seconds": round(vectorized_seconds, 2),
+        "speedup": round(applymap_seconds / vectorized_seconds, 1),
+        "rows_kept": len(cleaned_df),
+        "same_rows": bool(applymap_df.index.equals(cleaned_df.index)),
+        "same_total_charges": bool(np.allclose(applymap_df[column_required_type_change],
+                                               cleaned_df[column_required_type_change])),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,57 @@
+"""
+Time and CV accuracy of the search strategies of config/model.yaml against the exhaustive grid.
+
+    python benchmarks/hyperparameter_search.py --train-path artifact/<run>/data_transformation/transformed/train.npz
+    python benchmarks/hyperparameter_search.py --train-path ... --models XGBClassifier CatBoostClassifier
+
+Tunes every selected model twice through ModelTuner, once with strategy grid and once with the strategy
+configured under search in model.yaml, and prints seconds, candidates explored and best CV accuracy of both
+as JSON. Both runs score the same folds.
+"""
+import argparse
+import json
+
+from Telecom_churn_prediction.components.model_trainer import ModelTrainer
+from Telecom_churn_prediction.components.model_tuner import ModelTuner
+from Telecom_churn_prediction.entity.config_entity import ModelTrainerConfig
+from Telecom_churn_prediction.utils.main_utils import load_models_from_yaml, load_transformed_data
+from Telecom_churn_prediction.utils.thread_budget import set_estimator_threads, thread_budget
+
+
+def main(args) -> dict:
+    x_train, y_train = load_transformed_data(args.train_path)
+    model_trainer_config = ModelTrainerConfig(cpu_budget=args.cpu_budget, inner_threads=args.inner_threads)
+    models_params = load_models_from_yaml(model_trainer_config.model_config_file_path)
+    model_trainer = ModelTrainer(data_transformation_artifact=None, model_trainer_config=model_trainer_config)
+    for mp in models_params.values():
+        set_estimator_threads(mp["model"], model_trainer.inner_threads)
+    model_tuner = ModelTuner(cv=model_trainer.get_cv_splitter(), n_jobs=model_trainer.outer_jobs,
+                             random_state=model_trainer_config.random_state)
+
+    results = {}
+    for model_name in args.models or models_params:
+        mp = models_params[model_name]
+        if not mp["params"]:
+            continue
+        runs = {}
+        for label, search_config in (("grid", {"strategy": "grid"}), ("configured", mp["search"])):
+            with thread_budget(model_trainer_config.cpu_budget, model_trainer_config.inner_threads):
+                _, summary = model_tuner.tune(model_name, mp["model"], mp["params"], search_config, x_train, y_train,
+                                              time_budget_seconds=float("inf"))
+            runs[label] = {key: summary[key] for key in ("strategy", "candidates", "cv_accuracy")}
+            runs[label]["seconds"] = round(summary["seconds"], 2)
+        runs["speedup"] = round(runs["grid"]["seconds"] / runs["configured"]["seconds"], 2)
+        runs["accuracy_change"] = round(runs["configured"]["cv_accuracy"] - runs["grid"]["cv_accuracy"], 4)
+        results[model_name] = runs
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train-path", required=True,
+                        help="Transformed train features (.npz or .npy) produced by DataTransformation, "
+                             "labels are read from <name>_target.npy next to them")
+    parser.add_argument("--models", nargs="*", help="Models of model.yaml to compare, all tunable ones if omitted")
+    parser.add_argument("--cpu-budget", type=int, default=0, help="Cores of the searches, all of them if 0")
+    parser.add_argument("--inner-threads", type=int, default=1, help="Threads of every search worker")
+    print(json.dumps(main(parser.parse_args()), indent=2))
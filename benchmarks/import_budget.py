@@ -0,0 +1,85 @@
+"""
+Import time and memory budget of the serving entry point.
+
+    python benchmarks/import_budget.py [--max-import-seconds 2.0] [--max-rss-mb 300]
+
+Imports app.py in a fresh interpreter with `python -X importtime` and checks that
+  * none of the training-only packages is imported,
+  * the cumulative import time of app stays within --max-import-seconds,
+  * the resident set size after the import stays within --max-rss-mb.
+Prints the measurements and the slowest imports as JSON and exits with status 1 when a budget is exceeded,
+so it can run as a CI gate.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+training_only_modules = [
+    "evidently",
+    "imblearn",
+    "xgboost",
+    "lightgbm",
+    "catboost",
+    "sklearn.model_selection",
+    "Telecom_churn_prediction.pipeline.training_pipeline",
+    "Telecom_churn_prediction.components.model_trainer",
+]
+
+probe = """
+import json, resource, sys
+import app
+print(json.dumps({
+    "modules": sorted(sys.modules),
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Returns (cumulative_us, module) for every line of the -X importtime report
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, module = line[len("import time:"):].split("|")
+        imports.append((int(cumulative_us), module.strip()))
+    return imports
+
+
+def main(args) -> int:
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], capture_output=True, text=True,
+                            cwd=repo_root)
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        return 1
+
+    measurements = json.loads(result.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(result.stderr)
+    app_cumulative_us = next((us for us, module in imports if module == "app"), 0)
+    leaked = [module for module in training_only_modules if module in measurements["modules"]]
+
+    report = {
+        "app_import_seconds": round(app_cumulative_us / 1e6, 3),
+        "rss_mb": round(measurements["rss_mb"], 1),
+        "training_modules_imported": leaked,
+        "slowest_imports": [{"module": module, "cumulative_ms": round(us / 1000, 1)}
+                            for us, module in sorted(imports, reverse=True)[:15]],
+        "budget": {"max_import_seconds": args.max_import_seconds, "max_rss_mb": args.max_rss_mb},
+    }
+    print(json.dumps(report, indent=2))
+
+    within_budget = (not leaked and report["app_import_seconds"] <= args.max_import_seconds
+                     and report["rss_mb"] <= args.max_rss_mb)
+    return 0 if within_budget else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-import-seconds", type=float, default=2.0)
+    parser.add_argument("--max-rss-mb", type=float, default=300.0)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,85 @@
+"""
+Size, write time, read time and peak memory of the ingestion artifacts as parquet against csv.
+
+    python benchmarks/intermediate_formats.py --rows 2000000
+
+Builds a synthetic feature store of --rows customers (rows of Telco_Customer_Churn.csv sampled with replacement),
+writes it through write_dataframe as csv and as parquet with the schema dtypes enforced, then reads every file
+the way each training stage does, each read in its own spawned process so that peak RSS is per read:
+DataValidation reads all columns, DataTransformation the columns without drop_columns and ModelEvaluation the
+model features and the target. Prints file size, write seconds, read seconds and peak RSS above the
+process baseline per format and stage, and the dtypes every format comes back with, as JSON.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import pandas as pd
+
+from Telecom_churn_prediction.constants import data_file, schema_file_path, target_column
+from Telecom_churn_prediction.utils.dataframe_io import dataframe_file_formats, read_dataframe, write_dataframe
+from Telecom_churn_prediction.utils.main_utils import read_yaml_file
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def get_stage_columns(schema_config: dict) -> dict:
+    return {
+        "data_validation": None,
+        "data_transformation": [column for column in schema_config["columns"]
+                                if column not in schema_config["drop_columns"]],
+        "model_evaluation": schema_config["num_features"] + schema_config["ohe_columns"] + [target_column],
+    }
+
+
+def read_stage(file_path: str, columns, results, key: str) -> None:
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    df = read_dataframe(file_path, columns=columns)
+    results[key] = {
+        "read_seconds": round(time.perf_counter() - start, 2),
+        "peak_rss_mb": round(peak_rss_mb() - baseline, 1),
+        "dtypes": {column: str(dtype) for column, dtype in df.dtypes.items()},
+    }
+
+
+def main(args) -> dict:
+    schema_config = read_yaml_file(schema_file_path)
+    source = pd.read_csv(data_file)
+    feature_store = source.sample(n=args.rows, replace=True, random_state=42).reset_index(drop=True)
+    context = multiprocessing.get_context("spawn")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir, context.Manager() as manager:
+        reads = manager.dict()
+        for file_format in dataframe_file_formats:
+            file_path = os.path.join(tmp_dir, f"feature_store.{file_format}")
+            start = time.perf_counter()
+            write_dataframe(feature_store, file_path, schema_config=schema_config)
+            results[file_format] = {"size_mb": round(os.path.getsize(file_path) / 2 ** 20, 1),
+                                    "write_seconds": round(time.perf_counter() - start, 2)}
+
+            for stage, columns in get_stage_columns(schema_config).items():
+                key = f"{file_format}_{stage}"
+                process = context.Process(target=read_stage, args=(file_path, columns, reads, key))
+                process.start()
+                process.join()
+                stage_result = dict(reads[key])
+                dtypes = stage_result.pop("dtypes")
+                if columns is None:
+                    results[file_format]["dtypes"] = dtypes
+                results[file_format][stage] = stage_result
+
+    return {"rows": args.rows, **results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    print(json.dumps(main(parser.parse_args()), indent=2))
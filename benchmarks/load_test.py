@@ -0,0 +1,250 @@
+"""
+Load test of the FastAPI service against a local S3 stand-in.
+
+    pip install "moto[server]" httpx
+    python benchmarks/load_test.py --concurrency 1 16 64 --requests 2000
+    python benchmarks/load_test.py --model-path artifact/<run>/model_trainer/trained_model/model.pkl --workers 4
+
+Starts a moto S3 server, uploads the model to the model bucket, starts app.py with uvicorn pointed at it
+through AWS_ENDPOINT_URL and replays customers of Telco_Customer_Churn.csv against POST /, POST /predict/batch
+and POST /predict/stream at every concurrency level. Without --model-path a LogisticRegression is fitted on
+Telco_Customer_Churn.csv with the DataTransformation preprocessor, enough to exercise the serving path but
+not the cost of the stacking ensemble. Throughput, p50/p95/p99 latency and error rate are written as JSON to
+--output so runs can be compared.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import pickle
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from Telecom_churn_prediction.constants import (column_required_type_change, data_file, model_bucket_name,
+                                                model_file_name, region_name, schema_file_path, target_column)
+from Telecom_churn_prediction.utils.data_cleaning import clean_dataframe, get_numeric_columns
+from Telecom_churn_prediction.utils.main_utils import drop_columns, load_object, read_yaml_file
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def load_customers() -> pd.DataFrame:
+    schema_config = read_yaml_file(os.path.join(repo_root, schema_file_path))
+    return clean_dataframe(pd.read_csv(os.path.join(repo_root, data_file)), get_numeric_columns(schema_config)).dropna()
+
+
+def fit_fallback_model(customers: pd.DataFrame):
+    """
+    Fits the DataTransformation preprocessor and a LogisticRegression, packaged like ModelTrainer does
+    """
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.preprocessing import LabelEncoder
+
+    from Telecom_churn_prediction.components.data_transformation import DataTransformation
+    from Telecom_churn_prediction.entity.compiled_preprocessor import CompiledPreprocessor
+    from Telecom_churn_prediction.entity.estimator import TelcoChurnModel
+
+    schema_config = read_yaml_file(os.path.join(repo_root, schema_file_path))
+    features = drop_columns(customers.drop(columns=[target_column]), cols=schema_config["drop_columns"])
+    num_features = features.select_dtypes(exclude=["object"]).columns
+    ohe_columns = features.select_dtypes(include=["object"]).columns
+    preprocessor = DataTransformation.get_data_transformer_object(ohe_columns, num_features)
+    preprocessor.set_params(OneHotEncoder__handle_unknown="ignore")
+    x_train = preprocessor.fit_transform(features)
+    y_train = LabelEncoder().fit_transform(customers[target_column])
+    classifier = LogisticRegression(max_iter=1000).fit(x_train, y_train)
+    return TelcoChurnModel(preprocessing_object=preprocessor, trained_model_object=classifier,
+                           compiled_preprocessor=CompiledPreprocessor.from_column_transformer(preprocessor))
+
+
+def start_s3_stand_in(model) -> tuple:
+    from moto.server import ThreadedMotoServer
+    import boto3
+
+    port = free_port()
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=port)
+    server.start()
+    endpoint_url = f"http://127.0.0.1:{port}"
+    s3_client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region_name,
+                             aws_access_key_id="testing", aws_secret_access_key="testing")
+    s3_client.create_bucket(Bucket=model_bucket_name,
+                            CreateBucketConfiguration={"LocationConstraint": region_name})
+    s3_client.put_object(Bucket=model_bucket_name, Key=model_file_name, Body=pickle.dumps(model))
+    return server, endpoint_url
+
+
+def start_app(endpoint_url: str, workers: int, cache_dir: str) -> tuple:
+    port = free_port()
+    env = {**os.environ,
+           "AWS_ACCESS_KEY_ID": "testing",
+           "AWS_SECRET_ACCESS_KEY": "testing",
+           "AWS_ENDPOINT_URL": endpoint_url,
+           "LOG_ASYNC": os.environ.get("LOG_ASYNC", "1")}
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1",
+                                "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+                               cwd=cache_dir, env={**env, "PYTHONPATH": repo_root}, stdout=subprocess.DEVNULL)
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_until_ready(base_url: str, form: dict, timeout: float = 120.0) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                response = await client.post("/", data=form)
+                if response.status_code == 200 and "Error" not in response.text:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.5)
+    raise TimeoutError(f"Service at {base_url} did not become ready in {timeout}s")
+
+
+def build_payloads(customers: pd.DataFrame, scenario: str, n_requests: int, batch_size: int) -> list:
+    features = customers.drop(columns=[target_column]).astype({column_required_type_change: str})
+    if scenario == "form":
+        rows = features.sample(n=n_requests, replace=True, random_state=42).rename(columns={"tenure": "Tenure"})
+        return [{"data": {key: str(value) for key, value in row.items()}} for row in rows.to_dict(orient="records")]
+
+    payloads = []
+    for i in range(n_requests):
+        rows = features.sample(n=batch_size, replace=True, random_state=i)
+        if scenario == "batch":
+            payloads.append({"content": json.dumps(rows.to_dict(orient="records")),
+                             "headers": {"content-type": "application/json"}})
+        else:
+            payloads.append({"content": rows.to_csv(index=False), "headers": {"content-type": "text/csv"}})
+    return payloads
+
+
+def is_error(scenario: str, response) -> bool:
+    if response.status_code >= 400:
+        return True
+    # POST / renders the error into the page with status 200
+    return scenario == "form" and "Error:" in response.text
+
+
+async def replay(base_url: str, scenario: str, payloads: list, concurrency: int) -> dict:
+    import httpx
+
+    path = {"form": "/", "batch": "/predict/batch", "stream": "/predict/stream"}[scenario]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        async def one_request(payload):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(path, **payload)
+                    failed = is_error(scenario, response)
+                except httpx.HTTPError:
+                    failed = True
+                latencies.append(time.perf_counter() - start)
+                errors += failed
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one_request(payload) for payload in payloads))
+        elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(payloads),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(payloads) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "error_rate": round(errors / len(payloads), 4),
+    }
+
+
+def git_commit() -> str:
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=repo_root)
+    return result.stdout.strip() or None
+
+
+async def run(args, base_url: str, customers: pd.DataFrame) -> list:
+    results = []
+    for scenario in args.scenarios:
+        n_requests = args.requests if scenario == "form" else max(1, args.requests // 10)
+        payloads = build_payloads(customers, scenario, n_requests, args.batch_size)
+        for concurrency in args.concurrency:
+            result = await replay(base_url, scenario, payloads, concurrency)
+            print(json.dumps(result), file=sys.stderr)
+            results.append(result)
+    return results
+
+
+def main(args) -> dict:
+    customers = load_customers()
+    model = load_object(args.model_path) if args.model_path else fit_fallback_model(customers)
+
+    server, endpoint_url = start_s3_stand_in(model)
+    app_process = None
+    try:
+        # uvicorn runs in a scratch directory so the model cache and Logs of the run do not land in the repo
+        work_dir = tempfile.mkdtemp(prefix="load_test_")
+        for name in ("static", "templates", "config"):
+            os.symlink(os.path.join(repo_root, name), os.path.join(work_dir, name))
+        app_process, base_url = start_app(endpoint_url, args.workers, work_dir)
+
+        warmup_form = build_payloads(customers, "form", 1, 1)[0]["data"]
+        asyncio.run(wait_until_ready(base_url, warmup_form))
+        results = asyncio.run(run(args, base_url, customers))
+    finally:
+        if app_process is not None:
+            app_process.terminate()
+            app_process.wait(timeout=30)
+        server.stop()
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "model": args.model_path or "fallback LogisticRegression",
+        "workers": args.workers,
+        "batch_size": args.batch_size,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-path", default=None, help="Local TelcoChurnModel pickle produced by ModelTrainer")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=2000, help="POST / requests per level, a tenth for batch and stream")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per batch and stream request")
+    parser.add_argument("--scenarios", nargs="+", choices=["form", "batch", "stream"], default=["form", "batch", "stream"])
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results",
+                                                         f"load_test_{datetime.now():%Y%m%d_%H%M%S}.json"))
+    args = parser.parse_args()
+
+    report = main(args)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,57 @@
+"""
+Benchmark of the logging cost on the prediction path.
+
+    python benchmarks/logging_overhead.py
+    LOG_ASYNC=0 python benchmarks/logging_overhead.py
+
+Times the four logger.info calls a prediction request used to make, against the sampled hot path
+logger, and prints the p50/p99 per-request logging latency in microseconds as JSON. Run it with and
+without LOG_ASYNC=0 to compare the queue based handler against synchronous file and stdout writes.
+Stdout is redirected to /dev/null so the terminal does not dominate the numbers.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+
+def time_requests(log, n_requests: int) -> dict:
+    latencies = np.empty(n_requests)
+    for i in range(n_requests):
+        start = time.perf_counter()
+        log.info("Entered get_TelcoChurn_data_as_dict method as TelcoChurnData class")
+        log.info("Created TelcoChurn data dict")
+        log.info("Exited get_TelcoChurn_data_as_dict method as TelcoChurnData class")
+        log.info("Entered predict method of TelcoChurnClassifier class")
+        latencies[i] = time.perf_counter() - start
+    return {
+        "p50_us": round(float(np.percentile(latencies, 50)) * 1e6, 2),
+        "p99_us": round(float(np.percentile(latencies, 99)) * 1e6, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    results = {"async_logging": os.getenv("LOG_ASYNC", "1") != "0"}
+    from Telecom_churn_prediction.logger import logger, log_handlers
+    from Telecom_churn_prediction.pipeline.prediction_pipeline import hot_path_logger
+
+    # Left open, the log listener may still flush queued records to it at exit
+    devnull = open(os.devnull, "w")
+    log_handlers[1].setStream(devnull)
+
+    results["every_message"] = time_requests(logger, args.requests)
+    results["hot_path_logger"] = time_requests(hot_path_logger, args.requests)
+
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
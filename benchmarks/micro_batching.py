@@ -0,0 +1,86 @@
+"""
+Benchmark of the micro batch scheduler against scoring every single-row request on its own.
+
+    python benchmarks/micro_batching.py --model-path artifact/<run>/model_trainer/trained_model/model.pkl
+
+Replays rows of Telco_Customer_Churn.csv as concurrent single-row requests and prints p50/p99 latency
+and rows/sec for both modes as JSON.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from Telecom_churn_prediction.constants import data_file, schema_file_path
+from Telecom_churn_prediction.pipeline.batch_scheduler import MicroBatchScheduler
+from Telecom_churn_prediction.utils.main_utils import load_object, read_yaml_file
+
+
+def load_requests(n_requests: int) -> list:
+    schema_config = read_yaml_file(schema_file_path)
+    features = schema_config["num_features"] + schema_config["ohe_columns"]
+    dataframe = pd.read_csv(data_file)
+    dataframe = dataframe[dataframe["TotalCharges"].str.strip() != ""][features]
+    rows = dataframe.sample(n=n_requests, replace=True, random_state=42).reset_index(drop=True)
+    return [rows.iloc[[i]] for i in range(n_requests)]
+
+
+async def replay(requests: list, concurrency: int, score) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one_request(dataframe):
+        async with semaphore:
+            start = time.perf_counter()
+            await score(dataframe)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_request(dataframe) for dataframe in requests))
+    elapsed = time.perf_counter() - start
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "requests": len(requests),
+        "rows_per_second": round(len(requests) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+    }
+
+
+async def main(args) -> dict:
+    model = load_object(args.model_path)
+    requests = load_requests(args.requests)
+    loop = asyncio.get_running_loop()
+
+    def predict(dataframe):
+        return model.predict_output(dataframe=dataframe)
+
+    async def unbatched(dataframe):
+        return await loop.run_in_executor(None, predict, dataframe)
+
+    scheduler = MicroBatchScheduler(predict_fn=predict, max_batch_size=args.max_batch_size,
+                                    max_wait_ms=args.max_wait_ms)
+    scheduler.start()
+
+    results = {
+        "concurrency": args.concurrency,
+        "max_batch_size": args.max_batch_size,
+        "max_wait_ms": args.max_wait_ms,
+        "without_batching": await replay(requests, args.concurrency, unbatched),
+        "with_batching": await replay(requests, args.concurrency, scheduler.submit),
+    }
+    await scheduler.stop()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-path", required=True, help="Local TelcoChurnModel pickle produced by ModelTrainer")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    print(json.dumps(asyncio.run(main(parser.parse_args())), indent=2))
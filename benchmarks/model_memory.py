@@ -0,0 +1,111 @@
+"""
+Per-worker memory of the served model, unpickled copies against the memory mapped serving artifact.
+
+    python benchmarks/model_memory.py --model-path artifact/<run>/model_trainer/trained_model/model.pkl
+
+For 1, 4 and 8 workers, starts that many spawned processes (like uvicorn --workers), loads the model in
+every one of them either with pickle or from the joblib artifact with mmap_mode="r", scores a few rows and
+reports per-worker RSS and PSS in MB as JSON while all workers are alive. RSS counts shared pages in every
+worker, PSS splits them between the workers sharing them, so PSS is what shrinks when pages are shared.
+For the mmap workers it also reports the RSS of the pages mapped from the artifact file, the only memory that
+is actually shared. The artifact is converted once up front like ModelTrainer does, and get_mmap_sharing_report
+tells how many MB of the model stay memory mapped after loading and how many every worker unpickles anyway
+(tree node arrays are copied on load, boosters are pickled as bytes). Linux only, memory is read from /proc.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+
+import pandas as pd
+
+from Telecom_churn_prediction.constants import column_required_type_change, data_file, schema_file_path
+from Telecom_churn_prediction.utils.main_utils import (get_mmap_artifact_path, get_mmap_sharing_report, load_mmap_object,
+                                                      load_object, read_yaml_file, save_mmap_object)
+
+
+def memory_mb() -> dict:
+    usage = {}
+    with open("/proc/self/smaps_rollup") as smaps:
+        for line in smaps:
+            name, value = line.split(":", 1)
+            if name in ("Rss", "Pss"):
+                usage[name.lower() + "_mb"] = round(int(value.split()[0]) / 1024, 1)
+    return usage
+
+
+def mapped_file_rss_mb(file_path: str) -> float:
+    """
+    Returns the resident size of the mappings of file_path in this process, read from /proc/self/smaps
+    """
+    file_path, rss_kb, in_file_mapping = os.path.realpath(file_path), 0, False
+    with open("/proc/self/smaps") as smaps:
+        for line in smaps:
+            fields = line.split()
+            if "-" in fields[0] and ":" not in fields[0]:
+                in_file_mapping = fields[-1] == file_path
+            elif in_file_mapping and fields[0] == "Rss:":
+                rss_kb += int(fields[1])
+    return round(rss_kb / 1024, 1)
+
+
+def worker(mode: str, model_path: str, rows: pd.DataFrame, barrier, results) -> None:
+    baseline = memory_mb()
+    model = load_mmap_object(model_path, mmap_mode="r") if mode == "mmap" else load_object(model_path)
+    model.predict_output(dataframe=rows)
+    # Measure only once every worker has loaded the model, so shared pages are split between all of them
+    barrier.wait()
+    usage = memory_mb()
+    result = {key: round(usage[key] - baseline[key], 1) for key in usage}
+    result["mapped_mb"] = mapped_file_rss_mb(model_path) if mode == "mmap" else 0.0
+    results.put(result)
+    barrier.wait()
+
+
+def measure(mode: str, model_path: str, rows: pd.DataFrame, n_workers: int) -> dict:
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(n_workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(mode, model_path, rows, barrier, results))
+                 for _ in range(n_workers)]
+    for process in processes:
+        process.start()
+    usages = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return {
+        "workers": n_workers,
+        "model_rss_mb_per_worker": round(sum(usage["rss_mb"] for usage in usages) / n_workers, 1),
+        "model_pss_mb_per_worker": round(sum(usage["pss_mb"] for usage in usages) / n_workers, 1),
+        "mapped_rss_mb_per_worker": round(sum(usage["mapped_mb"] for usage in usages) / n_workers, 1),
+    }
+
+
+def main(args) -> dict:
+    schema_config = read_yaml_file(schema_file_path)
+    features = schema_config["num_features"] + schema_config["ohe_columns"]
+    rows = pd.read_csv(data_file)
+    rows = rows[rows[column_required_type_change].str.strip() != ""][features].head(100)
+    rows[column_required_type_change] = rows[column_required_type_change].astype(float)
+
+    artifact_path = get_mmap_artifact_path(args.model_path)
+    if not os.path.exists(artifact_path):
+        artifact_path = os.path.join(tempfile.mkdtemp(), "model.joblib")
+        save_mmap_object(artifact_path, load_object(args.model_path))
+
+    results = {"pickle": [], "mmap": [],
+               "model_file_mb": round(os.path.getsize(args.model_path) / 1024 ** 2, 1),
+               "artifact_file_mb": round(os.path.getsize(artifact_path) / 1024 ** 2, 1),
+               "sharing": get_mmap_sharing_report(load_mmap_object(artifact_path, mmap_mode="r"))}
+    for n_workers in args.workers:
+        results["pickle"].append(measure("pickle", args.model_path, rows, n_workers))
+        results["mmap"].append(measure("mmap", artifact_path, rows, n_workers))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-path", required=True, help="Local TelcoChurnModel pickle produced by ModelTrainer")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,59 @@
+"""
+Wall clock of candidate screening, serial fit plus cross_val_score per model against ModelTrainer.get_top_models.
+
+    python benchmarks/model_screening.py --train-path artifact/<run>/data_transformation/transformed/train.npz
+
+Screens every model of config/model.yaml on the transformed train features, first the old way (one full fit
+thrown away, then 5 serial CV fits per model), then through get_top_models (CV fits only, every
+candidate and fold a job of one process pool, shared folds), and prints both timings and the CV accuracies
+as JSON.
+"""
+import argparse
+import json
+import time
+
+from sklearn.base import clone
+from sklearn.model_selection import cross_val_score
+
+from Telecom_churn_prediction.components.model_trainer import ModelTrainer
+from Telecom_churn_prediction.entity.config_entity import ModelTrainerConfig
+from Telecom_churn_prediction.utils.main_utils import load_models_from_yaml, load_transformed_data
+from Telecom_churn_prediction.utils.thread_budget import thread_budget
+
+
+def main(args) -> dict:
+    x_train, y_train = load_transformed_data(args.train_path)
+    model_trainer_config = ModelTrainerConfig(cpu_budget=args.cpu_budget, inner_threads=args.inner_threads)
+    models_params = load_models_from_yaml(model_trainer_config.model_config_file_path)
+
+    start = time.perf_counter()
+    serial_accuracies = {}
+    for model_name, mp in models_params.items():
+        model = clone(mp["model"])
+        model.fit(x_train, y_train)
+        serial_accuracies[model_name] = round(float(cross_val_score(model, x_train, y_train, cv=5).mean()), 4)
+    serial_seconds = time.perf_counter() - start
+
+    model_trainer = ModelTrainer(data_transformation_artifact=None, model_trainer_config=model_trainer_config)
+    start = time.perf_counter()
+    with thread_budget(model_trainer_config.cpu_budget, model_trainer_config.inner_threads):
+        model_trainer.get_top_models(x_train, y_train, models_params)
+    parallel_seconds = time.perf_counter() - start
+
+    return {
+        "serial_seconds": round(serial_seconds, 2),
+        "parallel_seconds": round(parallel_seconds, 2),
+        "speedup": round(serial_seconds / parallel_seconds, 2),
+        "serial_cv_accuracy": serial_accuracies,
+        "candidates": [candidate.__dict__ for candidate in model_trainer.model_candidate_artifacts.values()],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train-path", required=True,
+                        help="Transformed train features (.npz or .npy) produced by DataTransformation, "
+                             "labels are read from <name>_target.npy next to them")
+    parser.add_argument("--cpu-budget", type=int, default=0, help="Cores of the screening, all of them if 0")
+    parser.add_argument("--inner-threads", type=int, default=1, help="Threads of every screening worker")
+    print(json.dumps(main(parser.parse_args()), indent=2))
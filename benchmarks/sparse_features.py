@@ -0,0 +1,81 @@
+"""
+Memory, file size and fit time of the transformed features kept as a CSR matrix against the dense array.
+
+    python benchmarks/sparse_features.py --rows 1000000
+    python benchmarks/sparse_features.py --rows 1000000 --models LogisticRegression XGBClassifier
+
+Builds a synthetic train frame of --rows customers (rows of Telco_Customer_Churn.csv sampled with replacement),
+transforms it with the preprocessor of DataTransformation once with sparse_output and once dense, and saves both
+through save_feature_data. Then fits the selected models of config/model.yaml with their default params on both,
+models marked dense_input get their densify step either way. Prints the in-memory size, the file size and the
+fit seconds per model of both, and whether every model predicts the same on both, as JSON.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.preprocessing import LabelEncoder
+
+from Telecom_churn_prediction.components.data_transformation import DataTransformation
+from Telecom_churn_prediction.constants import data_file, schema_file_path, target_column
+from Telecom_churn_prediction.entity.config_entity import ModelTrainerConfig
+from Telecom_churn_prediction.utils.data_cleaning import clean_dataframe, get_numeric_columns
+from Telecom_churn_prediction.utils.main_utils import load_models_from_yaml, read_yaml_file, save_feature_data
+
+
+def get_size_mb(features) -> float:
+    if hasattr(features, "indptr"):
+        return (features.data.nbytes + features.indices.nbytes + features.indptr.nbytes) / 2 ** 20
+    return features.nbytes / 2 ** 20
+
+
+def main(args) -> dict:
+    schema_config = read_yaml_file(schema_file_path)
+    source = clean_dataframe(pd.read_csv(data_file), get_numeric_columns(schema_config)).dropna()
+    train = source.sample(n=args.rows, replace=True, random_state=42).reset_index(drop=True)
+    x = train[schema_config["num_features"] + schema_config["ohe_columns"]]
+    y = LabelEncoder().fit_transform(train[target_column])
+
+    features = {}
+    for kind, sparse_output in (("sparse", True), ("dense", False)):
+        preprocessor = DataTransformation.get_data_transformer_object(schema_config["ohe_columns"],
+                                                                      schema_config["num_features"],
+                                                                      sparse_output=sparse_output)
+        features[kind] = preprocessor.fit_transform(x)
+
+    results = {"rows": args.rows, "columns": features["dense"].shape[1],
+               "density": round(features["sparse"].nnz / np.prod(features["sparse"].shape), 3)}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for kind, extension in (("sparse", ".npz"), ("dense", ".npy")):
+            file_path = os.path.join(tmp_dir, f"train{extension}")
+            save_feature_data(file_path, features[kind])
+            results[kind] = {"memory_mb": round(get_size_mb(features[kind]), 1),
+                             "file_mb": round(os.path.getsize(file_path) / 2 ** 20, 1)}
+
+    models = load_models_from_yaml(ModelTrainerConfig().model_config_file_path)
+    results["fit_seconds"] = {}
+    for name in args.models:
+        timings, predictions = {}, {}
+        for kind in ("sparse", "dense"):
+            model = clone(models[name]["model"])
+            start = time.perf_counter()
+            model.fit(features[kind], y)
+            timings[kind] = round(time.perf_counter() - start, 2)
+            predictions[kind] = model.predict(features[kind][:args.check_rows])
+        timings["same_predictions"] = bool(np.array_equal(predictions["sparse"], predictions["dense"]))
+        results["fit_seconds"][name] = timings
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--models", nargs="+", default=["LogisticRegression", "RandomForestClassifier",
+                                                        "XGBClassifier", "LGBMClassifier"])
+    parser.add_argument("--check-rows", type=int, default=10_000, help="Rows whose predictions are compared")
+    print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,74 @@
+"""
+Time and predictions of StackingClassifier against OutOfFoldStackingClassifier on already fitted base models.
+
+    python benchmarks/stacking.py --train-path artifact/<run>/data_transformation/transformed/train.npz \
+        --test-path artifact/<run>/data_transformation/transformed/test.npz \
+        --models RandomForestClassifier GradientBoostingClassifier LogisticRegression XGBClassifier
+
+Fits the selected models of config/model.yaml with their default params on the train features, as the searches
+do for their best candidate, then builds the stacking layer both ways on the same folds and prints the build
+time of each, the largest churn probability difference and the share of equal predictions on the test features.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.ensemble import StackingClassifier
+from sklearn.linear_model import LogisticRegression
+
+from Telecom_churn_prediction.components.model_trainer import ModelTrainer
+from Telecom_churn_prediction.entity.config_entity import ModelTrainerConfig
+from Telecom_churn_prediction.entity.stacking_classifier import OutOfFoldStackingClassifier
+from Telecom_churn_prediction.utils.main_utils import load_models_from_yaml, load_transformed_data
+from Telecom_churn_prediction.utils.thread_budget import set_estimator_threads, thread_budget
+
+
+def main(args) -> dict:
+    x_train, y_train = load_transformed_data(args.train_path)
+    x_test, _ = load_transformed_data(args.test_path)
+
+    model_trainer_config = ModelTrainerConfig(cpu_budget=args.cpu_budget, inner_threads=args.inner_threads)
+    model_trainer = ModelTrainer(data_transformation_artifact=None, model_trainer_config=model_trainer_config)
+    cv, n_jobs = model_trainer.get_cv_splitter(), model_trainer.outer_jobs
+    models_params = load_models_from_yaml(model_trainer_config.model_config_file_path)
+    fitted_models = [(model_name, set_estimator_threads(clone(models_params[model_name]["model"]),
+                                                        model_trainer.inner_threads).fit(x_train, y_train))
+                     for model_name in args.models]
+
+    with thread_budget(model_trainer_config.cpu_budget, model_trainer_config.inner_threads):
+        start = time.perf_counter()
+        stacking_clf = StackingClassifier(estimators=fitted_models, final_estimator=LogisticRegression(), cv=cv,
+                                          n_jobs=n_jobs).fit(x_train, y_train)
+        stacking_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        oof_stacking_clf = OutOfFoldStackingClassifier(estimators=fitted_models, final_estimator=LogisticRegression(),
+                                                       cv=cv, n_jobs=n_jobs).fit(x_train, y_train)
+        oof_stacking_seconds = time.perf_counter() - start
+
+    probabilities = stacking_clf.predict_proba(x_test)[:, 1]
+    oof_probabilities = oof_stacking_clf.predict_proba(x_test)[:, 1]
+    return {
+        "models": args.models,
+        "stacking_classifier_seconds": round(stacking_seconds, 2),
+        "out_of_fold_seconds": round(oof_stacking_seconds, 2),
+        "speedup": round(stacking_seconds / oof_stacking_seconds, 2),
+        "max_probability_difference": float(np.abs(probabilities - oof_probabilities).max()),
+        "equal_predictions": float((stacking_clf.predict(x_test) == oof_stacking_clf.predict(x_test)).mean()),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train-path", required=True,
+                        help="Transformed train features (.npz or .npy) produced by DataTransformation, "
+                             "labels are read from <name>_target.npy next to them")
+    parser.add_argument("--test-path", required=True,
+                        help="Transformed test features (.npz or .npy) produced by DataTransformation")
+    parser.add_argument("--models", nargs="+", default=["RandomForestClassifier", "GradientBoostingClassifier",
+                                                        "LogisticRegression", "XGBClassifier"])
+    parser.add_argument("--cpu-budget", type=int, default=0, help="Cores of both builds, all of them if 0")
+    parser.add_argument("--inner-threads", type=int, default=1, help="Threads of every fold worker")
+    print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,84 @@
+"""
+Shows that streaming bulk scoring keeps memory flat whatever the file size.
+
+    python benchmarks/streaming_scoring.py --model-path artifact/<run>/model_trainer/trained_model/model.pkl --rows 5000000
+
+Writes a synthetic CSV of --rows customers (rows of Telco_Customer_Churn.csv sampled with replacement,
+written chunk by chunk), scores it through score_csv_chunks into /dev/null and prints the resident
+set size after every tenth of the file together with the peak RSS, as JSON.
+"""
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
+
+import pandas as pd
+
+from Telecom_churn_prediction.constants import data_file, schema_file_path
+from Telecom_churn_prediction.pipeline.stream_scoring import score_csv_chunks
+from Telecom_churn_prediction.utils.data_cleaning import get_numeric_columns
+from Telecom_churn_prediction.utils.main_utils import load_object, read_yaml_file
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        resident_pages = int(statm.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_synthetic_csv(path: str, rows: int, block_size: int = 200000) -> None:
+    source = pd.read_csv(data_file, dtype=str, keep_default_na=False)
+    written = 0
+    while written < rows:
+        block = source.sample(n=min(block_size, rows - written), replace=True, random_state=written)
+        block.to_csv(path, mode="a", index=False, header=written == 0)
+        written += len(block)
+
+
+def main(args) -> dict:
+    schema_config = read_yaml_file(schema_file_path)
+    feature_columns = schema_config["num_features"] + schema_config["ohe_columns"]
+    model = load_object(args.model_path)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "customers.csv")
+        write_synthetic_csv(csv_path, args.rows)
+        file_size_mb = os.path.getsize(csv_path) / 2 ** 20
+        baseline_rss = current_rss_mb()
+
+        samples, rows_done = [], 0
+        checkpoint = max(args.rows // 10, 1)
+        start = time.perf_counter()
+        with open(csv_path, "rb") as file_obj, open(os.devnull, "w") as sink:
+            for text in score_csv_chunks(model, file_obj, feature_columns, get_numeric_columns(schema_config),
+                                         chunk_size=args.chunk_size, output_format=args.output_format):
+                sink.write(text)
+                rows_done += args.chunk_size
+                if rows_done // checkpoint > len(samples):
+                    samples.append({"rows": min(rows_done, args.rows), "rss_mb": round(current_rss_mb(), 1)})
+        elapsed = time.perf_counter() - start
+
+    return {
+        "rows": args.rows,
+        "file_size_mb": round(file_size_mb, 1),
+        "chunk_size": args.chunk_size,
+        "rows_per_second": round(args.rows / elapsed, 1),
+        "rss_before_scoring_mb": round(baseline_rss, 1),
+        "rss_during_scoring": samples,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-path", required=True, help="Local TelcoChurnModel pickle produced by ModelTrainer")
+    parser.add_argument("--rows", type=int, default=5000000)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--output-format", choices=["csv", "ndjson"], default="csv")
+    print(json.dumps(main(parser.parse_args()), indent=2))
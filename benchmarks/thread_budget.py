@@ -0,0 +1,97 @@
+"""
+Wall clock of candidate screening and tuning at several training cpu budgets against unbounded nested parallelism.
+
+    python benchmarks/thread_budget.py --train-path artifact/<run>/data_transformation/transformed/train.npz
+    python benchmarks/thread_budget.py --train-path ... --settings 8:1 4:2 2:4 --models XGBClassifier
+
+Runs ModelTrainer.get_top_models and then ModelTuner on the selected models of config/model.yaml once per
+cpu_budget:inner_threads setting, inside thread_budget and with every estimator's n_jobs/thread_count set to the
+inner threads, and once the old way: every joblib worker and every estimator free to start one thread per core.
+Prints the seconds of both stages and the best CV accuracies of every run as JSON.
+"""
+import argparse
+import json
+import os
+import time
+from contextlib import nullcontext
+
+from Telecom_churn_prediction.components.model_trainer import ModelTrainer
+from Telecom_churn_prediction.components.model_tuner import ModelTuner
+from Telecom_churn_prediction.entity.config_entity import ModelTrainerConfig
+from Telecom_churn_prediction.utils.main_utils import load_models_from_yaml, load_transformed_data
+from Telecom_churn_prediction.utils.thread_budget import set_estimator_threads, thread_budget
+
+
+def run(x_train, y_train, model_names, cpu_budget=None, inner_threads=None) -> dict:
+    """
+    Screens and tunes under the given budget, without any budget if cpu_budget is None
+    """
+    bounded = cpu_budget is not None
+    model_trainer_config = ModelTrainerConfig(cpu_budget=cpu_budget if bounded else 0,
+                                              inner_threads=inner_threads if bounded else 1)
+    model_trainer = ModelTrainer(data_transformation_artifact=None, model_trainer_config=model_trainer_config)
+    models_params = load_models_from_yaml(model_trainer_config.model_config_file_path)
+    if model_names:
+        models_params = {model_name: models_params[model_name] for model_name in model_names}
+
+    if bounded:
+        for mp in models_params.values():
+            set_estimator_threads(mp["model"], model_trainer.inner_threads)
+        outer_jobs = model_trainer.outer_jobs
+    else:
+        for mp in models_params.values():
+            set_estimator_threads(mp["model"], -1)
+        model_trainer.outer_jobs = outer_jobs = -1
+
+    budget = (thread_budget(model_trainer_config.cpu_budget, model_trainer_config.inner_threads) if bounded
+              else nullcontext())
+    with budget:
+        start = time.perf_counter()
+        top_models = model_trainer.get_top_models(x_train, y_train, models_params)
+        screening_seconds = time.perf_counter() - start
+
+        model_tuner = ModelTuner(cv=model_trainer.get_cv_splitter(), n_jobs=outer_jobs,
+                                 random_state=model_trainer_config.random_state)
+        start = time.perf_counter()
+        tuned_cv_accuracy = {}
+        for model_name in top_models:
+            mp = models_params[model_name]
+            if mp["params"]:
+                _, summary = model_tuner.tune(model_name, mp["model"], mp["params"], mp["search"], x_train, y_train,
+                                              time_budget_seconds=float("inf"))
+                tuned_cv_accuracy[model_name] = round(summary["cv_accuracy"], 4)
+        tuning_seconds = time.perf_counter() - start
+
+    return {
+        "outer_jobs": outer_jobs,
+        "inner_threads": model_trainer.inner_threads if bounded else -1,
+        "screening_seconds": round(screening_seconds, 2),
+        "tuning_seconds": round(tuning_seconds, 2),
+        "total_seconds": round(screening_seconds + tuning_seconds, 2),
+        "screening_cv_accuracy": {model_name: round(accuracy, 4) for model_name, accuracy in top_models.items()},
+        "tuned_cv_accuracy": tuned_cv_accuracy,
+    }
+
+
+def main(args) -> dict:
+    x_train, y_train = load_transformed_data(args.train_path)
+
+    results = {"cpu_count": os.cpu_count(), "unbounded": run(x_train, y_train, args.models)}
+    for setting in args.settings:
+        cpu_budget, inner_threads = (int(value) for value in setting.split(":"))
+        results[setting] = run(x_train, y_train, args.models, cpu_budget, inner_threads)
+        results[setting]["speedup"] = round(results["unbounded"]["total_seconds"] / results[setting]["total_seconds"], 2)
+    return results
+
+
+if __name__ == "__main__":
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train-path", required=True,
+                        help="Transformed train features (.npz or .npy) produced by DataTransformation, "
+                             "labels are read from <name>_target.npy next to them")
+    parser.add_argument("--models", nargs="*", help="Models of model.yaml to screen and tune, all of them if omitted")
+    parser.add_argument("--settings", nargs="+",
+                        default=[f"{cpu_count}:1", f"{cpu_count}:2", f"{cpu_count}:4", f"{max(1, cpu_count // 2)}:1"],
+                        help="cpu_budget:inner_threads pairs to time")
+    print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from Telecom_churn_prediction.exception import CustomException
+from Telecom_churn_prediction.pipeline.batch_scheduler import MicroBatchScheduler
+
+
+class RecordingModel:
+    """
+    Predicts the "x" of every record and keeps the size of every batch it scored, fails on records marked bad
+    """
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, records: list) -> np.ndarray:
+        self.batch_sizes.append(len(records))
+        if any(record.get("bad") for record in records):
+            raise ValueError("bad record")
+        return np.array([record["x"] for record in records])
+
+
+def make_records(*values) -> list:
+    return [{"x": value} for value in values]
+
+
+async def submit_all(scheduler: MicroBatchScheduler, requests: list) -> list:
+    try:
+        return await asyncio.gather(*(scheduler.submit(records) for records in requests), return_exceptions=True)
+    finally:
+        await scheduler.stop()
+
+
+def test_batch_is_split_back_to_callers_in_order():
+    model = RecordingModel()
+    scheduler = MicroBatchScheduler(model.predict, max_batch_size=64, max_wait_ms=50)
+    requests = [make_records(1), make_records(2, 3), make_records(4, 5, 6)]
+
+    results = asyncio.run(submit_all(scheduler, requests))
+
+    assert model.batch_sizes == [6]
+    for records, predictions in zip(requests, results):
+        np.testing.assert_array_equal(predictions, [record["x"] for record in records])
+
+
+def test_bad_request_fails_only_its_own_future():
+    model = RecordingModel()
+    scheduler = MicroBatchScheduler(model.predict, max_batch_size=64, max_wait_ms=50)
+    requests = [make_records(1), [{"x": 2, "bad": True}], make_records(3, 4)]
+
+    results = asyncio.run(submit_all(scheduler, requests))
+
+    assert model.batch_sizes == [4, 1, 1, 2]
+    np.testing.assert_array_equal(results[0], [1])
+    assert isinstance(results[1], CustomException)
+    np.testing.assert_array_equal(results[2], [3, 4])
+
+
+def test_batch_is_cut_at_max_batch_size():
+    model = RecordingModel()
+    scheduler = MicroBatchScheduler(model.predict, max_batch_size=2, max_wait_ms=200)
+
+    results = asyncio.run(submit_all(scheduler, [make_records(value) for value in range(5)]))
+
+    assert model.batch_sizes == [2, 2, 1]
+    assert [int(predictions[0]) for predictions in results] == list(range(5))
+
+
+def test_batch_is_cut_at_max_wait():
+    model = RecordingModel()
+    scheduler = MicroBatchScheduler(model.predict, max_batch_size=64, max_wait_ms=10)
+
+    async def submit_apart():
+        first = asyncio.ensure_future(scheduler.submit(make_records(1)))
+        await asyncio.sleep(0.2)
+        second = await scheduler.submit(make_records(2))
+        await scheduler.stop()
+        return await first, second
+
+    first, second = asyncio.run(submit_apart())
+
+    assert model.batch_sizes == [1, 1]
+    np.testing.assert_array_equal(first, [1])
+    np.testing.assert_array_equal(second, [2])
+
+
+def test_stop_fails_in_flight_and_queued_requests():
+    release = threading.Event()
+    scoring = threading.Event()
+
+    def blocking_predict(records: list) -> np.ndarray:
+        scoring.set()
+        release.wait(timeout=10)
+        return np.array([record["x"] for record in records])
+
+    scheduler = MicroBatchScheduler(blocking_predict, max_batch_size=1, max_wait_ms=1)
+
+    async def stop_while_scoring():
+        in_flight = asyncio.ensure_future(scheduler.submit(make_records(1)))
+        queued = asyncio.ensure_future(scheduler.submit(make_records(2)))
+        while not scoring.is_set():
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+        release.set()
+        return await asyncio.wait_for(asyncio.gather(in_flight, queued, return_exceptions=True), timeout=5)
+
+    results = asyncio.run(stop_while_scoring())
+
+    assert all(isinstance(result, CustomException) and "stopped" in str(result) for result in results)
@@ -0,0 +1,116 @@
+import mongomock
+import numpy as np
+import pandas as pd
+import pytest
+
+from Telecom_churn_prediction.churn_data_access.mongoDB_data_access import DataAccessor
+from Telecom_churn_prediction.configuration.mongo_db_connection import MongoDBClient
+from Telecom_churn_prediction.constants import collection_name, data_file
+from Telecom_churn_prediction.entity.config_entity import BatchScoringConfig
+from Telecom_churn_prediction.pipeline.batch_scoring_pipeline import BatchScoringPipeline
+from Telecom_churn_prediction.utils.main_utils import save_object
+
+n_documents = 8
+invalid_document = 6
+
+
+class TenureModel:
+    """
+    Churns every customer with less than a year of tenure, stands in for the trained model
+    """
+
+    def predict_output_with_proba(self, dataframe: pd.DataFrame):
+        predictions = (dataframe["tenure"].to_numpy() < 12).astype(int)
+        return predictions, predictions * 0.9
+
+
+@pytest.fixture
+def data_accessor():
+    MongoDBClient.client = mongomock.MongoClient()
+    data_accessor = DataAccessor()
+    documents = pd.read_csv(data_file, dtype=str, keep_default_na=False).head(n_documents).to_dict(orient="records")
+    documents[invalid_document]["TotalCharges"] = " "
+    data_accessor.get_collection(collection_name).insert_many(documents)
+    yield data_accessor
+    MongoDBClient.client = None
+
+
+@pytest.fixture
+def batch_scoring_config(tmp_path):
+    model_file_path = str(tmp_path / "model.pkl")
+    save_object(model_file_path, TenureModel())
+    return BatchScoringConfig(checkpoint_file_path=str(tmp_path / "batch_scoring" / "checkpoint.json"),
+                              partition_size=3, write_batch_size=2, workers=1,
+                              local_model_file_path=model_file_path)
+
+
+def get_documents(data_accessor: DataAccessor) -> list:
+    return list(data_accessor.get_collection(collection_name).find().sort("_id", 1))
+
+
+def test_run_scores_every_valid_document(data_accessor, batch_scoring_config):
+    summary = BatchScoringPipeline(batch_scoring_config, data_accessor).run()
+
+    assert summary["rows_read"] == n_documents
+    assert summary["rows_skipped"] == 1
+    assert summary["rows_scored_total"] == n_documents - 1
+    for position, document in enumerate(get_documents(data_accessor)):
+        if position == invalid_document:
+            assert batch_scoring_config.prediction_field not in document
+            continue
+        assert document[batch_scoring_config.prediction_field] == int(int(document["tenure"]) < 12)
+        assert document[batch_scoring_config.model_version_field] == summary["model_version"]
+
+
+def test_run_resumes_after_checkpoint(data_accessor, batch_scoring_config):
+    pipeline = BatchScoringPipeline(batch_scoring_config, data_accessor)
+    _, model_version = pipeline.load_model()
+    ids = [document["_id"] for document in get_documents(data_accessor)]
+    pipeline.write_checkpoint(ids[4], rows_scored=5, model_version=model_version)
+
+    summary = pipeline.run()
+
+    assert summary["rows_read"] == n_documents - 5
+    assert summary["rows_scored_total"] == 5 + n_documents - 5 - 1
+    documents = get_documents(data_accessor)
+    assert not any(batch_scoring_config.prediction_field in document for document in documents[:5])
+    assert pipeline.read_checkpoint(model_version) == {"last_id": None, "rows_scored": 0}
+
+
+def test_completed_checkpoint_starts_over(data_accessor, batch_scoring_config):
+    pipeline = BatchScoringPipeline(batch_scoring_config, data_accessor)
+    first = pipeline.run()
+    second = pipeline.run()
+
+    assert second["rows_read"] == first["rows_read"] == n_documents
+    assert second["rows_scored_total"] == first["rows_scored_total"]
+
+
+def test_checkpoint_of_another_model_version_is_ignored(data_accessor, batch_scoring_config):
+    pipeline = BatchScoringPipeline(batch_scoring_config, data_accessor)
+    ids = [document["_id"] for document in get_documents(data_accessor)]
+    pipeline.write_checkpoint(ids[4], rows_scored=5, model_version="another")
+
+    assert pipeline.run()["rows_read"] == n_documents
+
+
+def test_bulk_update_by_id_writes_in_batches(data_accessor, monkeypatch):
+    collection = data_accessor.get_collection(collection_name)
+    bulk_write_sizes = []
+    bulk_write = collection.bulk_write
+
+    def counting_bulk_write(operations, ordered=True):
+        assert not ordered
+        bulk_write_sizes.append(len(operations))
+        return bulk_write(operations, ordered=ordered)
+
+    monkeypatch.setattr(collection, "bulk_write", counting_bulk_write)
+    monkeypatch.setattr(data_accessor, "get_collection", lambda *args, **kwargs: collection)
+    ids = [document["_id"] for document in get_documents(data_accessor)]
+    updates = [{"score": float(score)} for score in np.arange(len(ids))]
+
+    modified = data_accessor.bulk_update_by_id(collection_name, ids, updates, batch_size=3)
+
+    assert modified == len(ids)
+    assert bulk_write_sizes == [3, 3, 2]
+    assert [document["score"] for document in get_documents(data_accessor)] == list(range(len(ids)))
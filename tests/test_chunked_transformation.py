@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Telecom_churn_prediction.components.data_transformation import DataTransformation
+from Telecom_churn_prediction.constants import data_file
+from Telecom_churn_prediction.entity.artifact_entity import (DataIngestionArtifact, DataTransformationArtifact,
+                                                             DataValidationArtifact)
+from Telecom_churn_prediction.entity.config_entity import DataTransformationConfig
+from Telecom_churn_prediction.utils.main_utils import densify, load_feature_data, load_numpy_array_data
+
+n_train_rows = 600
+n_test_rows = 200
+# Not a divisor of either file, so both end on a partial chunk
+chunk_size = 64
+
+
+@pytest.fixture(scope="module")
+def data_ingestion_artifact(tmp_path_factory) -> DataIngestionArtifact:
+    """
+    Train and test csv files from a sample of Telco_Customer_Churn.csv
+    """
+    data_dir = tmp_path_factory.mktemp("data_ingestion")
+    sample = pd.read_csv(data_file, dtype=str, keep_default_na=False).head(n_train_rows + n_test_rows)
+    train_file_path, test_file_path = str(data_dir / "train.csv"), str(data_dir / "test.csv")
+    sample.iloc[:n_train_rows].to_csv(train_file_path, index=False)
+    sample.iloc[n_train_rows:].to_csv(test_file_path, index=False)
+    return DataIngestionArtifact(train_data_file_path=train_file_path, test_data_file_path=test_file_path)
+
+
+def run_transformation(data_ingestion_artifact: DataIngestionArtifact, output_dir: str, chunk_size: int,
+                       sparse_output: bool) -> DataTransformationArtifact:
+    # SMOTENC is off, as the chunked path never resamples
+    data_transformation_config = DataTransformationConfig(
+        data_transformation_dir=output_dir,
+        transformed_train_file_path=os.path.join(output_dir, "train.npy"),
+        transformed_test_file_path=os.path.join(output_dir, "test.npy"),
+        transformed_train_target_file_path=os.path.join(output_dir, "train_target.npy"),
+        transformed_test_target_file_path=os.path.join(output_dir, "test_target.npy"),
+        transformed_object_file_path=os.path.join(output_dir, "preprocessing.pkl"),
+        compiled_object_file_path=os.path.join(output_dir, "compiled_preprocessing.pkl"),
+        chunk_size=chunk_size,
+        resample_enabled=False,
+        sparse_output=sparse_output,
+    )
+    data_transformation = DataTransformation(
+        data_ingestion_artifact=data_ingestion_artifact,
+        data_transformation_config=data_transformation_config,
+        data_validation_artifact=DataValidationArtifact(validation_status=True, message="", drift_report_file_path=""),
+    )
+    return data_transformation.initiate_data_transformation()
+
+
+@pytest.fixture(scope="module")
+def chunked(data_ingestion_artifact, tmp_path_factory) -> DataTransformationArtifact:
+    return run_transformation(data_ingestion_artifact, str(tmp_path_factory.mktemp("chunked")), chunk_size,
+                              sparse_output=False)
+
+
+@pytest.mark.parametrize("sparse_output", [False, True])
+def test_chunked_matches_in_memory(data_ingestion_artifact, chunked, tmp_path, sparse_output):
+    in_memory = run_transformation(data_ingestion_artifact, str(tmp_path), chunk_size=0, sparse_output=sparse_output)
+
+    for feature_file_path, target_file_path, n_rows in (
+            ("transformed_train_file_path", "transformed_train_target_file_path", n_train_rows),
+            ("transformed_test_file_path", "transformed_test_target_file_path", n_test_rows)):
+        chunked_features = np.load(getattr(chunked, feature_file_path), mmap_mode="r")
+        in_memory_features = densify(load_feature_data(getattr(in_memory, feature_file_path)))
+        chunked_target = np.load(getattr(chunked, target_file_path), mmap_mode="r")
+        in_memory_target = load_numpy_array_data(getattr(in_memory, target_file_path))
+
+        # Rows with blank TotalCharges are dropped by both modes
+        assert 0 < len(chunked_features) <= n_rows
+        np.testing.assert_allclose(chunked_features, in_memory_features, rtol=1e-6, atol=1e-6)
+        np.testing.assert_array_equal(chunked_target, in_memory_target)
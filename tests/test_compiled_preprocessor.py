@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+from Telecom_churn_prediction.components.data_transformation import DataTransformation
+from Telecom_churn_prediction.constants import data_file, schema_file_path, target_column
+from Telecom_churn_prediction.entity.compiled_preprocessor import CompiledPreprocessor
+from Telecom_churn_prediction.utils.data_cleaning import clean_dataframe, clean_record, get_numeric_columns
+from Telecom_churn_prediction.utils.dataframe_io import apply_schema_dtypes
+from Telecom_churn_prediction.utils.main_utils import read_yaml_file
+
+# StandardScaler works in float32 on the compact schema dtypes, the compiled preprocessor in float64
+numeric_tolerance = {"rtol": 1e-5, "atol": 1e-5}
+
+
+@pytest.fixture(scope="module")
+def schema_config() -> dict:
+    return read_yaml_file(schema_file_path)
+
+
+@pytest.fixture(scope="module")
+def raw_features(schema_config) -> pd.DataFrame:
+    """
+    Model input columns of the raw csv as text, the way records reach the serving paths
+    """
+    columns = [column for column in schema_config["columns"]
+               if column not in schema_config["drop_columns"] and column != target_column]
+    return pd.read_csv(data_file, dtype=str, keep_default_na=False)[columns]
+
+
+@pytest.fixture(scope="module")
+def features(raw_features, schema_config) -> pd.DataFrame:
+    """
+    Model input columns with the schema dtypes and the cleaning of DataTransformation
+    """
+    features = apply_schema_dtypes(raw_features, schema_config)
+    return clean_dataframe(features, get_numeric_columns(schema_config)).dropna()
+
+
+@pytest.fixture(scope="module")
+def preprocessor(features):
+    # Columns chosen and output format as in DataTransformation.transform_in_memory
+    num_features = features.select_dtypes(exclude=["object", "category"]).columns
+    ohe_columns = features.select_dtypes(include=["object", "category"]).columns
+    preprocessor = DataTransformation.get_data_transformer_object(ohe_columns, num_features, sparse_output=True)
+    return preprocessor.fit(features)
+
+
+def test_transform_records_matches_column_transformer(preprocessor, features, raw_features, schema_config):
+    compiled = CompiledPreprocessor.from_column_transformer(preprocessor)
+    numeric_columns = get_numeric_columns(schema_config)
+    records = [clean_record(record, numeric_columns)
+               for record in raw_features.loc[features.index].to_dict(orient="records")]
+
+    transformed = preprocessor.transform(features)
+    assert sparse.issparse(transformed)
+    expected = transformed.toarray()
+    actual = compiled.transform_records(records)
+
+    assert actual.shape == expected.shape
+    one_hot_positions = np.setdiff1d(np.arange(expected.shape[1]), compiled.numeric_positions)
+    np.testing.assert_array_equal(actual[:, one_hot_positions], expected[:, one_hot_positions])
+    np.testing.assert_allclose(actual[:, compiled.numeric_positions], expected[:, compiled.numeric_positions],
+                               **numeric_tolerance)
+
+
+def test_transform_record_rejects_unknown_category(preprocessor, features, raw_features, schema_config):
+    compiled = CompiledPreprocessor.from_column_transformer(preprocessor)
+    record = clean_record(raw_features.loc[features.index[0]].to_dict(), get_numeric_columns(schema_config))
+    record["gender"] = "Male "
+
+    with pytest.raises(ValueError, match="unknown category"):
+        compiled.transform_record(record)
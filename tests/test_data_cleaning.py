@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from Telecom_churn_prediction.utils.data_cleaning import clean_dataframe, clean_record, get_invalid_records
+
+numeric_columns = ["MonthlyCharges", "TotalCharges"]
+
+blank_values = ["", " ", "   ", "\t"]
+null_tokens = ["NA", "na", "null", "NULL", "None", "none", " None "]
+non_numeric_values = ["abc", "-", "29.85abc", "1,000", "1_000", "0x1F"]
+numeric_values = ["29.85", " 29.85 ", "1e3", "+5", ".5", "inf"]
+
+
+def assert_same_cleaning(records: list) -> None:
+    expected = clean_dataframe(pd.DataFrame(records, dtype=object), numeric_columns).to_dict(orient="records")
+    actual = [clean_record(record, numeric_columns) for record in records]
+
+    for expected_record, actual_record in zip(expected, actual):
+        assert expected_record.keys() == actual_record.keys()
+        for column, expected_value in expected_record.items():
+            actual_value = actual_record[column]
+            if pd.isna(expected_value):
+                assert pd.isna(actual_value), (column, expected_record, actual_record)
+            else:
+                assert actual_value == expected_value, (column, expected_record, actual_record)
+
+
+@pytest.mark.parametrize("total_charges", blank_values + null_tokens + non_numeric_values + numeric_values)
+def test_clean_record_matches_clean_dataframe_on_total_charges(total_charges):
+    assert_same_cleaning([{"gender": "Male", "MonthlyCharges": "29.85", "TotalCharges": total_charges}])
+
+
+@pytest.mark.parametrize("gender", blank_values + null_tokens + ["Male", " Male"])
+def test_clean_record_matches_clean_dataframe_on_text_columns(gender):
+    assert_same_cleaning([{"gender": gender, "MonthlyCharges": "29.85", "TotalCharges": "29.85"}])
+
+
+def test_invalid_records_are_the_rows_dropna_drops():
+    records = [{"gender": gender, "MonthlyCharges": "29.85", "TotalCharges": total_charges}
+               for gender, total_charges in [("Male", "29.85"), ("Male", " "), ("null", "29.85"), ("Female", "abc")]]
+
+    cleaned = [clean_record(record, numeric_columns) for record in records]
+    kept = clean_dataframe(pd.DataFrame(records, dtype=object), numeric_columns).dropna()
+
+    assert get_invalid_records(cleaned, list(records[0])) == sorted(set(range(len(records))) - set(kept.index))
@@ -0,0 +1,35 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+import_budget_script = os.path.join(repo_root, "benchmarks", "import_budget.py")
+max_import_seconds = 2.0
+max_rss_mb = 300.0
+
+
+@pytest.fixture(scope="module")
+def report() -> dict:
+    """
+    Runs the -X importtime probe of benchmarks/import_budget.py on app in a fresh interpreter
+    """
+    result = subprocess.run([sys.executable, import_budget_script, "--max-import-seconds", str(max_import_seconds),
+                             "--max-rss-mb", str(max_rss_mb)], capture_output=True, text=True, cwd=repo_root)
+    if not result.stdout.strip():
+        pytest.fail(f"Importing app failed:\n{result.stderr}")
+    return json.loads(result.stdout)
+
+
+def test_app_does_not_import_training_modules(report):
+    assert report["training_modules_imported"] == []
+
+
+def test_app_import_time_within_budget(report):
+    assert report["app_import_seconds"] <= max_import_seconds, report["slowest_imports"]
+
+
+def test_app_rss_within_budget(report):
+    assert report["rss_mb"] <= max_rss_mb
@@ -0,0 +1,84 @@
+import pytest
+
+from Telecom_churn_prediction.entity import model_cache
+from Telecom_churn_prediction.entity.model_cache import TelcoChurnModelCache
+from Telecom_churn_prediction.exception import CustomException
+
+
+class FakeEstimator:
+    """
+    Stands in for TelcoChurnEstimator, serves the model of the current ETag of its fake bucket
+    """
+
+    def __init__(self, bucket_name, model_path, mmap_mode=None):
+        self.etag = '"v1"'
+        self.loaded_versions = []
+        # Called between the version check and the download, to push a new model in that window
+        self.before_load = None
+
+    def get_model_version(self) -> str:
+        return self.etag
+
+    def load_model(self, version=None):
+        if self.before_load is not None:
+            self.before_load()
+        if version is not None and version != self.etag:
+            raise Exception(f"Model was replaced, version {self.etag} instead of {version}")
+        self.loaded_versions.append(self.etag)
+        return f"model {self.etag}"
+
+
+@pytest.fixture
+def cache(monkeypatch) -> TelcoChurnModelCache:
+    monkeypatch.setattr(model_cache, "TelcoChurnEstimator", FakeEstimator)
+    return TelcoChurnModelCache(bucket_name="bucket", model_path="model.pkl", refresh_interval=60)
+
+
+def test_model_is_swapped_on_etag_change(cache):
+    first = cache.get()
+
+    cache.estimator.etag = '"v2"'
+    assert cache.refresh()
+
+    second = cache.get()
+    assert (first.model, first.version) == ('model "v1"', '"v1"')
+    assert (second.model, second.version) == ('model "v2"', '"v2"')
+    assert cache.estimator.loaded_versions == ['"v1"', '"v2"']
+
+
+def test_unchanged_etag_is_a_no_op(cache):
+    loaded = cache.get()
+
+    assert not cache.refresh()
+    assert cache.get() is loaded
+    assert cache.estimator.loaded_versions == ['"v1"']
+
+
+def test_swap_listeners_get_every_new_model(cache):
+    swapped = []
+    cache.add_swap_listener(swapped.append)
+
+    cache.refresh()
+    cache.refresh()
+    cache.estimator.etag = '"v2"'
+    cache.refresh()
+
+    assert [loaded.version for loaded in swapped] == ['"v1"', '"v2"']
+    assert swapped[-1] is cache.get()
+
+
+def test_model_replaced_after_version_check_is_not_swapped_in(cache):
+    loaded = cache.get()
+    cache.estimator.etag = '"v2"'
+
+    def push_v3():
+        cache.estimator.etag = '"v3"'
+
+    cache.estimator.before_load = push_v3
+    with pytest.raises(CustomException, match="replaced"):
+        cache.refresh()
+    assert cache.get() is loaded
+
+    cache.estimator.before_load = None
+    assert cache.refresh()
+    assert cache.get().version == '"v3"'
@@ -0,0 +1,26 @@
+from Telecom_churn_prediction.pipeline.prediction_cache import PredictionCache
+
+
+def make_cache() -> PredictionCache:
+    return PredictionCache(feature_columns=["gender", "MonthlyCharges"], numeric_columns=["MonthlyCharges"])
+
+
+def test_key_keeps_categories_as_scored():
+    cache = make_cache()
+
+    assert (cache.make_key({"gender": "Male ", "MonthlyCharges": 29.85}, "v1")
+            != cache.make_key({"gender": "Male", "MonthlyCharges": 29.85}, "v1"))
+
+
+def test_key_normalises_numbers():
+    cache = make_cache()
+
+    assert (cache.make_key({"gender": "Male", "MonthlyCharges": "29.85"}, "v1")
+            == cache.make_key({"gender": "Male", "MonthlyCharges": 29.85}, "v1"))
+
+
+def test_key_depends_on_model_version():
+    cache = make_cache()
+    record = {"gender": "Male", "MonthlyCharges": 29.85}
+
+    assert cache.make_key(record, "v1") != cache.make_key(record, "v2")
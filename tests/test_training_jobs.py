@@ -0,0 +1,69 @@
+import time
+
+from Telecom_churn_prediction.pipeline.training_jobs import TrainingJobManager
+
+
+def quick_training(error_connection) -> None:
+    # Closes its end of the pipe without sending, like run_training_pipeline on success
+    error_connection.close()
+
+
+def failing_training(error_connection) -> None:
+    error_connection.send("training failed")
+    error_connection.close()
+    raise SystemExit(1)
+
+
+def slow_training(error_connection) -> None:
+    time.sleep(60)
+    error_connection.close()
+
+
+def wait_until_finished(manager: TrainingJobManager, job_id: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        # finished_at is set by the monitor thread once the process has exited
+        job = manager.get(job_id)
+        if job.finished_at is not None:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Training job {job_id} did not finish within {timeout} seconds")
+
+
+def test_job_succeeds_and_next_submit_starts_new_job():
+    manager = TrainingJobManager(target=quick_training)
+
+    first, started = manager.submit()
+    assert started
+    assert wait_until_finished(manager, first.job_id).status == "succeeded"
+    assert manager.get_active_job() is None
+
+    second, started = manager.submit()
+    assert started
+    assert second.job_id != first.job_id
+    assert wait_until_finished(manager, second.job_id).status == "succeeded"
+
+
+def test_failed_job_reports_error():
+    manager = TrainingJobManager(target=failing_training)
+
+    job, _ = manager.submit()
+
+    job = wait_until_finished(manager, job.job_id)
+    assert job.status == "failed"
+    assert job.error == "training failed"
+
+
+def test_running_job_is_returned_and_can_be_cancelled():
+    manager = TrainingJobManager(target=slow_training)
+
+    job, started = manager.submit()
+    same_job, started_again = manager.submit()
+    assert started and not started_again
+    assert same_job is job
+
+    manager.cancel(job.job_id)
+
+    job = wait_until_finished(manager, job.job_id)
+    assert job.status == "cancelled"
+    assert manager.get_active_job() is None